@@ -2,46 +2,76 @@ from typing import Optional
 
 from sqlalchemy import select, update, delete, exists
 
-from db import new_session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import use_session, commit
 from db.events import EventActivityOrm, EventOrm
+from db.sync import SyncEntity, record_change
+from events.cache import activities_changed, participations_changed
+from events.exceptions import VersionConflictError
 from events.schemas import SActivityUpdate, SActivityAdd
+from events.totals import subtract_activity_scores
 
 
 class ActivityRepository:
 
     @classmethod
-    async def add_one(cls, event_id: int, data: SActivityAdd) -> Optional[int]:
-        async with new_session() as session:
+    async def add_one(cls, event_id: int, data: SActivityAdd, session: AsyncSession | None = None) -> Optional[int]:
+        async with use_session(session) as session:
             event_exists = await session.scalar(select(exists().where(EventOrm.id == event_id)))
             if not event_exists:
                 return None
 
             activity = EventActivityOrm(event_id=event_id, **data.model_dump())
             session.add(activity)
-            await session.commit()
-            await session.refresh(activity)
+            await session.flush()
+            record_change(session, SyncEntity.activity, activity.id, event_id)
+            activities_changed(session, event_id)
+            await commit(session)
             return activity.id
 
     @classmethod
-    async def get_by_event_id(cls, event_id: int) -> list[EventActivityOrm]:
-        async with new_session() as s:
+    async def get_by_event_id(cls, event_id: int, session: AsyncSession | None = None) -> list[EventActivityOrm]:
+        async with use_session(session) as s:
             q = select(EventActivityOrm).where(EventActivityOrm.event_id == event_id)
             return (await s.execute(q)).scalars().all()
 
     @classmethod
-    async def edit_one(cls, id: int, data: SActivityUpdate) -> bool:
-        async with new_session() as s:
+    async def edit_one(cls, id: int, data: SActivityUpdate, expected_version: int | None = None,
+                       session: AsyncSession | None = None) -> bool:
+        async with use_session(session) as s:
             d = data.model_dump(exclude_unset=True)
             if not d: return False
-            q = update(EventActivityOrm).where(EventActivityOrm.id == id).values(**d)
-            res = await s.execute(q)
-            await s.commit()
-            return bool(res.rowcount)
+            q = (
+                update(EventActivityOrm)
+                .where(EventActivityOrm.id == id)
+                .values(**d)
+                .returning(EventActivityOrm.event_id)
+            )
+            if expected_version is not None:
+                q = q.where(EventActivityOrm.version == expected_version)
+            event_id = (await s.execute(q)).scalar_one_or_none()
+            if event_id is not None:
+                record_change(s, SyncEntity.activity, id, event_id)
+                activities_changed(s, event_id)
+            await commit(s)
+            if event_id is None:
+                if expected_version is not None and await s.get(EventActivityOrm, id):
+                    raise VersionConflictError("Активность была изменена другим запросом.")
+                return False
+            return True
 
     @classmethod
-    async def delete_one(cls, id: int) -> bool:
-        async with new_session() as s:
-            q = delete(EventActivityOrm).where(EventActivityOrm.id == id)
-            res = await s.execute(q)
-            await s.commit()
-            return bool(res.rowcount)
+    async def delete_one(cls, id: int, session: AsyncSession | None = None) -> bool:
+        async with use_session(session) as s:
+            # Очки за активность удаляются каскадом вместе с ней — сначала убираем их из итогов
+            await subtract_activity_scores(s, id)
+            q = delete(EventActivityOrm).where(EventActivityOrm.id == id).returning(EventActivityOrm.event_id)
+            event_id = (await s.execute(q)).scalar_one_or_none()
+            if event_id is None:
+                return False
+            record_change(s, SyncEntity.activity, id, event_id, deleted=True)
+            activities_changed(s, event_id)
+            participations_changed(s, event_id)
+            await commit(s)
+            return True
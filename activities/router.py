@@ -1,25 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.roles import require_organizer_or_admin
-from db.users import UserOrm
+from events.exceptions import VersionConflictError
+from helpers.conditional import conditional_get, if_match_version
+from helpers.singleflight import single_flight
 from events.schemas import SActivityOut, SActivityUpdate, SActivityAdd
 from activities.repository import ActivityRepository
+from users.schemas import STokenClaims
+from db import get_session
 
 events_router = APIRouter(prefix="/events/{event_id}/activities", tags=["Activities"])
 activities_router = APIRouter(prefix="/activities", tags=["Activities"])
 
 
 @events_router.get("", response_model=list[SActivityOut])
-async def get_activities_for_event(event_id: int):
-    return await ActivityRepository.get_by_event_id(event_id)
+@conditional_get("activities:{event_id}")
+@single_flight(list[SActivityOut], "activities:{event_id}")
+async def get_activities_for_event(event_id: int, session: AsyncSession = Depends(get_session)):
+    return await ActivityRepository.get_by_event_id(event_id, session=session)
 
 
 @events_router.post("", response_model=dict)
 async def add_activity_to_event(event_id: int,
                                 data: SActivityAdd,
-                                user: UserOrm = Depends(require_organizer_or_admin)):
+                                user: STokenClaims = Depends(require_organizer_or_admin),
+                                session: AsyncSession = Depends(get_session)):
     try:
-        activity_id = await ActivityRepository.add_one(event_id, data)
+        activity_id = await ActivityRepository.add_one(event_id, data, session=session)
         if not activity_id:
             raise HTTPException(status_code=404, detail="Event not found")
         return {"ok": True, "activity_id": activity_id}
@@ -30,15 +38,22 @@ async def add_activity_to_event(event_id: int,
 @activities_router.patch("/{activity_id}", response_model=dict)
 async def edit_activity(activity_id: int,
                         data: SActivityUpdate,
-                        user: UserOrm = Depends(require_organizer_or_admin)):
-    if not await ActivityRepository.edit_one(activity_id, data):
+                        expected_version: int | None = Depends(if_match_version),
+                        user: STokenClaims = Depends(require_organizer_or_admin),
+                        session: AsyncSession = Depends(get_session)):
+    try:
+        updated = await ActivityRepository.edit_one(activity_id, data, expected_version, session=session)
+    except VersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    if not updated:
         raise HTTPException(status_code=404, detail="Activity not found")
     return {"ok": True}
 
 
 @activities_router.delete("/{activity_id}", response_model=dict)
 async def delete_activity(activity_id: int,
-                          user: UserOrm = Depends(require_organizer_or_admin)):
-    if not await ActivityRepository.delete_one(activity_id):
+                          user: STokenClaims = Depends(require_organizer_or_admin),
+                          session: AsyncSession = Depends(get_session)):
+    if not await ActivityRepository.delete_one(activity_id, session=session):
         raise HTTPException(status_code=404, detail="Activity not found")
     return {"ok": True}
@@ -13,8 +13,12 @@ from db import Model
 from db.users import UserOrm
 from db.events import (
     EventOrm, EventActivityOrm, EventMediaOrm, EventParticipationOrm,
-    ParticipationMemberOrm, EventJudgeOrm, ScoreOrm
+    ParticipationMemberOrm, EventJudgeOrm, ScoreOrm, EventWaitlistOrm, ParticipationTotalOrm
 )
+from db.tokens import RefreshTokenOrm, TokenRevocationOrm
+from db.rate_limits import RateLimitBucketOrm
+from db.sync import SyncChangeOrm
+from db.versions import ResourceVersionOrm
 from config import DB_URL
 
 config = context.config
@@ -0,0 +1,42 @@
+"""Add events.individuals_count/teams_count with backfill
+
+Revision ID: 0b6d4e9a2c15
+Revises: f3c8d2a6b4e1
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6d4e9a2c15'
+down_revision: Union[str, Sequence[str], None] = 'f3c8d2a6b4e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('individuals_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('events', sa.Column('teams_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute("""
+        UPDATE events SET
+            individuals_count = (
+                SELECT count(*) FROM event_participations p
+                WHERE p.event_id = events.id AND p.participant_type = 'individual'
+            ),
+            teams_count = (
+                SELECT count(*) FROM event_participations p
+                WHERE p.event_id = events.id AND p.participant_type = 'team'
+            )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('events', 'teams_count')
+    op.drop_column('events', 'individuals_count')
@@ -0,0 +1,45 @@
+"""Add event_waitlist
+
+Revision ID: 1d9f5b3e7a62
+Revises: 0b6d4e9a2c15
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1d9f5b3e7a62'
+down_revision: Union[str, Sequence[str], None] = '0b6d4e9a2c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'event_waitlist',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('participant_type',
+                  postgresql.ENUM('individual', 'team', name='participant_type_enum', create_type=False),
+                  nullable=False),
+        sa.Column('team_name', sa.String(length=80), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('event_id', 'user_id', name='uq_event_waitlist_user'),
+    )
+    op.create_index('idx_event_waitlist_fifo', 'event_waitlist', ['event_id', 'participant_type', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_event_waitlist_fifo', table_name='event_waitlist')
+    op.drop_table('event_waitlist')
@@ -0,0 +1,29 @@
+"""Add indexes for keyset pagination of participations
+
+Revision ID: 4a7c1e9b3d58
+Revises: 1d9f5b3e7a62
+Create Date: 2026-10-17 22:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a7c1e9b3d58'
+down_revision: Union[str, Sequence[str], None] = '1d9f5b3e7a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_event_participations_event_id', 'event_participations', ['event_id', 'id'])
+    op.create_index('idx_participation_members_user_id', 'participation_members', ['user_id', 'participation_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_participation_members_user_id', table_name='participation_members')
+    op.drop_index('idx_event_participations_event_id', table_name='event_participations')
@@ -0,0 +1,39 @@
+"""Add event_participations.member_count and open slots index
+
+Revision ID: 5e2b8f4c1a93
+Revises: 4a7c1e9b3d58
+Create Date: 2026-10-17 22:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b8f4c1a93'
+down_revision: Union[str, Sequence[str], None] = '4a7c1e9b3d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('event_participations',
+                  sa.Column('member_count', sa.Integer(), server_default='1', nullable=False))
+    op.execute("""
+        UPDATE event_participations SET
+            member_count = (
+                SELECT count(*) FROM participation_members m
+                WHERE m.participation_id = event_participations.id
+            )
+    """)
+    op.create_index('idx_event_participations_open_slots', 'event_participations',
+                    ['event_id', 'participant_type', 'member_count', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_event_participations_open_slots', table_name='event_participations')
+    op.drop_column('event_participations', 'member_count')
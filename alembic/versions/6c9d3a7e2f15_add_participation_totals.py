@@ -0,0 +1,46 @@
+"""Add participation_totals
+
+Revision ID: 6c9d3a7e2f15
+Revises: 5e2b8f4c1a93
+Create Date: 2026-10-17 23:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c9d3a7e2f15'
+down_revision: Union[str, Sequence[str], None] = '5e2b8f4c1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'participation_totals',
+        sa.Column('participation_id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('total_score', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['participation_id'], ['event_participations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('participation_id'),
+    )
+    op.execute("""
+        INSERT INTO participation_totals (participation_id, event_id, total_score)
+        SELECT p.id, p.event_id, coalesce(sum(s.score), 0)
+        FROM event_participations p
+        LEFT JOIN scores s ON s.participation_id = p.id
+        GROUP BY p.id, p.event_id
+    """)
+    op.create_index('idx_participation_totals_leaderboard', 'participation_totals',
+                    ['event_id', 'total_score', 'participation_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_participation_totals_leaderboard', table_name='participation_totals')
+    op.drop_table('participation_totals')
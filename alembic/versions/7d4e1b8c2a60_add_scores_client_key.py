@@ -0,0 +1,30 @@
+"""Add scores.client_key
+
+Revision ID: 7d4e1b8c2a60
+Revises: 6c9d3a7e2f15
+Create Date: 2026-10-18 01:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e1b8c2a60'
+down_revision: Union[str, Sequence[str], None] = '6c9d3a7e2f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('scores', sa.Column('client_key', sa.String(length=64), nullable=True))
+    op.create_index('idx_scores_client_key', 'scores', ['client_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_scores_client_key', table_name='scores')
+    op.drop_column('scores', 'client_key')
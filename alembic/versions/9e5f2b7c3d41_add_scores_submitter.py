@@ -0,0 +1,36 @@
+"""Scope scores.client_key to the submitter
+
+Revision ID: 9e5f2b7c3d41
+Revises: 7d4e1b8c2a60
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e5f2b7c3d41'
+down_revision: Union[str, Sequence[str], None] = '7d4e1b8c2a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('scores', sa.Column('submitter_id', sa.Uuid(), nullable=True))
+    op.create_foreign_key('scores_submitter_id_fkey', 'scores', 'users', ['submitter_id'], ['id'])
+    # До этой миграции автор оценки с ключом сохранялся только как судья
+    op.execute("UPDATE scores SET submitter_id = judge_id WHERE client_key IS NOT NULL")
+    op.drop_index('idx_scores_client_key', table_name='scores')
+    op.create_index('idx_scores_submitter_client_key', 'scores', ['submitter_id', 'client_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_scores_submitter_client_key', table_name='scores')
+    op.create_index('idx_scores_client_key', 'scores', ['client_key'], unique=True)
+    op.drop_constraint('scores_submitter_id_fkey', 'scores', type_='foreignkey')
+    op.drop_column('scores', 'submitter_id')
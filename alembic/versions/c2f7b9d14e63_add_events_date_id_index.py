@@ -0,0 +1,27 @@
+"""Add (date, id) index for keyset pagination of events
+
+Revision ID: c2f7b9d14e63
+Revises: a91d3e6c2f04
+Create Date: 2026-10-17 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f7b9d14e63'
+down_revision: Union[str, Sequence[str], None] = 'a91d3e6c2f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_events_date_id', 'events', ['date', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_events_date_id', table_name='events')
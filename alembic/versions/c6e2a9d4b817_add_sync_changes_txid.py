@@ -0,0 +1,31 @@
+"""Add sync_changes.txid
+
+Revision ID: c6e2a9d4b817
+Revises: b4d8f1a6c352
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e2a9d4b817'
+down_revision: Union[str, Sequence[str], None] = 'b4d8f1a6c352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Существующие записи давно закоммичены: txid=0 ставит их перед всеми новыми
+    op.add_column('sync_changes', sa.Column('txid', sa.BigInteger(), server_default='0', nullable=False))
+    op.create_index('idx_sync_changes_txid', 'sync_changes', ['txid', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_sync_changes_txid', table_name='sync_changes')
+    op.drop_column('sync_changes', 'txid')
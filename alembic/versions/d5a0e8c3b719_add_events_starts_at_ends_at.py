@@ -0,0 +1,42 @@
+"""Add persisted events.starts_at/ends_at with backfill
+
+Revision ID: d5a0e8c3b719
+Revises: c2f7b9d14e63
+Create Date: 2026-10-17 15:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a0e8c3b719'
+down_revision: Union[str, Sequence[str], None] = 'c2f7b9d14e63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('starts_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('events', sa.Column('ends_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Та же логика, что и в db.events.event_period: время в UTC, без времени — весь день
+    op.execute("""
+        UPDATE events SET
+            starts_at = (date + COALESCE(start_time, TIME '00:00:00')) AT TIME ZONE 'UTC',
+            ends_at = (date + COALESCE(end_time, TIME '23:59:59.999999')) AT TIME ZONE 'UTC'
+    """)
+
+    op.alter_column('events', 'starts_at', nullable=False)
+    op.alter_column('events', 'ends_at', nullable=False)
+    op.create_index('idx_events_period', 'events', ['starts_at', 'ends_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_events_period', table_name='events')
+    op.drop_column('events', 'ends_at')
+    op.drop_column('events', 'starts_at')
@@ -3,53 +3,102 @@ import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jwt import ExpiredSignatureError, InvalidTokenError
+from pydantic import ValidationError
 
+from auth.principal_cache import principal_cache
+from auth.revocation import revocation_index
 from config import SECRET_KEY, ALGORITHM
 from db.users import UserOrm
 from users.repository import UserRepository
+from users.schemas import STokenClaims
 
 bearer_scheme = HTTPBearer()
 bearer_scheme_optional = HTTPBearer(auto_error=False)
 
+credentials_exc = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
-async def get_current_user(
-        credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
-):
-    token = credentials.credentials
-    credentials_exc = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
 
+def decode_access_token(token: str) -> dict:
+    """Проверяет подпись и срок действия токена, возвращает его payload."""
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token,
             SECRET_KEY,
             algorithms=[ALGORITHM],
         )
-        user_id_str = payload.get("sub")
-        if not user_id_str:
-            raise credentials_exc
-        user_id = uuid.UUID(user_id_str)
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except (InvalidTokenError, ValueError):
+    except InvalidTokenError:
         raise credentials_exc
 
-    user = await UserRepository.get_user_by_id(user_id)
+
+async def load_principal(user_id: uuid.UUID) -> UserOrm | None:
+    """
+    Возвращает пользователя из кэша, при промахе загружает его из БД.
+    Загрузка идет в собственной короткой сессии, не в сессии запроса: в кэш попадает отсоединенный
+    объект, и откат запроса, который его загрузил, не сделает его expired для следующих запросов.
+    """
+    user = principal_cache.get(user_id)
+    if user is None:
+        user = await UserRepository.get_user_by_id(user_id)
+        if user:
+            principal_cache.set(user_id, user)
+    return user
+
+
+async def get_current_user(
+        credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+):
+    payload = decode_access_token(credentials.credentials)
+
+    try:
+        user_id_str = payload.get("sub")
+        if not user_id_str:
+            raise credentials_exc
+        user_id = uuid.UUID(user_id_str)
+    except ValueError:
+        raise credentials_exc
+
+    if revocation_index.is_revoked(payload.get("jti"), user_id, payload.get("ver", 0)):
+        raise credentials_exc
+
+    user = await load_principal(user_id)
     if not user:
         raise credentials_exc
 
     return user
 
 
+async def get_current_claims(
+        credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> STokenClaims:
+    """
+    Авторизует запрос только по подписанным claims токена, без обращения к БД.
+    Отзыв токенов проверяется по in-memory индексу.
+    """
+    payload = decode_access_token(credentials.credentials)
+
+    try:
+        claims = STokenClaims.model_validate(payload)
+    except ValidationError:
+        raise credentials_exc
+
+    if revocation_index.is_revoked(claims.jti, claims.user_id, claims.token_version):
+        raise credentials_exc
+
+    return claims
+
+
 async def get_optional_current_user(
-        credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme_optional)  # Используем новую схему
+        credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme_optional),  # Используем новую схему
 ) -> UserOrm | None:
     if not credentials:
         return None
@@ -64,5 +113,7 @@ async def get_optional_current_user(
     except (jwt.PyJWTError, ValueError, AttributeError):
         return None
 
-    user = await UserRepository.get_user_by_id(user_id)
-    return user
+    if revocation_index.is_revoked(payload.get("jti"), user_id, payload.get("ver", 0)):
+        return None
+
+    return await load_principal(user_id)
@@ -1,3 +1,8 @@
 class UserAlreadyExistsError(Exception):
     """Выбрасывается, когда пользователь с таким email или телефоном уже существует."""
     pass
+
+
+class PasswordHasherBusyError(Exception):
+    """Выбрасывается, когда очередь на хеширование паролей переполнена."""
+    pass
@@ -0,0 +1,8 @@
+from config import PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+from helpers.cache import TTLCache
+from metrics.registry import register
+
+# user_id -> UserOrm (detached). Сбрасывается при изменении пользователя.
+principal_cache = TTLCache(PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+register("principal_cache", principal_cache.stats)
+
@@ -0,0 +1,131 @@
+import datetime
+import hashlib
+import secrets
+import uuid
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from db import new_session, use_session, commit
+from db.tokens import RefreshTokenOrm, TokenRevocationOrm
+from db.users import UserOrm
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # SQLite возвращает naive datetime
+    return value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc)
+
+
+class TokenRepository:
+    @classmethod
+    async def issue_refresh_token(cls, user_id: uuid.UUID, family_id: uuid.UUID | None = None) -> str:
+        """Создает refresh-токен. Возвращается только открытое значение, в БД хранится хеш."""
+        token = secrets.token_urlsafe(48)
+        async with new_session() as session:
+            session.add(RefreshTokenOrm(
+                token_hash=_hash_token(token),
+                user_id=user_id,
+                family_id=family_id or uuid.uuid4(),
+                expires_at=_utcnow() + datetime.timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            ))
+            await session.commit()
+        return token
+
+    @classmethod
+    async def rotate_refresh_token(cls, token: str) -> tuple[UserOrm, str] | None:
+        """
+        Погашает refresh-токен и выдает следующий из той же цепочки.
+        Повторное предъявление уже погашенного токена отзывает всю цепочку.
+        """
+        async with new_session() as session:
+            stored = await session.get(RefreshTokenOrm, _hash_token(token), with_for_update=True)
+            if not stored or _as_utc(stored.expires_at) <= _utcnow():
+                return None
+
+            if stored.revoked:
+                await session.execute(
+                    update(RefreshTokenOrm)
+                    .where(RefreshTokenOrm.family_id == stored.family_id)
+                    .values(revoked=True)
+                )
+                await session.commit()
+                return None
+
+            user = await session.get(UserOrm, stored.user_id)
+            if not user:
+                return None
+
+            stored.revoked = True
+            new_token = secrets.token_urlsafe(48)
+            session.add(RefreshTokenOrm(
+                token_hash=_hash_token(new_token),
+                user_id=stored.user_id,
+                family_id=stored.family_id,
+                expires_at=_utcnow() + datetime.timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            ))
+            await session.commit()
+            return user, new_token
+
+    @classmethod
+    async def revoke_refresh_token(cls, token: str) -> None:
+        """Отзывает всю цепочку, к которой относится refresh-токен."""
+        async with new_session() as session:
+            stored = await session.get(RefreshTokenOrm, _hash_token(token))
+            if not stored:
+                return
+            await session.execute(
+                update(RefreshTokenOrm)
+                .where(RefreshTokenOrm.family_id == stored.family_id)
+                .values(revoked=True)
+            )
+            await session.commit()
+
+    @classmethod
+    async def revoke_access_token(cls, jti: str, expires_at: datetime.datetime) -> None:
+        async with new_session() as session:
+            session.add(TokenRevocationOrm(jti=jti, expires_at=expires_at))
+            await session.commit()
+
+    @classmethod
+    async def revoke_user_tokens(cls, user_id: uuid.UUID, min_version: int,
+                                 session: AsyncSession | None = None) -> datetime.datetime:
+        """
+        Отзывает все access-токены пользователя с версией ниже min_version.
+        В переданной сессии отзыв попадает в ту же транзакцию, что и изменение пользователя.
+        """
+        expires_at = _utcnow() + datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        async with use_session(session) as session:
+            session.add(TokenRevocationOrm(user_id=user_id, token_version=min_version, expires_at=expires_at))
+            await session.execute(
+                update(RefreshTokenOrm).where(RefreshTokenOrm.user_id == user_id).values(revoked=True)
+            )
+            await commit(session)
+        return expires_at
+
+    @classmethod
+    async def get_revocations_since(cls, last_id: int) -> list[TokenRevocationOrm]:
+        async with new_session() as session:
+            query = (
+                select(TokenRevocationOrm)
+                .where(TokenRevocationOrm.id > last_id, TokenRevocationOrm.expires_at > _utcnow())
+                .order_by(TokenRevocationOrm.id)
+            )
+            result = await session.execute(query)
+            return result.scalars().all()
+
+    @classmethod
+    async def delete_expired(cls) -> None:
+        async with new_session() as session:
+            now = _utcnow()
+            await session.execute(delete(TokenRevocationOrm).where(TokenRevocationOrm.expires_at <= now))
+            await session.execute(delete(RefreshTokenOrm).where(RefreshTokenOrm.expires_at <= now))
+            await session.commit()
@@ -0,0 +1,83 @@
+import asyncio
+import datetime
+import time
+import uuid
+
+from auth.repository import TokenRepository
+from metrics.registry import register
+
+
+def _timestamp(value: datetime.datetime) -> float:
+    # SQLite возвращает naive datetime, в БД всегда пишется UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+class RevocationIndex:
+    """
+    In-memory индекс отозванных access-токенов.
+    Проверка выполняется за O(1) и не обращается к БД; записи живут,
+    пока не истечет срок действия токенов, к которым они относятся.
+    """
+
+    def __init__(self):
+        self._jtis: dict[str, float] = {}
+        # user_id -> (минимальная допустимая версия токена, время истечения записи)
+        self._users: dict[uuid.UUID, tuple[int, float]] = {}
+        self.last_id = 0
+        self.rejected = 0
+
+    def is_revoked(self, jti: str | None, user_id: uuid.UUID, token_version: int) -> bool:
+        revoked = jti in self._jtis
+        if not revoked:
+            entry = self._users.get(user_id)
+            revoked = entry is not None and token_version < entry[0]
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def revoke_jti(self, jti: str, expires_at: datetime.datetime) -> None:
+        self._jtis[jti] = _timestamp(expires_at)
+
+    def revoke_user(self, user_id: uuid.UUID, min_version: int, expires_at: datetime.datetime) -> None:
+        current = self._users.get(user_id)
+        if current is None or current[0] <= min_version:
+            self._users[user_id] = (min_version, _timestamp(expires_at))
+
+    def prune(self) -> None:
+        now = time.time()
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._users = {uid: entry for uid, entry in self._users.items() if entry[1] > now}
+
+    async def sync(self) -> None:
+        """Дочитывает из БД отзывы, сделанные другими воркерами."""
+        # Перечитываем небольшое окно: строки с меньшим id могли закоммититься позже
+        for row in await TokenRepository.get_revocations_since(max(0, self.last_id - 100)):
+            if row.jti:
+                self.revoke_jti(row.jti, row.expires_at)
+            if row.user_id and row.token_version is not None:
+                self.revoke_user(row.user_id, row.token_version, row.expires_at)
+            self.last_id = max(self.last_id, row.id)
+        self.prune()
+
+    async def run_sync_loop(self, interval: float) -> None:
+        while True:
+            try:
+                await self.sync()
+                await TokenRepository.delete_expired()
+            except Exception as e:
+                print(f"Revocation sync failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        return {
+            "revoked_jtis": len(self._jtis),
+            "revoked_users": len(self._users),
+            "last_id": self.last_id,
+            "rejected": self.rejected,
+        }
+
+
+revocation_index = RevocationIndex()
+register("revocation_index", revocation_index.stats)
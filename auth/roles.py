@@ -1,31 +1,33 @@
 from fastapi import Depends, HTTPException, status
-from auth.dependencies import get_current_user
-from db.users import UserOrm, RoleEnum
+from auth.dependencies import get_current_claims
+from db.users import RoleEnum
+from users.schemas import STokenClaims
 
 
 def require_role(required_role: RoleEnum):
     """
     Фабрика зависимостей для проверки конкретной роли.
+    Роль берется из claims токена, пользователь из БД не загружается.
     """
 
-    def dependency(current_user: UserOrm = Depends(get_current_user)) -> UserOrm:
-        if current_user.role != required_role:
+    def dependency(claims: STokenClaims = Depends(get_current_claims)) -> STokenClaims:
+        if claims.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions",
             )
-        return current_user
+        return claims
 
     return dependency
 
 
-def require_organizer_or_admin(current_user: UserOrm = Depends(get_current_user)) -> UserOrm:
+def require_organizer_or_admin(claims: STokenClaims = Depends(get_current_claims)) -> STokenClaims:
     """
     Зависимость, которая разрешает доступ организаторам И администраторам.
     """
-    if current_user.role not in [RoleEnum.organizer, RoleEnum.admin]:
+    if claims.role not in [RoleEnum.organizer, RoleEnum.admin]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
-    return current_user
+    return claims
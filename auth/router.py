@@ -1,47 +1,107 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.exceptions import UserAlreadyExistsError
-from auth.security import verify_password, create_access_token
+from auth.dependencies import get_current_claims
+from auth.exceptions import UserAlreadyExistsError, PasswordHasherBusyError
+from auth.hashing import password_hasher
+from auth.repository import TokenRepository
+from auth.revocation import revocation_index
+from auth.security import create_access_token, user_token_claims
+from config import LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_LIMIT_PER_IDENTIFIER, REGISTER_RATE_LIMIT_PER_IP
+from db import get_session
+from db.users import UserOrm
+from ratelimit.limiter import RateLimiter, json_field
 from users.repository import UserRepository
-from users.schemas import SUserRegister, SUserOut, TokenOut, SLoginRequest
+from users.schemas import SUserRegister, SUserOut, TokenOut, SLoginRequest, SRefreshRequest, STokenClaims
 
 router = APIRouter(
     prefix="/auth",
     tags=["Auth"],
 )
 
+login_ip_limiter = RateLimiter("login_ip", LOGIN_RATE_LIMIT_PER_IP)
+login_identifier_limiter = RateLimiter("login_identifier", LOGIN_RATE_LIMIT_PER_IDENTIFIER,
+                                       key_func=json_field("login_identifier"))
+register_ip_limiter = RateLimiter("register_ip", REGISTER_RATE_LIMIT_PER_IP)
+
+hasher_busy_exc = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Сервис перегружен, попробуйте позже.",
+    headers={"Retry-After": "1"},
+)
+
 
 @router.post(
     "/register",
     response_model=SUserOut,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(register_ip_limiter)],
 )
-async def register_user(user_data: SUserRegister):
+async def register_user(user_data: SUserRegister, session: AsyncSession = Depends(get_session)):
     try:
-        new_user = await UserRepository.create_user(user_data)
+        new_user = await UserRepository.create_user(user_data, session=session)
         return new_user
     except UserAlreadyExistsError:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Пользователь с таким email или телефоном уже существует.",
         )
+    except PasswordHasherBusyError:
+        raise hasher_busy_exc
 
 
-@router.post("/login", response_model=TokenOut)
+@router.post(
+    "/login",
+    response_model=TokenOut,
+    dependencies=[Depends(login_ip_limiter), Depends(login_identifier_limiter)],
+)
 async def login_for_access_token(
-        login_data: SLoginRequest
+        login_data: SLoginRequest,
 ):
+    # Своя короткая сессия: соединение возвращается в пул до проверки пароля (bcrypt)
     user = await UserRepository.get_user_by_login_identifier(login_data.login_identifier)
 
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    try:
+        password_ok = bool(user) and await password_hasher.verify(login_data.password, user.hashed_password)
+    except PasswordHasherBusyError:
+        raise hasher_busy_exc
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный логин или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    refresh_token = await TokenRepository.issue_refresh_token(user.id)
+    return issue_tokens(user, refresh_token)
+
+
+@router.post("/refresh", response_model=TokenOut)
+async def refresh_access_token(data: SRefreshRequest):
+    """Обменивает refresh-токен на новую пару токенов. Старый refresh-токен погашается."""
+    rotated = await TokenRepository.rotate_refresh_token(data.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user, refresh_token = rotated
+    return issue_tokens(user, refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(data: SRefreshRequest, claims: STokenClaims = Depends(get_current_claims)):
+    """Отзывает текущий access-токен и цепочку refresh-токенов."""
+    await TokenRepository.revoke_refresh_token(data.refresh_token)
+    await TokenRepository.revoke_access_token(claims.jti, claims.exp)
+    revocation_index.revoke_jti(claims.jti, claims.exp)
+
+
+def issue_tokens(user: UserOrm, refresh_token: str) -> TokenOut:
     access_token, expires_in = create_access_token(
-        data={"sub": str(user.id)}
+        data=user_token_claims(user)
     )
-
-    return TokenOut(access_token=access_token, expires_in=expires_in)
+    return TokenOut(access_token=access_token, refresh_token=refresh_token, expires_in=expires_in)
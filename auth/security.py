@@ -1,8 +1,11 @@
 import datetime
+import uuid
+
 import jwt
 from passlib.context import CryptContext
 
 from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from db.users import UserOrm
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -17,6 +20,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def user_token_claims(user: UserOrm) -> dict:
+    """Возвращает claims, по которым можно авторизовать запрос без обращения к БД."""
+    return {
+        "sub": str(user.id),
+        "role": user.role.value,
+        "handle": user.handle,
+        "ver": user.token_version,
+    }
+
+
 def create_access_token(data: dict, expires_delta_minutes: int | None = None) -> tuple[str, int]:
     """
     Создает JWT-токен и возвращает его вместе со сроком жизни в секундах.
@@ -29,7 +42,7 @@ def create_access_token(data: dict, expires_delta_minutes: int | None = None) ->
         expire_delta = datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     expire = datetime.datetime.now(datetime.timezone.utc) + expire_delta
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
 
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     expires_in_seconds = int(expire_delta.total_seconds())
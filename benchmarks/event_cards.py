@@ -0,0 +1,96 @@
+"""
+Память и латентность выборки карточек мероприятий: 1000 мероприятий × 50 медиа.
+
+Сравнивает прежний способ (selectinload всех медиа и поиск превью в Python)
+с текущим EventRepository.get_all (коррелированный подзапрос по idx_event_media).
+
+    python -m benchmarks.event_cards --events 1000 --media 50
+"""
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.common import bench_args, reset_tables
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--events", type=int, default=1000)
+parser.add_argument("--media", type=int, default=50)
+parser.add_argument("--repeat", type=int, default=5)
+args = bench_args(parser, "bench_event_cards.db")
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+from db import new_session  # noqa: E402
+from db.events import EventOrm, EventMediaOrm, MediaEnum, event_period  # noqa: E402
+from events.repository import EventRepository  # noqa: E402
+
+
+async def seed() -> None:
+    today = datetime.date.today()
+    events = []
+    for i in range(args.events):
+        date = today + datetime.timedelta(days=i % 365)
+        starts_at, ends_at = event_period(date, None, None)
+        events.append({"id": i + 1, "title": f"Event {i}", "date": date, "starts_at": starts_at,
+                       "ends_at": ends_at, "is_team": False, "max_members": 10})
+    async with new_session() as session:
+        await session.execute(insert(EventOrm), events)
+        media = [
+            {"event_id": e + 1, "url": f"https://cdn.example.com/{e}/{m}.png", "media_type": MediaEnum.image,
+             "order": m}
+            for e in range(args.events) for m in range(args.media)
+        ]
+        for start in range(0, len(media), 10_000):
+            await session.execute(insert(EventMediaOrm), media[start:start + 10_000])
+        await session.commit()
+
+
+async def legacy_cards() -> list[dict]:
+    async with new_session() as session:
+        res = await session.execute(select(EventOrm).options(selectinload(EventOrm.media)))
+        cards = []
+        for e in res.scalars().all():
+            preview_url = None
+            for m in e.media:
+                if m.media_type == "image" and m.order == 0:
+                    preview_url = m.url
+                    break
+            cards.append({"id": e.id, "title": e.title, "date": e.date, "state": e.state,
+                          "preview_url": preview_url, "is_team": e.is_team})
+        return cards
+
+
+async def current_cards() -> list[dict]:
+    cards, _ = await EventRepository.get_all(limit=args.events)
+    return cards
+
+
+async def measure(name: str, load) -> None:
+    latencies = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        cards = await load()
+        latencies.append((time.perf_counter() - started) * 1000)
+    assert len(cards) == args.events
+
+    tracemalloc.start()
+    await load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>8}: median {statistics.median(latencies):8.1f} ms, peak memory {peak / 2 ** 20:7.1f} MiB")
+
+
+async def main():
+    await reset_tables()
+    await seed()
+    print(f"{args.events} events x {args.media} media")
+    await measure("legacy", legacy_cards)
+    await measure("current", current_cards)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
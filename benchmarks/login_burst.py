@@ -0,0 +1,98 @@
+"""
+p99 латентность GET /events, пока параллельно выполняются 50 логинов.
+
+Запуск (по умолчанию на локальной SQLite-базе):
+    python -m benchmarks.login_burst --executor thread
+    python -m benchmarks.login_burst --executor inline   # старое поведение: bcrypt в event loop
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from benchmarks.common import bench_args, reset_tables
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--executor", choices=["thread", "process", "inline"], default="thread")
+parser.add_argument("--logins", type=int, default=50)
+parser.add_argument("--duration", type=float, default=3.0, help="seconds of GET /events polling")
+args = bench_args(parser, "bench_login_burst.db")
+os.environ["PASSWORD_HASH_EXECUTOR"] = args.executor
+# Все запросы идут с одного адреса, лимиты на логин здесь не измеряются
+os.environ.setdefault("LOGIN_RATE_LIMIT_PER_IP", "1000000/1")
+os.environ.setdefault("REGISTER_RATE_LIMIT_PER_IP", "1000000/1")
+
+from httpx import AsyncClient, ASGITransport  # noqa: E402
+
+from main import app  # noqa: E402
+
+PASSWORD = "password123"
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def poll_events(client: AsyncClient, stop: asyncio.Event) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        resp = await client.get("/api/events")
+        resp.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def login(client: AsyncClient, i: int) -> None:
+    resp = await client.post(
+        "/api/auth/login",
+        json={"login_identifier": f"bench{i}@example.com", "password": PASSWORD},
+    )
+    resp.raise_for_status()
+
+
+async def run_phase(client: AsyncClient, with_logins: bool) -> list[float]:
+    stop = asyncio.Event()
+    poller = asyncio.create_task(poll_events(client, stop))
+    if with_logins:
+        await asyncio.gather(*(login(client, i) for i in range(args.logins)))
+    else:
+        await asyncio.sleep(args.duration)
+    stop.set()
+    return await poller
+
+
+async def main():
+    await reset_tables()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(args.logins):
+            resp = await client.post("/api/auth/register", json={
+                "full_name": f"Bench User {i}", "email": f"bench{i}@example.com",
+                "phone": f"+7900{i:07d}", "password": PASSWORD,
+                "birthday": "2000-01-01", "gender": "male",
+            })
+            resp.raise_for_status()
+
+        idle = await run_phase(client, with_logins=False)
+        started = time.perf_counter()
+        burst = await run_phase(client, with_logins=True)
+        burst_time = time.perf_counter() - started
+
+    print(f"executor={args.executor} logins={args.logins}")
+    for name, values in (("idle", idle), ("login burst", burst)):
+        if not values:
+            print(f"{name:>12}: no samples")
+            continue
+        print(f"{name:>12}: n={len(values):4d} p50={statistics.median(values):8.1f} ms "
+              f"p99={percentile(values, 0.99):8.1f} ms max={max(values):8.1f} ms")
+    print(f"burst wall time: {burst_time:.2f} s")
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
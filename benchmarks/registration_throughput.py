@@ -0,0 +1,111 @@
+"""
+Пропускная способность регистрации при большом числе существующих пользователей.
+
+Сравнивает старую схему (до 20 последовательных SELECT по handle, затем INSERT)
+с текущей UserRepository.create_user (INSERT сразу, повтор при коллизии).
+bcrypt исключен из замера: хеш заранее посчитан, измеряется только работа с БД.
+
+    python -m benchmarks.registration_throughput --existing 10000
+    python -m benchmarks.registration_throughput --existing 1000000
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import string
+import time
+import uuid
+
+from benchmarks.common import bench_args, reset_tables
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--existing", type=int, default=10_000)
+parser.add_argument("--registrations", type=int, default=1_000)
+parser.add_argument("--concurrency", type=int, default=10)
+args = bench_args(parser, "bench_registration.db")
+
+from sqlalchemy import insert, select, func  # noqa: E402
+
+from auth.hashing import password_hasher  # noqa: E402
+from auth.security import get_password_hash  # noqa: E402
+from db import new_session  # noqa: E402
+from db.users import UserOrm  # noqa: E402
+from users.repository import UserRepository  # noqa: E402
+from users.schemas import SUserRegister  # noqa: E402
+
+HASHED = get_password_hash("password123")
+
+
+async def fake_hash(password: str) -> str:
+    return HASHED
+
+
+password_hasher.hash = fake_hash
+
+
+def random_handle() -> str:
+    return "".join(random.choices(string.digits, k=10))
+
+
+async def seed_users(count: int) -> None:
+    batch = 10_000
+    for start in range(0, count, batch):
+        rows = [{
+            "id": uuid.uuid4(), "handle": random_handle(), "email": f"seed{i}@example.com",
+            "hashed_password": HASHED, "full_name": "Seed User", "phone": f"+7{i:010d}",
+            "birthday": datetime.date(2000, 1, 1), "gender": "male",
+        } for i in range(start, min(start + batch, count))]
+        async with new_session() as session:
+            await session.execute(insert(UserOrm), rows)
+            await session.commit()
+
+
+async def legacy_create_user(data: SUserRegister) -> None:
+    """Регистрация в том виде, в каком она была до оптимизации."""
+    async with new_session() as session:
+        user_dict = data.model_dump()
+        user_dict["hashed_password"] = HASHED
+        user_dict.pop("password")
+        for _ in range(20):
+            handle = random_handle()
+            existing = await session.execute(select(UserOrm).where(UserOrm.handle == handle))
+            if not existing.scalar_one_or_none():
+                break
+        user_dict["handle"] = handle
+        session.add(UserOrm(**user_dict))
+        await session.flush()
+        await session.commit()
+
+
+async def run(name: str, create, offset: int) -> None:
+    queue = asyncio.Queue()
+    for i in range(args.registrations):
+        queue.put_nowait(SUserRegister(
+            full_name="Bench User", email=f"{name}{i}@example.com", phone=f"+8{offset + i:010d}",
+            password="password123", birthday=datetime.date(2000, 1, 1), gender="male",
+        ))
+
+    async def worker():
+        while not queue.empty():
+            await create(queue.get_nowait())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    print(f"{name:>8}: {args.registrations / elapsed:8.1f} registrations/s ({elapsed:.2f} s)")
+
+
+async def main():
+    await reset_tables()
+    started = time.perf_counter()
+    await seed_users(args.existing)
+    async with new_session() as session:
+        total = await session.scalar(select(func.count()).select_from(UserOrm))
+    print(f"seeded {total} users in {time.perf_counter() - started:.1f} s")
+
+    await run("legacy", legacy_create_user, offset=0)
+    await run("current", UserRepository.create_user, offset=args.registrations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
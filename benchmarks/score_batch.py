@@ -0,0 +1,96 @@
+"""
+Выставление оценок судьей: по одной через EventRepository.add_score (как POST /scores)
+против одной пачки EventRepository.add_scores_batch (как POST /scores/batch).
+Раунд — оценки судьи для всех команд по всем активностям; печатает раунды в секунду
+и время одного раунда.
+
+    python -m benchmarks.score_batch --teams 20 --activities 3 --rounds 50
+    DB_URL=postgresql+asyncpg://.../bench_scores python -m benchmarks.score_batch --rounds 200
+"""
+import argparse
+import asyncio
+import datetime
+import time
+import uuid
+
+from benchmarks.common import bench_args, reset_tables
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--teams", type=int, default=20)
+parser.add_argument("--activities", type=int, default=3)
+parser.add_argument("--rounds", type=int, default=50)
+args = bench_args(parser, "bench_score_batch.db")
+
+from sqlalchemy import insert  # noqa: E402
+
+from db import new_session  # noqa: E402
+from db.events import EventOrm, EventParticipationOrm, EventActivityOrm, EventJudgeOrm  # noqa: E402
+from db.events import ParticipantTypeEnum, ParticipationTotalOrm, event_period  # noqa: E402
+from db.users import UserOrm  # noqa: E402
+from events.repository import EventRepository  # noqa: E402
+from events.schemas import SScoreAdd  # noqa: E402
+
+
+async def seed() -> tuple[uuid.UUID, list[SScoreAdd]]:
+    """Командное мероприятие с судьей; возвращает судью и оценки одного раунда."""
+    today = datetime.date.today()
+    starts_at, ends_at = event_period(today, None, None)
+    judge = uuid.uuid4()
+    captains = [uuid.uuid4() for _ in range(args.teams)]
+    async with new_session() as session:
+        await session.execute(insert(UserOrm), [{
+            "id": user_id, "handle": f"{i:010d}", "email": f"score{i}@example.com",
+            "hashed_password": "-", "full_name": "Bench User", "phone": f"+7{i:010d}",
+            "birthday": datetime.date(2000, 1, 1), "gender": "male",
+        } for i, user_id in enumerate([judge] + captains)])
+        event = EventOrm(title="Finals", date=today, starts_at=starts_at, ends_at=ends_at, is_team=True,
+                         max_teams=args.teams, max_members=5, teams_count=args.teams)
+        session.add(event)
+        await session.flush()
+        session.add(EventJudgeOrm(event_id=event.id, user_id=judge))
+
+        teams = []
+        for captain in captains:
+            team = EventParticipationOrm(event_id=event.id, creator_id=captain,
+                                         participant_type=ParticipantTypeEnum.team, team_name="Bench")
+            team.total = ParticipationTotalOrm(event_id=event.id)
+            session.add(team)
+            teams.append(team)
+        activities = [EventActivityOrm(event_id=event.id, name=f"Round {i}", is_scoreable=True, max_score=100)
+                      for i in range(args.activities)]
+        session.add_all(activities)
+        await session.flush()
+        scores = [SScoreAdd(participation_id=team.id, activity_id=activity.id, score=10)
+                  for team in teams for activity in activities]
+        await session.commit()
+    return judge, scores
+
+
+async def one_by_one(judge: uuid.UUID, scores: list[SScoreAdd]) -> None:
+    for score in scores:
+        await EventRepository.add_score(judge, score)
+
+
+async def batch(judge: uuid.UUID, scores: list[SScoreAdd]) -> None:
+    results = await EventRepository.add_scores_batch(judge, scores)
+    assert not any(isinstance(result, Exception) for result in results)
+
+
+async def run(name: str, submit, judge: uuid.UUID, scores: list[SScoreAdd]) -> None:
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        await submit(judge, scores)
+    elapsed = time.perf_counter() - started
+    print(f"{name:>10}: {args.rounds / elapsed:8.1f} rounds/s, "
+          f"{elapsed / args.rounds * 1000:7.1f} ms per {len(scores)} scores")
+
+
+async def main():
+    await reset_tables()
+    judge, scores = await seed()
+    await run("one-by-one", one_by_one, judge, scores)
+    await run("batch", batch, judge, scores)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
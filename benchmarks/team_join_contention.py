@@ -0,0 +1,123 @@
+"""
+Пропускная способность вступления в команды при конкуренции за места.
+
+Много пользователей одновременно вступают в небольшое число команд. Сравнивает
+прежнюю схему (несколько сессий, проверка состава без блокировки) с текущей
+EventRepository.add_member_to_participation (одна транзакция, строка участия
+заблокирована). Кроме скорости печатает число переполненных команд.
+
+    python -m benchmarks.team_join_contention --teams 20 --team-size 5 --users 2000
+    DB_URL=postgresql+asyncpg://.../bench_teams python -m benchmarks.team_join_contention --concurrency 50
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import time
+import uuid
+
+from benchmarks.common import bench_args, reset_tables
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--teams", type=int, default=20)
+parser.add_argument("--team-size", type=int, default=5)
+parser.add_argument("--users", type=int, default=2_000)
+parser.add_argument("--concurrency", type=int, default=20)
+args = bench_args(parser, "bench_team_join.db")
+
+from sqlalchemy import insert, select, func  # noqa: E402
+
+from db import new_session  # noqa: E402
+from db.events import EventOrm, EventParticipationOrm, ParticipationMemberOrm, event_period  # noqa: E402
+from db.events import ParticipantTypeEnum  # noqa: E402
+from db.users import UserOrm  # noqa: E402
+from events.repository import EventRepository  # noqa: E402
+
+
+async def seed(offset: int) -> tuple[list[int], list[uuid.UUID]]:
+    """Одно мероприятие на каждую команду (в мероприятии пользователь может быть только в одной)."""
+    today = datetime.date.today()
+    starts_at, ends_at = event_period(today, None, None)
+    captains = [uuid.uuid4() for _ in range(args.teams)]
+    users = [uuid.uuid4() for _ in range(args.users)]
+    async with new_session() as session:
+        await session.execute(insert(UserOrm), [{
+            "id": user_id, "handle": f"{offset + i:010d}", "email": f"join{offset + i}@example.com",
+            "hashed_password": "-", "full_name": "Bench User", "phone": f"+7{offset + i:010d}",
+            "birthday": datetime.date(2000, 1, 1), "gender": "male",
+        } for i, user_id in enumerate(captains + users)])
+        team_ids = []
+        for captain in captains:
+            event = EventOrm(title="Bench", date=today, starts_at=starts_at, ends_at=ends_at, is_team=True,
+                             max_teams=1, max_members=args.team_size, teams_count=1)
+            session.add(event)
+            await session.flush()
+            participation = EventParticipationOrm(event_id=event.id, creator_id=captain,
+                                                  participant_type=ParticipantTypeEnum.team, team_name="Bench")
+            participation.members.append(ParticipationMemberOrm(user_id=captain))
+            session.add(participation)
+            await session.flush()
+            team_ids.append(participation.id)
+        await session.commit()
+    return team_ids, users
+
+
+async def legacy_add_member(participation_id: int, user_id: uuid.UUID) -> None:
+    """Вступление в команду в том виде, в каком оно было до оптимизации."""
+    async with new_session() as session:
+        participation = await EventRepository.get_participation_by_id(participation_id)
+        event = await session.get(EventOrm, participation.event_id)
+        if len(participation.members) >= event.max_members:
+            raise ValueError("Команда уже заполнена.")
+        existing = await session.execute(
+            select(ParticipationMemberOrm).join(EventParticipationOrm).where(
+                ParticipationMemberOrm.user_id == user_id,
+                EventParticipationOrm.event_id == participation.event_id,
+            )
+        )
+        if existing.scalar_one_or_none():
+            raise ValueError("Пользователь уже участвует в этом мероприятии.")
+        session.add(ParticipationMemberOrm(participation_id=participation_id, user_id=user_id))
+        await session.commit()
+
+
+async def run(name: str, add_member, offset: int) -> None:
+    team_ids, users = await seed(offset)
+    queue = asyncio.Queue()
+    for user_id in users:
+        queue.put_nowait((random.choice(team_ids), user_id))
+    joined = rejected = 0
+
+    async def worker():
+        nonlocal joined, rejected
+        while not queue.empty():
+            try:
+                await add_member(*queue.get_nowait())
+                joined += 1
+            except ValueError:
+                rejected += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    async with new_session() as session:
+        sizes = await session.execute(
+            select(func.count())
+            .select_from(ParticipationMemberOrm)
+            .where(ParticipationMemberOrm.participation_id.in_(team_ids))
+            .group_by(ParticipationMemberOrm.participation_id)
+        )
+        overfilled = sum(size > args.team_size for size in sizes.scalars())
+    print(f"{name:>8}: {args.users / elapsed:8.1f} attempts/s ({elapsed:.2f} s), "
+          f"joined {joined}, rejected {rejected}, overfilled teams {overfilled}/{args.teams}")
+
+
+async def main():
+    await reset_tables()
+    await run("legacy", legacy_add_member, offset=0)
+    await run("current", EventRepository.add_member_to_participation, offset=1_000_000)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
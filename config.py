@@ -17,14 +17,62 @@ POSTGRES_DB = os.getenv("POSTGRES_DB", "dev_db")
 if POSTGRES_PASSWORD is None:
     raise ValueError("POSTGRES_PASSWORD не определен")
 
-DB_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+DB_URL = os.getenv(
+    "DB_URL",
+    f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}",
+)
 
 BASE_DIR = Path(__file__).resolve().parent
 
 SECRET_KEY = os.getenv("SECRET_KEY",
                        "yRvebEaFw2Oihv6e9MY0MZkhkvd7yhA-cG7PtSIjooFQooo7Oj2FugKYfL_39yXnr7B84Eg1r8l-EWbpkCA8Kw")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 1488
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "5"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# Как часто воркер дочитывает журнал отозванных токенов из БД
+REVOCATION_SYNC_INTERVAL_SECONDS = float(os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", "5"))
+
+# bcrypt выполняется в отдельном пуле: "thread", "process" или "inline" (прямо в event loop)
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "256"))
+
+# Лимиты на /auth/login и /auth/register: "запросов/секунд". Backend: "memory" или "database"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+LOGIN_RATE_LIMIT_PER_IP = os.getenv("LOGIN_RATE_LIMIT_PER_IP", "30/60")
+LOGIN_RATE_LIMIT_PER_IDENTIFIER = os.getenv("LOGIN_RATE_LIMIT_PER_IDENTIFIER", "10/60")
+REGISTER_RATE_LIMIT_PER_IP = os.getenv("REGISTER_RATE_LIMIT_PER_IP", "10/60")
+# Адреса/подсети обратных прокси через запятую (например, "10.0.0.0/8,127.0.0.1").
+# X-Forwarded-For учитывается только от них; по умолчанию заголовок игнорируется
+TRUSTED_PROXIES = [p.strip() for p in os.getenv("TRUSTED_PROXIES", "").split(",") if p.strip()]
+
+# Кэш авторизованных пользователей для get_current_user
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
+# Кэш тела GET /events/{id}. Свежесть сверяется с общей версией мероприятия, TTL ограничивает память
+EVENT_CACHE_TTL_SECONDS = float(os.getenv("EVENT_CACHE_TTL_SECONDS", "30"))
+EVENT_CACHE_MAX_SIZE = int(os.getenv("EVENT_CACHE_MAX_SIZE", "1000"))
+
+
+# Регистрации на одно мероприятие собираются в пачки и обрабатываются одной транзакцией.
+# Пока мероприятие заполнено (проверяется не чаще раза в ADMISSION_FULL_TTL_SECONDS),
+# заявки без листа ожидания отклоняются без обращения к БД
+ADMISSION_BATCH_SIZE = int(os.getenv("ADMISSION_BATCH_SIZE", "50"))
+ADMISSION_FULL_TTL_SECONDS = float(os.getenv("ADMISSION_FULL_TTL_SECONDS", "1"))
+
+# Живой лидерборд (SSE): размер очереди кадров на зрителя (при переполнении он получает
+# свежий снимок) и интервал пинга в простое
+LEADERBOARD_STREAM_QUEUE_SIZE = int(os.getenv("LEADERBOARD_STREAM_QUEUE_SIZE", "64"))
+LEADERBOARD_STREAM_HEARTBEAT_SECONDS = float(os.getenv("LEADERBOARD_STREAM_HEARTBEAT_SECONDS", "15"))
+# Мост между воркерами (PostgreSQL LISTEN/NOTIFY): изменения копятся столько секунд и уходят
+# одним NOTIFY; оборванное LISTEN-соединение переподключается с паузой до ..._RECONNECT_MAX_SECONDS
+LEADERBOARD_NOTIFY_DELAY_SECONDS = float(os.getenv("LEADERBOARD_NOTIFY_DELAY_SECONDS", "0.05"))
+LEADERBOARD_BRIDGE_RECONNECT_MAX_SECONDS = float(os.getenv("LEADERBOARD_BRIDGE_RECONNECT_MAX_SECONDS", "30"))
+
+# Горячие GET склеиваются в один вызов; готовое тело еще столько секунд отдается без запроса
+# к БД (0 — только склейка одновременных). Ключ включает версии ресурсов, запись его меняет
+SINGLE_FLIGHT_TTL_SECONDS = float(os.getenv("SINGLE_FLIGHT_TTL_SECONDS", "0.5"))
 
 if ENV == "dev":
     MEDIA_DIR = BASE_DIR / "media"
@@ -1,10 +1,88 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Session
 
 from config import DB_URL
 
 engine = create_async_engine(DB_URL)
 new_session = async_sessionmaker(engine, expire_on_commit=False)
 
+# Ключи session.info
+_REQUEST_SCOPED = "request_scoped"
+_ON_COMMIT = "on_commit"
+_ON_END = "on_transaction_end"
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость FastAPI: одна сессия, одно соединение и одна транзакция на весь запрос.
+    Репозитории в этой сессии только flush-ат (см. commit), а коммит делается здесь, после
+    эндпоинта и до отправки ответа; при исключении изменения запроса откатываются целиком.
+    """
+    async with new_session() as session:
+        session.info[_REQUEST_SCOPED] = True
+        try:
+            yield session
+        except BaseException:
+            await session.rollback()
+            raise
+        await session.commit()
+
+
+@asynccontextmanager
+async def use_session(session: AsyncSession | None = None) -> AsyncIterator[AsyncSession]:
+    """
+    Сессия для метода репозитория: переданная вызывающим (сессия запроса) или новая.
+    Переданную сессию не закрываем — ею владеет вызывающий.
+    """
+    if session is not None:
+        yield session
+        return
+    async with new_session() as own_session:
+        yield own_session
+
+
+async def commit(session: AsyncSession) -> None:
+    """
+    Завершает работу метода репозитория. Свою сессию коммитит; в сессии запроса
+    только отправляет изменения в БД — транзакцию закоммитит get_session.
+    """
+    if session.info.get(_REQUEST_SCOPED):
+        await session.flush()
+    else:
+        await session.commit()
+
+
+def on_commit(session: AsyncSession, callback: Callable, *args) -> None:
+    """
+    Вызывает callback(*args) после коммита текущей транзакции сессии — для сбросов
+    кэшей и уведомлений, которые не должны опережать коммит. При откате не вызывается.
+    """
+    session.info.setdefault(_ON_COMMIT, []).append((callback, args))
+
+
+def on_transaction_end(session: AsyncSession, callback: Callable, *args) -> None:
+    """Вызывает callback(*args), когда текущая транзакция сессии закончится коммитом или откатом."""
+    session.info.setdefault(_ON_END, []).append((callback, args))
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session: Session) -> None:
+    for callback, args in session.info.pop(_ON_COMMIT, ()):
+        callback(*args)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_on_transaction_end(session: Session, transaction) -> None:
+    if transaction.parent is not None:  # savepoint
+        return
+    session.info.pop(_ON_COMMIT, None)
+    for callback, args in session.info.pop(_ON_END, ()):
+        callback(*args)
+
+
 class Model(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
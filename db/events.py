@@ -3,13 +3,60 @@ import uuid
 from enum import Enum
 from typing import List
 
-from sqlalchemy import ForeignKey, Enum as SQLEnum, Index, String, Boolean, Numeric, DateTime, func
+from sqlalchemy import ForeignKey, Enum as SQLEnum, Index, UniqueConstraint, String, Boolean, Numeric, DateTime, func, and_, \
+    literal_column, event as sa_event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from db import Model
 from db.users import UserOrm
 
 
-class EventOrm(Model):
+def event_period(date: datetime.date,
+                 start_time: datetime.time | None,
+                 end_time: datetime.time | None) -> tuple[datetime.datetime, datetime.datetime]:
+    """Начало и конец мероприятия в UTC; без времени мероприятие занимает весь день."""
+    start_dt = (
+        datetime.datetime.combine(date, start_time or datetime.time.min,
+                                  tzinfo=datetime.timezone.utc)
+    )
+    end_dt = (
+        datetime.datetime.combine(date, end_time or datetime.time.max,
+                                  tzinfo=datetime.timezone.utc)
+    )
+    return start_dt, end_dt
+
+
+def event_state(date: datetime.date,
+                start_time: datetime.time | None,
+                end_time: datetime.time | None) -> str:
+    return period_state(*event_period(date, start_time, end_time))
+
+
+def period_state(start_dt: datetime.datetime, end_dt: datetime.datetime) -> str:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if start_dt <= now <= end_dt:
+        return "current"
+    elif now < start_dt:
+        return "future"
+    return "past"
+
+
+class VersionedMixin:
+    """
+    Номер версии и время последнего изменения строки.
+    Оба поля обновляются самой БД при любом UPDATE, в том числе через update().
+    """
+    version: Mapped[int] = mapped_column(
+        default=1, server_default="1", onupdate=literal_column("version") + 1, nullable=False
+    )
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    # Перечитываем version/updated_at сразу после flush, а не лениво после commit
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class EventOrm(VersionedMixin, Model):
     __tablename__ = "events"
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -21,23 +68,25 @@ class EventOrm(Model):
     is_team: Mapped[bool] = mapped_column(nullable=False)
     max_members: Mapped[int] = mapped_column(nullable=False)
     max_teams: Mapped[int | None] = mapped_column()
+    # Денормализованные date + start_time/end_time, чтобы фильтровать и сортировать по state в SQL
+    starts_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    ends_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Число личных участий и команд; меняются условным UPDATE в транзакции регистрации
+    individuals_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+    teams_count: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
 
     @property
     def state(self) -> str:
-        now = datetime.datetime.now(datetime.timezone.utc)
-        start_dt = (
-            datetime.datetime.combine(self.date, self.start_time or datetime.time.min,
-                                      tzinfo=datetime.timezone.utc)
-        )
-        end_dt = (
-            datetime.datetime.combine(self.date, self.end_time or datetime.time.max,
-                                      tzinfo=datetime.timezone.utc)
-        )
-        if start_dt <= now <= end_dt:
-            return "current"
-        elif now < start_dt:
-            return "future"
-        return "past"
+        return event_state(self.date, self.start_time, self.end_time)
+
+    @classmethod
+    def state_clause(cls, state: str, now: datetime.datetime):
+        """SQL-условие, эквивалентное свойству state для момента now (UTC). Использует idx_events_period."""
+        if state == "current":
+            return and_(cls.starts_at <= now, cls.ends_at >= now)
+        if state == "future":
+            return cls.starts_at > now
+        return and_(cls.starts_at <= now, cls.ends_at < now)
 
     media: Mapped[list["EventMediaOrm"]] = relationship(
         backref="event",
@@ -50,13 +99,24 @@ class EventOrm(Model):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        Index("idx_events_date_id", "date", "id"),  # keyset pagination of the event list
+        Index("idx_events_period", "starts_at", "ends_at"),  # state filters
+    )
+
+
+@sa_event.listens_for(EventOrm, "before_insert")
+@sa_event.listens_for(EventOrm, "before_update")
+def sync_event_period(mapper, connection, target: EventOrm) -> None:
+    target.starts_at, target.ends_at = event_period(target.date, target.start_time, target.end_time)
+
 
 class MediaEnum(str, Enum):
     image = "image"
     document = "document"
 
 
-class EventMediaOrm(Model):
+class EventMediaOrm(VersionedMixin, Model):
     __tablename__ = "event_media"
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -73,7 +133,7 @@ class EventMediaOrm(Model):
     __table_args__ = (Index("idx_event_media", "event_id", "order"),)  # speed up slider sorting
 
 
-class EventActivityOrm(Model):
+class EventActivityOrm(VersionedMixin, Model):
     __tablename__ = "event_activities"
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -99,7 +159,7 @@ class ParticipantTypeEnum(str, Enum):
     team = "team"
 
 
-class EventParticipationOrm(Model):
+class EventParticipationOrm(VersionedMixin, Model):
     __tablename__ = "event_participations"
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -112,12 +172,21 @@ class EventParticipationOrm(Model):
     team_name: Mapped[str | None] = mapped_column(String(80))
     team_avatar_url: Mapped[str | None] = mapped_column(String(255))
     registered_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now(), nullable=False)
+    # Размер состава; меняется в той же транзакции, что и participation_members
+    member_count: Mapped[int] = mapped_column(default=1, server_default="1", nullable=False)
 
     creator: Mapped["UserOrm"] = relationship(foreign_keys=[creator_id])
     members: Mapped[list["ParticipationMemberOrm"]] = relationship(
         back_populates="participation",
         cascade="all, delete-orphan"
     )
+    # Строка итога лидерборда создается и удаляется вместе с участием
+    total: Mapped["ParticipationTotalOrm"] = relationship(cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("idx_event_participations_event_id", "event_id", "id"),  # keyset pagination
+        Index("idx_event_participations_open_slots", "event_id", "participant_type", "member_count", "id"),
+    )
 
 
 class ParticipationMemberOrm(Model):
@@ -133,6 +202,28 @@ class ParticipationMemberOrm(Model):
     user: Mapped["UserOrm"] = relationship()
     participation: Mapped["EventParticipationOrm"] = relationship(back_populates="members")
 
+    # /users/me/participations
+    __table_args__ = (Index("idx_participation_members_user_id", "user_id", "participation_id"),)
+
+
+class EventWaitlistOrm(Model):
+    """Очередь ожидания на заполненное мероприятие; порядок — по возрастанию id."""
+    __tablename__ = "event_waitlist"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    event_id: Mapped[int] = mapped_column(ForeignKey("events.id", ondelete="CASCADE"))
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    participant_type: Mapped[ParticipantTypeEnum] = mapped_column(
+        SQLEnum(ParticipantTypeEnum, name="participant_type_enum"), nullable=False
+    )
+    team_name: Mapped[str | None] = mapped_column(String(80))
+    created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("event_id", "user_id", name="uq_event_waitlist_user"),
+        Index("idx_event_waitlist_fifo", "event_id", "participant_type", "id"),
+    )
+
 
 class EventJudgeOrm(Model):
     __tablename__ = "event_judges"
@@ -144,7 +235,7 @@ class EventJudgeOrm(Model):
     user: Mapped["UserOrm"] = relationship()
 
 
-class ScoreOrm(Model):
+class ScoreOrm(VersionedMixin, Model):
     __tablename__ = "scores"
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -154,3 +245,26 @@ class ScoreOrm(Model):
 
     score: Mapped[int] = mapped_column(nullable=False)
     reason: Mapped[str | None] = mapped_column(String(255))
+    # Кто отправил оценку (судья или админ) — ключи идемпотентности у каждого свои
+    submitter_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("users.id"))
+    # Ключ идемпотентности от клиента: повтор запроса с тем же ключом вернет ту же оценку
+    client_key: Mapped[str | None] = mapped_column(String(64))
+
+    __table_args__ = (Index("idx_scores_submitter_client_key", "submitter_id", "client_key", unique=True),)
+
+
+class ParticipationTotalOrm(Model):
+    """
+    Сумма очков участия для лидерборда. Меняется в той же транзакции, что и scores;
+    пересчитать с нуля можно командой python -m utils.rebuild_totals.
+    """
+    __tablename__ = "participation_totals"
+
+    participation_id: Mapped[int] = mapped_column(
+        ForeignKey("event_participations.id", ondelete="CASCADE"), primary_key=True
+    )
+    event_id: Mapped[int] = mapped_column(ForeignKey("events.id", ondelete="CASCADE"))
+    total_score: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
+
+    # Лидерборд читается обратным проходом: total_score DESC, participation_id DESC
+    __table_args__ = (Index("idx_participation_totals_leaderboard", "event_id", "total_score", "participation_id"),)
@@ -0,0 +1,60 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import Model, on_transaction_end
+
+# SQLite не поддерживает SELECT ... FOR UPDATE: в пределах процесса блокировку строки
+# эмулируем asyncio.Lock на ключ (таблица, id). Лок живет, пока его кто-то держит или ждет.
+_local_locks: weakref.WeakValueDictionary[tuple[str, Any], asyncio.Lock] = weakref.WeakValueDictionary()
+
+
+def _supports_for_update(session: AsyncSession) -> bool:
+    return session.get_bind().dialect.name != "sqlite"
+
+
+@asynccontextmanager
+async def lock_row(session: AsyncSession, orm: type[Model], row_id: Any, *options) -> AsyncIterator[Any]:
+    """
+    Читает строку с блокировкой до конца транзакции и отдает ее (или None).
+    Внутри блока изменения фиксируются через db.commit; при исключении транзакция
+    откатывается, чтобы блокировка не держалась до закрытия сессии.
+    """
+    query = (
+        select(orm)
+        .where(orm.id == row_id)
+        .options(*options)
+        # Строка могла быть загружена в сессию раньше — нужны данные, прочитанные под блокировкой
+        .execution_options(populate_existing=True)
+    )
+
+    if _supports_for_update(session):
+        try:
+            yield await session.scalar(query.with_for_update(of=orm))
+        except BaseException:
+            await session.rollback()
+            raise
+        return
+
+    key = (orm.__tablename__, row_id)
+    lock = _local_locks.get(key)
+    if lock is None:
+        lock = _local_locks[key] = asyncio.Lock()
+    await lock.acquire()
+    try:
+        row = await session.scalar(query)
+    except BaseException:
+        lock.release()
+        await session.rollback()
+        raise
+    # Как и FOR UPDATE, лок держится до конца транзакции: в сессии запроса коммит будет позже
+    on_transaction_end(session, lock.release)
+    try:
+        yield row
+    except BaseException:
+        await session.rollback()
+        raise
@@ -0,0 +1,13 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db import Model
+
+
+class RateLimitBucketOrm(Model):
+    """Состояние token bucket для общего (между воркерами) лимитера."""
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    tokens: Mapped[float] = mapped_column(nullable=False)
+    updated_at: Mapped[float] = mapped_column(nullable=False, index=True)  # unix time
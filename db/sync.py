@@ -0,0 +1,62 @@
+import datetime
+import uuid
+from enum import Enum
+
+from sqlalchemy import String, Boolean, DateTime, Index, BigInteger, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db import Model
+
+
+class SyncEntity(str, Enum):
+    event = "event"
+    activity = "activity"
+    media = "media"
+    participation = "participation"
+    score = "score"
+
+
+def utc_now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+# Id текущей транзакции PostgreSQL. На SQLite писатель всегда один: порядок id и есть порядок коммитов
+CURRENT_TXID = text("pg_current_xact_id()::text::bigint")
+# Транзакции с id меньше этого уже завершены: новых записей журнала с таким txid не появится
+TXID_WATERMARK = text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+class SyncChangeOrm(Model):
+    """
+    Журнал изменений для дельта-синхронизации мобильных клиентов.
+    Строка пишется в той же транзакции, что и само изменение, вместе с id этой транзакции.
+    Клиент дочитывает журнал по (txid, id), начиная с курсора, и только записи завершенных
+    транзакций (txid ниже TXID_WATERMARK): запись, которая закоммитится позже, не окажется
+    позади уже выданного курсора.
+    """
+    __tablename__ = "sync_changes"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    entity: Mapped[str] = mapped_column(String(20), nullable=False)
+    entity_id: Mapped[int] = mapped_column(nullable=False)
+    # Мероприятие, к которому относится сущность: по нему фильтруются участия и очки
+    event_id: Mapped[int] = mapped_column(nullable=False)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Изменение адресовано одному пользователю (например, его исключили из команды)
+    user_id: Mapped[uuid.UUID | None] = mapped_column()
+    changed_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), default=utc_now, nullable=False)
+    txid: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (
+        Index("idx_sync_changes_event_id", "event_id", "id"),
+        Index("idx_sync_changes_txid", "txid", "id"),
+    )
+
+
+def record_change(session: AsyncSession, entity: SyncEntity, entity_id: int, event_id: int,
+                  deleted: bool = False, user_id: uuid.UUID | None = None) -> None:
+    """Добавляет запись в журнал; попадет в БД при commit вызывающей транзакции."""
+    txid = CURRENT_TXID if session.get_bind().dialect.name == "postgresql" else 0
+    session.add(SyncChangeOrm(entity=entity.value, entity_id=entity_id, event_id=event_id,
+                              deleted=deleted, user_id=user_id, txid=txid))
@@ -0,0 +1,35 @@
+import datetime
+import uuid
+
+from sqlalchemy import ForeignKey, String, Boolean, DateTime, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db import Model
+
+
+class RefreshTokenOrm(Model):
+    __tablename__ = "refresh_tokens"
+
+    token_hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256, сам токен не храним
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    family_id: Mapped[uuid.UUID] = mapped_column(index=True)  # цепочка ротаций одного входа
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    revoked: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now(), nullable=False)
+
+
+class TokenRevocationOrm(Model):
+    """
+    Журнал отзывов access-токенов. Каждый воркер периодически дочитывает его
+    по возрастанию id и держит в памяти индекс отозванных jti.
+    """
+    __tablename__ = "token_revocations"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    jti: Mapped[str | None] = mapped_column(String(32))
+    # Отзыв всех токенов пользователя с версией ниже token_version
+    user_id: Mapped[uuid.UUID | None] = mapped_column()
+    token_version: Mapped[int | None] = mapped_column()
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("idx_token_revocations_expires_at", "expires_at"),)
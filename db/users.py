@@ -40,5 +40,7 @@ class UserOrm(Model):
     is_2fa_enabled: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
     role: Mapped[RoleEnum] = mapped_column(default=RoleEnum.user, nullable=False)
+    # Увеличивается при смене роли, чтобы ранее выданные токены перестали действовать
+    token_version: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
 
     created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now(), nullable=False)
@@ -0,0 +1,46 @@
+from sqlalchemy import String, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column, Session
+
+from db import Model
+
+# Ключ session.info: области, измененные в текущей транзакции
+_PENDING = "resource_versions"
+
+
+class ResourceVersionOrm(Model):
+    """
+    Общие для всех воркеров версии ресурсов ("events", "event:1", "leaderboard:1" ...),
+    из которых строятся ETag. Строка появляется при первом изменении области.
+    """
+    __tablename__ = "resource_versions"
+
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False)
+
+
+def touch_scopes(session: AsyncSession, *scopes: str) -> None:
+    """Отмечает области измененными; их версии увеличатся при commit вызывающей транзакции."""
+    session.info.setdefault(_PENDING, set()).update(scopes)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_versions(session: Session) -> None:
+    # Версии пишутся последним запросом транзакции: блокировки их строк держатся только на время
+    # коммита, а порядок областей фиксирован, так что параллельные коммиты не встанут в deadlock
+    scopes = session.info.pop(_PENDING, None)
+    if not scopes:
+        return
+    dialect_insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = dialect_insert(ResourceVersionOrm).values([{"scope": scope, "version": 1} for scope in sorted(scopes)])
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=[ResourceVersionOrm.scope], set_={"version": ResourceVersionOrm.version + 1},
+    ))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_versions(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
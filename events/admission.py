@@ -0,0 +1,109 @@
+import asyncio
+import time
+import uuid
+
+from config import ADMISSION_BATCH_SIZE, ADMISSION_FULL_TTL_SECONDS
+from db.events import EventParticipationOrm, ParticipantTypeEnum
+from events.exceptions import EventFullError
+from events.repository import EventRepository
+from events.schemas import SParticipationCreate, SAdmissionRequest, SWaitlistPosition
+from metrics.registry import register
+
+
+class EventAdmission:
+    """
+    Прием регистраций в режиме наплыва. Заявки на одно мероприятие ставятся в in-process
+    очередь; пока обрабатывается одна пачка, копятся следующие, и каждая пачка проходит
+    одной транзакцией. Когда мест нет, заявки без листа ожидания отклоняются без запроса к БД.
+    """
+
+    def __init__(self, batch_size: int, full_ttl: float):
+        self.batch_size = batch_size
+        self.full_ttl = full_ttl
+        self._queues: dict[int, asyncio.Queue] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        # (event_id, participant_type) -> до какого момента считать мероприятие заполненным
+        self._full_until: dict[tuple[int, ParticipantTypeEnum], float] = {}
+        self.batches = 0
+        self.admitted = 0
+        self.waitlisted = 0
+        self.rejected_fast = 0
+
+    async def submit(
+            self, event_id: int, user_id: uuid.UUID, data: SParticipationCreate, waitlist: bool = False
+    ) -> EventParticipationOrm | SWaitlistPosition:
+        key = (event_id, data.participant_type)
+        if not waitlist and self._full_until.get(key, 0) > time.monotonic():
+            self.rejected_fast += 1
+            if data.participant_type == ParticipantTypeEnum.team:
+                raise EventFullError("Достигнут лимит команд в мероприятии.")
+            raise EventFullError("Достигнут лимит участников в личном зачете.")
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(event_id)
+        if queue is None:
+            queue = self._queues[event_id] = asyncio.Queue()
+            self._workers[event_id] = asyncio.create_task(self._drain(event_id, queue))
+        queue.put_nowait((SAdmissionRequest(user_id=user_id, data=data, waitlist=waitlist), future))
+
+        result = await future
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def _drain(self, event_id: int, queue: asyncio.Queue) -> None:
+        try:
+            while not queue.empty():
+                batch = [queue.get_nowait() for _ in range(min(self.batch_size, queue.qsize()))]
+                requests = [request for request, _ in batch]
+                try:
+                    results = await EventRepository.admit_batch(event_id, requests)
+                except Exception:
+                    # Пачка откатилась целиком: заявки повторяются по одной, и ошибку получает только виновная
+                    results = [await self._admit_alone(event_id, request) for request in requests]
+                self.batches += 1
+
+                for (request, future), result in zip(batch, results):
+                    if isinstance(result, (EventFullError, SWaitlistPosition)):
+                        self._full_until[(event_id, request.data.participant_type)] = (
+                                time.monotonic() + self.full_ttl
+                        )
+                    if isinstance(result, SWaitlistPosition):
+                        self.waitlisted += 1
+                    elif isinstance(result, EventParticipationOrm):
+                        self.admitted += 1
+                    # Клиент мог отключиться, пока заявка ждала в очереди
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            del self._queues[event_id]
+            del self._workers[event_id]
+            now = time.monotonic()
+            self._full_until = {key: until for key, until in self._full_until.items() if until > now}
+
+    @staticmethod
+    async def _admit_alone(
+            event_id: int, request: SAdmissionRequest
+    ) -> EventParticipationOrm | SWaitlistPosition | Exception:
+        try:
+            [result] = await EventRepository.admit_batch(event_id, [request])
+        except Exception as e:
+            return e
+        return result
+
+    def reset(self) -> None:
+        self._full_until.clear()
+
+    def stats(self) -> dict:
+        return {
+            "active_events": len(self._queues),
+            "queued": sum(queue.qsize() for queue in self._queues.values()),
+            "batches": self.batches,
+            "admitted": self.admitted,
+            "waitlisted": self.waitlisted,
+            "rejected_fast": self.rejected_fast,
+        }
+
+
+admission = EventAdmission(ADMISSION_BATCH_SIZE, ADMISSION_FULL_TTL_SECONDS)
+register("admission", admission.stats)
@@ -0,0 +1,72 @@
+import uuid
+from typing import Callable
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import EVENT_CACHE_MAX_SIZE, EVENT_CACHE_TTL_SECONDS
+from db import on_commit
+from db.events import EventParticipationOrm, ParticipationMemberOrm, EventJudgeOrm
+from helpers.cache import TTLCache
+from helpers.conditional import resource_versions
+from metrics.registry import register
+
+# event_id -> (версия "event:{id}", SEvent.model_dump(mode="json"), (starts_at, ends_at), digest).
+# state и is_current_user_judge накладываются при каждом чтении.
+event_detail_cache = TTLCache(EVENT_CACHE_MAX_SIZE, EVENT_CACHE_TTL_SECONDS)
+register("event_detail_cache", event_detail_cache.stats)
+
+# event_id -> (версия "judges:{id}", frozenset user_id судей). Проверки «судья ли это» идут по множеству
+event_judges_cache = TTLCache(EVENT_CACHE_MAX_SIZE, EVENT_CACHE_TTL_SECONDS)
+register("event_judges_cache", event_judges_cache.stats)
+register("conditional_get", resource_versions.stats)
+
+# Кого уведомить после коммита изменений лидерборда (живая трансляция, events.live)
+_leaderboard_listeners: list[Callable[[int], None]] = []
+
+
+def on_leaderboard_changed(listener: Callable[[int], None]) -> None:
+    _leaderboard_listeners.append(listener)
+
+
+def event_changed(session: AsyncSession, event_id: int) -> None:
+    """
+    Отмечает изменение мероприятия, его медиа или активностей в транзакции session:
+    версии растут при ее коммите, после коммита сбрасывается кэш.
+    """
+    resource_versions.bump(session, "events", f"event:{event_id}")
+    on_commit(session, event_detail_cache.invalidate, event_id)
+
+
+def activities_changed(session: AsyncSession, event_id: int) -> None:
+    event_changed(session, event_id)
+    resource_versions.bump(session, f"activities:{event_id}")
+
+
+def judges_changed(session: AsyncSession, event_id: int) -> None:
+    resource_versions.bump(session, f"judges:{event_id}")
+    on_commit(session, event_judges_cache.invalidate, event_id)
+
+
+def participations_changed(session: AsyncSession, event_id: int) -> None:
+    """Участия, их состав и очки влияют на список участников и лидерборд."""
+    resource_versions.bump(session, f"participations:{event_id}", f"leaderboard:{event_id}")
+    for listener in _leaderboard_listeners:
+        on_commit(session, listener, event_id)
+
+
+async def user_changed(session: AsyncSession, user_id: uuid.UUID) -> None:
+    """
+    Публичные данные пользователя входят в списки участников, судей и лидерборды только тех
+    мероприятий, где он участвует или судит: версии поднимаются у них, а не у всех мероприятий.
+    """
+    participant_of = await session.scalars(
+        select(EventParticipationOrm.event_id).distinct()
+        .join(ParticipationMemberOrm)
+        .where(or_(ParticipationMemberOrm.user_id == user_id, EventParticipationOrm.creator_id == user_id))
+    )
+    for event_id in participant_of.all():
+        participations_changed(session, event_id)
+    judge_of = await session.scalars(select(EventJudgeOrm.event_id).where(EventJudgeOrm.user_id == user_id))
+    for event_id in judge_of.all():
+        resource_versions.bump(session, f"judges:{event_id}")
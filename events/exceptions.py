@@ -0,0 +1,8 @@
+class VersionConflictError(Exception):
+    """Выбрасывается, когда строка изменилась после чтения или не совпал If-Match."""
+    pass
+
+
+class EventFullError(ValueError):
+    """Выбрасывается, когда в мероприятии не осталось мест нужного типа."""
+    pass
@@ -0,0 +1,332 @@
+import asyncio
+import json
+import uuid
+from typing import AsyncIterator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import LEADERBOARD_STREAM_QUEUE_SIZE, LEADERBOARD_STREAM_HEARTBEAT_SECONDS, \
+    LEADERBOARD_NOTIFY_DELAY_SECONDS, LEADERBOARD_BRIDGE_RECONNECT_MAX_SECONDS
+from events.cache import on_leaderboard_changed
+from events.repository import EventRepository
+from events.schemas import SParticipationOut
+from metrics.registry import register
+
+NOTIFY_CHANNEL = "leaderboard_changed"
+# Сколько id мероприятий помещается в одно уведомление (payload NOTIFY ограничен 8000 байт)
+NOTIFY_BATCH = 500
+
+# Кладется в очередь отставшего подписчика вместо пропущенных диффов
+_RESYNC = object()
+
+
+def sse_frame(kind: str, seq: int, payload: dict) -> str:
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def leaderboard_diff(old: dict[int, dict], new: dict[int, dict]) -> dict | None:
+    """
+    Разница двух состояний лидерборда (participation_id -> {rank, total_score, participation}).
+    ranks — сдвиги мест и очков, upserts — новые участия или изменившиеся команды целиком,
+    removed — исчезнувшие участия. Значения абсолютные, поэтому дифф можно применить повторно.
+    """
+    ranks, upserts = [], []
+    for participation_id, entry in new.items():
+        previous = old.get(participation_id)
+        if previous is None or previous["participation"] != entry["participation"]:
+            upserts.append(entry)
+        elif (previous["rank"], previous["total_score"]) != (entry["rank"], entry["total_score"]):
+            ranks.append({"participation_id": participation_id, "rank": entry["rank"],
+                          "total_score": entry["total_score"]})
+    removed = [participation_id for participation_id in old if participation_id not in new]
+    if not (ranks or upserts or removed):
+        return None
+    return {"ranks": ranks, "upserts": upserts, "removed": removed}
+
+
+class LeaderboardHub:
+    """
+    In-process рассылка живого лидерборда. Состояние мероприятия хранится, пока у него есть
+    зрители; каждое изменение пересчитывает лидерборд один раз на воркер, независимо от числа
+    зрителей, и рассылает всем один и тот же дифф. Изменения, пришедшие во время пересчета,
+    склеиваются в один следующий пересчет.
+    """
+
+    def __init__(self, queue_size: int, heartbeat: float):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.bridge: "PgNotifyBridge | None" = None
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+        self._standings: dict[int, dict[int, dict]] = {}
+        self._seq: dict[int, int] = {}
+        self._loading: dict[int, asyncio.Task] = {}
+        self._refreshing: dict[int, asyncio.Task] = {}
+        self._dirty: set[int] = set()
+        self.recomputes = 0
+        self.frames = 0
+        self.resyncs = 0
+
+    def publish(self, event_id: int) -> None:
+        """Изменение закоммичено в этом воркере: пересчитываем у себя и будим остальные."""
+        self.refresh(event_id)
+        if self.bridge is not None:
+            self.bridge.notify(event_id)
+
+    def refresh_all(self) -> None:
+        """Пересчитывает все мероприятия со зрителями — например, после потери уведомлений."""
+        for event_id in list(self._subscribers):
+            self.refresh(event_id)
+
+    def refresh(self, event_id: int) -> None:
+        if event_id not in self._subscribers:
+            return
+        if event_id in self._refreshing:
+            self._dirty.add(event_id)
+            return
+        self._refreshing[event_id] = asyncio.create_task(self._refresh(event_id))
+
+    async def _refresh(self, event_id: int) -> None:
+        try:
+            while True:
+                self._dirty.discard(event_id)
+                standings = await self._load(event_id)
+                if event_id not in self._subscribers:
+                    return
+                diff = leaderboard_diff(self._standings.get(event_id, {}), standings)
+                self._standings[event_id] = standings
+                if diff is not None:
+                    self._seq[event_id] = self._seq.get(event_id, 0) + 1
+                    self._broadcast(event_id, sse_frame("diff", self._seq[event_id], diff))
+                if event_id not in self._dirty:
+                    return
+        except Exception as e:
+            print(f"Leaderboard refresh failed for event {event_id}: {e}")
+        finally:
+            del self._refreshing[event_id]
+
+    async def _load(self, event_id: int) -> dict[int, dict]:
+        self.recomputes += 1
+        leaderboard = await EventRepository.get_leaderboard(event_id)
+        return {
+            participation.id: {
+                "rank": rank,
+                "total_score": total_score,
+                "participation": SParticipationOut.model_validate(participation).model_dump(mode="json"),
+            }
+            for rank, (participation, total_score) in enumerate(leaderboard, start=1)
+        }
+
+    def _broadcast(self, event_id: int, frame: str) -> None:
+        for queue in self._subscribers.get(event_id, ()):
+            try:
+                queue.put_nowait(frame)
+                self.frames += 1
+            except asyncio.QueueFull:
+                # Клиент не успевает читать: вместо накопленных диффов отдадим ему свежий снимок
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_RESYNC)
+                self.resyncs += 1
+
+    async def _snapshot(self, event_id: int) -> str:
+        if event_id not in self._standings:
+            # Одновременно подключившиеся зрители ждут одну и ту же загрузку
+            if event_id not in self._loading:
+                self._loading[event_id] = asyncio.create_task(self._load(event_id))
+            try:
+                standings = await asyncio.shield(self._loading[event_id])
+            finally:
+                self._loading.pop(event_id, None)
+            self._standings.setdefault(event_id, standings)
+        entries = sorted(self._standings[event_id].values(), key=lambda entry: entry["rank"])
+        return sse_frame("snapshot", self._seq.get(event_id, 0), {"entries": entries})
+
+    async def stream(self, event_id: int) -> AsyncIterator[str]:
+        """SSE-поток: снимок, затем диффы; при простое — комментарий-пинг, чтобы прокси не рвали соединение."""
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(event_id, set()).add(queue)
+        try:
+            yield await self._snapshot(event_id)
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield await self._snapshot(event_id) if frame is _RESYNC else frame
+        finally:
+            subscribers = self._subscribers.get(event_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[event_id]
+                    self._standings.pop(event_id, None)
+                    self._seq.pop(event_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "recomputes": self.recomputes,
+            "frames": self.frames,
+            "resyncs": self.resyncs,
+            "bridge": self.bridge.stats() if self.bridge is not None else None,
+        }
+
+
+class PgNotifyBridge:
+    """
+    Связывает хабы разных воркеров через PostgreSQL LISTEN/NOTIFY: воркер, закоммитивший
+    изменение, шлет NOTIFY, остальные пересчитывают лидерборд для своих зрителей.
+
+    Уведомления копятся notify_delay секунд и уходят одним NOTIFY через пул: поток оценок
+    дает одно уведомление на интервал, а не на каждую оценку. Слушает одно выделенное
+    соединение; если оно оборвалось (termination listener asyncpg или неудачная проверка
+    раз в heartbeat хаба), переподключается с растущей паузой до reconnect_max и пересчитывает
+    лидерборды своих зрителей — уведомления за время обрыва потеряны.
+    """
+
+    def __init__(self, hub: LeaderboardHub, engine: AsyncEngine,
+                 notify_delay: float = LEADERBOARD_NOTIFY_DELAY_SECONDS,
+                 reconnect_max: float = LEADERBOARD_BRIDGE_RECONNECT_MAX_SECONDS):
+        self.hub = hub
+        self.engine = engine
+        self.notify_delay = notify_delay
+        self.reconnect_max = reconnect_max
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._connection = None
+        self._listener = None
+        self._lost = asyncio.Event()
+        self._watcher: asyncio.Task | None = None
+        self._queued: set[int] = set()
+        self._flush: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+        self.notifies = 0
+        self.reconnects = 0
+
+    async def start(self) -> None:
+        try:
+            await self._listen()
+        except Exception as e:
+            print(f"Leaderboard bridge failed to listen: {e}")
+            self._lost.set()
+        self._watcher = asyncio.create_task(self._watch())
+        self.hub.bridge = self
+
+    async def stop(self) -> None:
+        self.hub.bridge = None
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        await self._drop(broken=False)
+
+    async def _listen(self) -> None:
+        self._connection = await self.engine.connect()
+        raw = await self._connection.get_raw_connection()
+        self._listener = raw.driver_connection
+        self._listener.add_termination_listener(self._on_terminated)
+        await self._listener.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        self._lost.clear()
+
+    async def _drop(self, broken: bool) -> None:
+        connection, listener = self._connection, self._listener
+        self._connection = self._listener = None
+        if connection is None:
+            return
+        listener.remove_termination_listener(self._on_terminated)
+        try:
+            if not broken:
+                await listener.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+                await connection.close()
+                return
+        except Exception:
+            pass
+        # Оборванное соединение в пул не возвращаем
+        try:
+            await connection.invalidate()
+        except Exception as e:
+            print(f"Leaderboard bridge failed to drop its connection: {e}")
+
+    def _on_terminated(self, connection) -> None:
+        if connection is self._listener:
+            self._lost.set()
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), self.hub.heartbeat)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(self._listener.execute("SELECT 1"), self.hub.heartbeat)
+                    continue
+                except Exception as e:
+                    print(f"Leaderboard bridge health check failed: {e}")
+            await self._reconnect()
+
+    async def _reconnect(self) -> None:
+        await self._drop(broken=True)
+        delay = min(0.5, self.reconnect_max)
+        while True:
+            try:
+                await self._listen()
+                break
+            except Exception as e:
+                print(f"Leaderboard bridge reconnect failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max)
+        self.reconnects += 1
+        self.hub.refresh_all()
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        worker_id, event_ids = payload.split(":", 1)
+        if worker_id != self.worker_id:
+            for event_id in event_ids.split(","):
+                self.hub.refresh(int(event_id))
+
+    def notify(self, event_id: int) -> None:
+        self._queued.add(event_id)
+        if self._flush is None:
+            self._flush = self._spawn(self._flush_later())
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.notify_delay)
+        self._flush = None
+        event_ids, self._queued = sorted(self._queued), set()
+        await self._send(event_ids)
+
+    async def _send(self, event_ids: list[int]) -> None:
+        try:
+            async with self.engine.begin() as conn:
+                for i in range(0, len(event_ids), NOTIFY_BATCH):
+                    payload = f"{self.worker_id}:{','.join(map(str, event_ids[i:i + NOTIFY_BATCH]))}"
+                    await conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                                       {"channel": NOTIFY_CHANNEL, "payload": payload})
+                    self.notifies += 1
+        except Exception as e:
+            print(f"Leaderboard notify failed for events {event_ids}: {e}")
+
+    def stats(self) -> dict:
+        return {"connected": self._listener is not None and not self._lost.is_set(),
+                "notifies": self.notifies, "reconnects": self.reconnects}
+
+
+async def start_bridge(engine: AsyncEngine) -> PgNotifyBridge | None:
+    """Мост нужен только с PostgreSQL; на SQLite приложение работает в одном воркере."""
+    if engine.dialect.name != "postgresql":
+        return None
+    bridge = PgNotifyBridge(leaderboard_hub, engine)
+    await bridge.start()
+    return bridge
+
+
+leaderboard_hub = LeaderboardHub(LEADERBOARD_STREAM_QUEUE_SIZE, LEADERBOARD_STREAM_HEARTBEAT_SECONDS)
+on_leaderboard_changed(leaderboard_hub.publish)
+register("leaderboard_hub", leaderboard_hub.stats)
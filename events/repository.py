@@ -1,48 +1,317 @@
+import datetime
 import uuid
 from typing import List, Optional
 
-from sqlalchemy import func, select, delete, update, exists
+from sqlalchemy import func, select, delete, update, insert, exists, or_, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import new_session
+from db import new_session, use_session, commit
+from db.locks import lock_row
 from db.events import EventOrm, EventMediaOrm, ParticipationMemberOrm, EventParticipationOrm, ParticipantTypeEnum, \
-    EventJudgeOrm, ScoreOrm, EventActivityOrm
+    EventJudgeOrm, ScoreOrm, EventActivityOrm, EventWaitlistOrm, ParticipationTotalOrm, MediaEnum, event_state, \
+    event_period
+from db.sync import SyncEntity, record_change
 from db.users import UserOrm, RoleEnum
+from events.cache import event_changed, judges_changed, participations_changed, event_judges_cache
+from events.exceptions import VersionConflictError, EventFullError
+from events.totals import add_to_total
+from helpers.conditional import resource_versions
+from helpers.pagination import encode_cursor, decode_cursor
 from helpers.validators import validate_limits
 from events.schemas import SEventAdd, SEvent, SEventUpdate, SEventMediaAdd, SMediaReorderItem, SParticipationCreate, \
-    SScoreAdd, SJudgeAdd
+    SScoreAdd, SJudgeAdd, SAdmissionRequest, SWaitlistPosition
 from users.repository import UserRepository
 
 
+# Колонки, которые отдает SUserPublic
+PUBLIC_USER_COLUMNS = (UserOrm.id, UserOrm.handle, UserOrm.full_name, UserOrm.avatar_url)
+
+
+def public_participation_options() -> tuple:
+    """
+    Загрузка капитана и состава для ответа SParticipationOut: у пользователей читаем
+    только публичные колонки SUserPublic, без пароля, телефона и прочих личных данных.
+    """
+    return (
+        selectinload(EventParticipationOrm.creator).load_only(*PUBLIC_USER_COLUMNS),
+        selectinload(EventParticipationOrm.members)
+        .selectinload(ParticipationMemberOrm.user)
+        .load_only(*PUBLIC_USER_COLUMNS),
+    )
+
+
+def touch_participation(participation_id: int, members_delta: int = 0):
+    """
+    Смена состава команды меняет и само участие: поднимаем его version/updated_at
+    и сдвигаем member_count на members_delta.
+    """
+    return (
+        update(EventParticipationOrm)
+        .where(EventParticipationOrm.id == participation_id)
+        .values(
+            version=EventParticipationOrm.version + 1,
+            member_count=EventParticipationOrm.member_count + members_delta,
+        )
+    )
+
+
+def record_participation_left(session, participation: EventParticipationOrm, user_id: uuid.UUID) -> None:
+    """Команда изменилась для всех, а для ушедшего участника она исчезает из его участий."""
+    record_change(session, SyncEntity.participation, participation.id, participation.event_id)
+    record_change(session, SyncEntity.participation, participation.id, participation.event_id,
+                  deleted=True, user_id=user_id)
+
+
+def _slot_counter(participant_type: ParticipantTypeEnum):
+    if participant_type == ParticipantTypeEnum.team:
+        return EventOrm.teams_count, EventOrm.max_teams
+    return EventOrm.individuals_count, EventOrm.max_members
+
+
+async def reserve_slot(session, event_id: int, participant_type: ParticipantTypeEnum) -> bool:
+    """
+    Атомарно занимает место в мероприятии: счетчик увеличивается, только если лимит не достигнут.
+    Строка мероприятия остается заблокированной до конца транзакции, поэтому превысить лимит нельзя.
+    """
+    counter, limit = _slot_counter(participant_type)
+    stmt = (
+        update(EventOrm)
+        .where(EventOrm.id == event_id, limit.is_not(None), counter < limit)
+        # Счетчики не считаются правкой мероприятия: version/updated_at не трогаем
+        .values({counter: counter + 1, EventOrm.version: EventOrm.version, EventOrm.updated_at: EventOrm.updated_at})
+        .returning(EventOrm.id)
+    )
+    return (await session.execute(stmt)).scalar_one_or_none() is not None
+
+
+async def release_slot(session, event_id: int, participant_type: ParticipantTypeEnum) -> None:
+    """Освобождает место и в той же транзакции отдает его первому из листа ожидания."""
+    counter, _ = _slot_counter(participant_type)
+    await session.execute(
+        update(EventOrm)
+        .where(EventOrm.id == event_id, counter > 0)
+        .values({counter: counter - 1, EventOrm.version: EventOrm.version, EventOrm.updated_at: EventOrm.updated_at})
+    )
+    await promote_from_waitlist(session, event_id, participant_type)
+
+
+def new_participation(session, event_id: int, user_id: uuid.UUID, participant_type: ParticipantTypeEnum,
+                      team_name: str | None) -> EventParticipationOrm:
+    participation = EventParticipationOrm(
+        event_id=event_id,
+        creator_id=user_id,
+        participant_type=participant_type,
+        team_name=team_name if participant_type == ParticipantTypeEnum.team else None,
+    )
+    participation.members.append(ParticipationMemberOrm(user_id=user_id))
+    participation.total = ParticipationTotalOrm(event_id=event_id)
+    session.add(participation)
+    return participation
+
+
+async def admit_one(
+        session, event: EventOrm, request: SAdmissionRequest, waiting: EventWaitlistOrm | None
+) -> EventParticipationOrm | EventWaitlistOrm | EventFullError:
+    """Одна заявка из пачки admit_batch: место, запись в лист ожидания или отказ."""
+    data = request.data
+    if await reserve_slot(session, event.id, data.participant_type):
+        if waiting is not None:
+            await session.delete(waiting)
+        return new_participation(session, event.id, request.user_id, data.participant_type, data.team_name)
+    if request.waitlist:
+        if waiting is None:
+            waiting = EventWaitlistOrm(
+                event_id=event.id,
+                user_id=request.user_id,
+                participant_type=data.participant_type,
+                team_name=data.team_name if data.participant_type == ParticipantTypeEnum.team else None,
+            )
+            session.add(waiting)
+        return waiting
+    if data.participant_type == ParticipantTypeEnum.team:
+        return EventFullError("Достигнут лимит команд в мероприятии.")
+    return EventFullError("Достигнут лимит участников в личном зачете.")
+
+
+async def event_judges(session, event_id: int) -> frozenset[uuid.UUID]:
+    """
+    Судьи мероприятия из event_judges_cache; при промахе — один запрос. Кэш сверяется с общей
+    версией "judges:{id}", поэтому судей, измененных на другом воркере, видно сразу.
+    """
+    [version] = await resource_versions.current(f"judges:{event_id}", session=session)
+    cached = event_judges_cache.get(event_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    judges = frozenset((await session.scalars(
+        select(EventJudgeOrm.user_id).where(EventJudgeOrm.event_id == event_id)
+    )).all())
+    # Версия прочитана до загрузки: если судей успели поменять, запись устареет и будет перечитана
+    event_judges_cache.set(event_id, (version, judges))
+    return judges
+
+
+async def promote_from_waitlist(session, event_id: int, participant_type: ParticipantTypeEnum) -> None:
+    while True:
+        entry = await session.scalar(
+            select(EventWaitlistOrm)
+            .where(EventWaitlistOrm.event_id == event_id, EventWaitlistOrm.participant_type == participant_type)
+            .order_by(EventWaitlistOrm.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if entry is None:
+            return
+
+        # За время ожидания пользователь мог стать судьей или вступить в чужую команду
+        busy = await session.scalar(select(or_(
+            exists().where(EventJudgeOrm.event_id == event_id, EventJudgeOrm.user_id == entry.user_id),
+            exists().where(
+                ParticipationMemberOrm.participation_id == EventParticipationOrm.id,
+                EventParticipationOrm.event_id == event_id,
+                ParticipationMemberOrm.user_id == entry.user_id,
+            ),
+        )))
+        if busy:
+            await session.delete(entry)
+            await session.flush()
+            continue
+
+        if not await reserve_slot(session, event_id, participant_type):
+            return
+        await session.delete(entry)
+        participation = new_participation(session, event_id, entry.user_id, participant_type, entry.team_name)
+        await session.flush()
+        record_change(session, SyncEntity.participation, participation.id, event_id)
+        return
+
+
+KEY_REUSED = "Этот client_key уже использован для другой оценки."
+
+
+def _same_score(recorded, item: SScoreAdd) -> bool:
+    return (recorded.participation_id, recorded.activity_id, recorded.score) == \
+        (item.participation_id, item.activity_id, item.score)
+
+
+async def _insert_scores(session, rows: dict[int, dict]) -> dict[int, int]:
+    """
+    Вставляет оценки (позиция в пачке -> строка) и возвращает их id по позициям.
+    Строки с client_key идут через ON CONFLICT DO NOTHING: ключ, который успел записать
+    параллельный запрос того же отправителя, пропускается и в ответе отсутствует.
+    """
+    inserted = {}
+    plain = [i for i, row in rows.items() if row["client_key"] is None]
+    if plain:
+        ids = await session.scalars(
+            insert(ScoreOrm).returning(ScoreOrm.id, sort_by_parameter_order=True), [rows[i] for i in plain]
+        )
+        inserted.update(zip(plain, ids.all()))
+
+    # Ключи вставляются по порядку, как и итоги: параллельные пачки с общими ключами не ждут друг друга по кругу
+    keyed = dict(sorted((row["client_key"], i) for i, row in rows.items() if row["client_key"] is not None))
+    if keyed:
+        dialect_insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = (
+            dialect_insert(ScoreOrm)
+            .on_conflict_do_nothing(index_elements=[ScoreOrm.submitter_id, ScoreOrm.client_key])
+            .returning(ScoreOrm.id, ScoreOrm.client_key)
+        )
+        for score_id, key in await session.execute(stmt, [rows[i] for i in keyed.values()]):
+            inserted[keyed[key]] = score_id
+    return inserted
+
+
+# Сколько раз edit перечитывает мероприятие, если его изменили параллельно
+EDIT_ATTEMPTS = 3
+
+
 class EventRepository:
     @classmethod
-    async def get_all(cls) -> List[SEvent]:
-        async with new_session() as session:
-            res = await session.execute(select(EventOrm).options(selectinload(EventOrm.media)))
-            events = res.scalars().all()
-            cards = []
-
-            for e in events:
-                # preview_url: media_type==image, order==0
-                preview_url = None
-                for m in e.media:
-                    if m.media_type == "image" and m.order == 0:
-                        preview_url = m.url
-                        break
-                cards.append({
+    async def get_all(
+            cls,
+            cursor: str | None = None,
+            limit: int = 20,
+            state: str | None = None,
+            date_from: datetime.date | None = None,
+            date_to: datetime.date | None = None,
+            is_team: bool | None = None,
+            session: AsyncSession | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """
+        Возвращает страницу карточек мероприятий, отсортированных по (date, id),
+        и курсор следующей страницы. Все фильтры выполняются в SQL.
+        """
+        # Превью — изображение с order == 0; коррелированный подзапрос идет по idx_event_media
+        preview_url = (
+            select(EventMediaOrm.url)
+            .where(
+                EventMediaOrm.event_id == EventOrm.id,
+                EventMediaOrm.order == 0,
+                EventMediaOrm.media_type == MediaEnum.image,
+            )
+            .order_by(EventMediaOrm.id)
+            .limit(1)
+            .correlate(EventOrm)
+            .scalar_subquery()
+        )
+        query = select(
+            EventOrm.id, EventOrm.title, EventOrm.date, EventOrm.start_time, EventOrm.end_time,
+            EventOrm.is_team, preview_url.label("preview_url"),
+        )
+
+        if state is not None:
+            query = query.where(EventOrm.state_clause(state, datetime.datetime.now(datetime.timezone.utc)))
+        if date_from is not None:
+            query = query.where(EventOrm.date >= date_from)
+        if date_to is not None:
+            query = query.where(EventOrm.date <= date_to)
+        if is_team is not None:
+            query = query.where(EventOrm.is_team == is_team)
+        if cursor is not None:
+            last_date, last_id = decode_cursor(cursor)
+            last_date, last_id = datetime.date.fromisoformat(last_date), int(last_id)
+            query = query.where(or_(
+                EventOrm.date > last_date,
+                and_(EventOrm.date == last_date, EventOrm.id > last_id),
+            ))
+
+        query = query.order_by(EventOrm.date, EventOrm.id).limit(limit + 1)
+
+        async with use_session(session) as session:
+            res = await session.execute(query)
+            events = res.all()
+            cards = [
+                {
                     "id": e.id,
                     "title": e.title,
                     "date": e.date,
-                    "state": e.state,
-                    "preview_url": preview_url,
+                    "state": event_state(e.date, e.start_time, e.end_time),
+                    "preview_url": e.preview_url,
                     "is_team": e.is_team,
-                })
+                }
+                for e in events[:limit]
+            ]
+
+            next_cursor = None
+            if len(events) > limit:
+                last = events[limit - 1]
+                next_cursor = encode_cursor(last.date, last.id)
 
-            return cards
+            return cards, next_cursor
 
     @classmethod
-    async def get_by_id(cls, event_id: int) -> Optional[SEvent]:
-        async with new_session() as session:
+    async def exists(cls, event_id: int, session: AsyncSession | None = None) -> bool:
+        """Есть ли мероприятие — без загрузки медиа и активностей, как в get_by_id."""
+        async with use_session(session) as session:
+            return await session.scalar(select(EventOrm.id).where(EventOrm.id == event_id)) is not None
+
+    @classmethod
+    async def get_by_id(cls, event_id: int, session: AsyncSession | None = None) -> Optional[SEvent]:
+        async with use_session(session) as session:
             query = (
                 select(EventOrm)
                 .where(EventOrm.id == event_id)
@@ -61,90 +330,130 @@ class EventRepository:
             return SEvent.model_validate(event_orm, from_attributes=True)
 
     @classmethod
-    async def add_one(cls, data: SEventAdd) -> int:
-        async with new_session() as session:
+    async def add_one(cls, data: SEventAdd, session: AsyncSession | None = None) -> int:
+        async with use_session(session) as session:
             event = EventOrm(**data.model_dump())
             session.add(event)
-            await session.commit()
-            await session.refresh(event)
+            await session.flush()
+            record_change(session, SyncEntity.event, event.id, event.id)
+            event_changed(session, event.id)
+            await commit(session)
             return event.id
 
     @classmethod
-    async def edit(cls, event_id: int, payload: SEventUpdate) -> bool:
+    async def edit(cls, event_id: int, payload: SEventUpdate, expected_version: int | None = None,
+                   session: AsyncSession | None = None) -> bool:
+        """
+        Обновляет мероприятие. UPDATE выполняется только если версия строки не изменилась
+        с момента чтения, поэтому параллельные правки не затирают друг друга.
+        expected_version — версия из If-Match; при несовпадении VersionConflictError.
+        """
         update_data = payload.model_dump(exclude_unset=True, exclude_none=True)
 
         if not update_data:
             return False
 
-        async with new_session() as session:
-            event = await session.get(EventOrm, event_id)
-            if not event:
-                return False
-
-            # Null out max_teams if is_team is False
-            if event.is_team == True and payload.is_team == False:
-                event.max_teams = None
-
-            # Validate max_teams
-            max_members = payload.max_members if payload.max_members is not None else event.max_members
-            max_teams = payload.max_teams if payload.max_teams is not None else event.max_teams
-            is_team = payload.is_team if payload.is_team is not None else event.is_team
+        async with use_session(session) as session:
+            for _ in range(EDIT_ATTEMPTS):
+                # populate_existing: при повторе в той же сессии нужна свежая версия строки
+                event = await session.get(EventOrm, event_id, populate_existing=True)
+                if not event:
+                    return False
+                if expected_version is not None and event.version != expected_version:
+                    raise VersionConflictError("Мероприятие было изменено другим запросом.")
+
+                values = dict(update_data)
+
+                # Null out max_teams if is_team is False
+                if event.is_team == True and payload.is_team == False:
+                    values["max_teams"] = None
+
+                # Validate max_teams
+                max_members = payload.max_members if payload.max_members is not None else event.max_members
+                max_teams = payload.max_teams if payload.max_teams is not None else event.max_teams
+                is_team = payload.is_team if payload.is_team is not None else event.is_team
+
+                validate_limits(is_team, max_members, max_teams)
+
+                if values.keys() & {"date", "start_time", "end_time"}:
+                    values["starts_at"], values["ends_at"] = event_period(
+                        values.get("date", event.date),
+                        values.get("start_time", event.start_time),
+                        values.get("end_time", event.end_time),
+                    )
+
+                stmt = (
+                    update(EventOrm)
+                    .where(EventOrm.id == event_id, EventOrm.version == event.version)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                res = await session.execute(stmt)
+                if res.rowcount:
+                    record_change(session, SyncEntity.event, event_id, event_id)
+                    event_changed(session, event_id)
+                await commit(session)
 
-            validate_limits(is_team, max_members, max_teams)
+                if res.rowcount:
+                    return True
+                if expected_version is not None:
+                    raise VersionConflictError("Мероприятие было изменено другим запросом.")
+                # Строку изменили между чтением и записью: перечитываем и проверяем заново
 
-            stmt = (
-                update(EventOrm)
-                .where(EventOrm.id == event_id)
-                .values(**update_data)
-                .execution_options(synchronize_session="fetch")
-            )
-            res = await session.execute(stmt)
-            await session.commit()
-            return bool(res.rowcount)
+        raise VersionConflictError("Не удалось сохранить изменения мероприятия, повторите запрос.")
 
     @classmethod
-    async def delete(cls, event_id: int) -> bool:
-        async with new_session() as session:
+    async def delete(cls, event_id: int, session: AsyncSession | None = None) -> bool:
+        async with use_session(session) as session:
             event = await session.get(EventOrm, event_id)
             if event is None:
                 return False
             await session.delete(event)
-            await session.commit()
+            # Активности, медиа, участия и очки удаляются каскадом вместе с мероприятием
+            record_change(session, SyncEntity.event, event_id, event_id, deleted=True)
+            event_changed(session, event_id)
+            await commit(session)
             return True
 
     @classmethod
-    async def add_media(cls, event_id: int, data: SEventMediaAdd) -> Optional[int]:
-        async with new_session() as session:
+    async def add_media(cls, event_id: int, data: SEventMediaAdd, session: AsyncSession | None = None) -> Optional[int]:
+        async with use_session(session) as session:
             event_exists = await session.scalar(select(exists().where(EventOrm.id == event_id)))
             if not event_exists:
                 return None
 
             media = EventMediaOrm(event_id=event_id, **data.model_dump())
             session.add(media)
-            await session.commit()
-            await session.refresh(media)
+            await session.flush()
+            record_change(session, SyncEntity.media, media.id, event_id)
+            event_changed(session, event_id)
+            await commit(session)
             return media.id
 
     @classmethod
-    async def delete_media(cls, event_id: int, media_id: int) -> bool:
-        async with new_session() as session:
+    async def delete_media(cls, event_id: int, media_id: int, session: AsyncSession | None = None) -> bool:
+        async with use_session(session) as session:
             stmt = delete(EventMediaOrm).where(
                 EventMediaOrm.event_id == event_id,
                 EventMediaOrm.id == media_id
             )
             res = await session.execute(stmt)
-            await session.commit()
+            if res.rowcount:
+                record_change(session, SyncEntity.media, media_id, event_id, deleted=True)
+                event_changed(session, event_id)
+            await commit(session)
             return bool(res.rowcount)
 
     @classmethod
-    async def reorder_media(cls, event_id: int, items: list[SMediaReorderItem]) -> bool:
+    async def reorder_media(cls, event_id: int, items: list[SMediaReorderItem],
+                            session: AsyncSession | None = None) -> bool:
         if not items:
             return False
 
         ids = {i.id for i in items}
         new_map = {i.id: i.order for i in items}
 
-        async with new_session() as s:
+        async with use_session(session) as s:
             rows = await s.execute(
                 select(func.count()).select_from(EventMediaOrm).where(
                     EventMediaOrm.id.in_(ids),
@@ -160,7 +469,9 @@ class EventRepository:
                     .where(EventMediaOrm.id == mid)
                     .values(order=new_ord)
                 )
-            await s.commit()
+                record_change(s, SyncEntity.media, mid, event_id)
+            event_changed(s, event_id)
+            await commit(s)
             return True
 
     @classmethod
@@ -168,163 +479,278 @@ class EventRepository:
             cls, event_id: int, user_id: uuid.UUID, data: SParticipationCreate
     ) -> EventParticipationOrm:
         """Создает новое участие (личное или команду)."""
-        async with new_session() as session:
-            existing_participation = await session.execute(
-                select(ParticipationMemberOrm).join(EventParticipationOrm).where(
-                    ParticipationMemberOrm.user_id == user_id,
-                    EventParticipationOrm.event_id == event_id
-                )
-            )
-            is_judge = await session.get(EventJudgeOrm, (event_id, user_id))
-            if is_judge:
-                raise ValueError("Судья не может участвовать в мероприятии.")
-
-            if existing_participation.scalar_one_or_none():
-                raise ValueError("Пользователь уже участвует в этом мероприятии.")
+        [result] = await cls.admit_batch(event_id, [SAdmissionRequest(user_id=user_id, data=data)])
+        if isinstance(result, Exception):
+            raise result
+        return result
 
+    @classmethod
+    async def admit_batch(
+            cls, event_id: int, requests: list[SAdmissionRequest]
+    ) -> list[EventParticipationOrm | SWaitlistPosition | ValueError]:
+        """
+        Регистрирует пачку заявок на одно мероприятие одной транзакцией.
+        Для каждой заявки возвращает полное участие, позицию в листе ожидания или ошибку.
+        """
+        async with new_session() as session:
             event = await session.get(EventOrm, event_id)
             if not event:
-                raise ValueError("Мероприятие не найдено.")
+                return [ValueError("Мероприятие не найдено.") for _ in requests]
+
+            user_ids = [r.user_id for r in requests]
+            judges = await event_judges(session, event_id)
+            taken = set((await session.scalars(
+                select(ParticipationMemberOrm.user_id).join(EventParticipationOrm).where(
+                    EventParticipationOrm.event_id == event_id,
+                    ParticipationMemberOrm.user_id.in_(user_ids)
+                )
+            )).all())
+            waiting = {entry.user_id: entry for entry in (await session.scalars(
+                select(EventWaitlistOrm).where(
+                    EventWaitlistOrm.event_id == event_id,
+                    EventWaitlistOrm.user_id.in_(user_ids)
+                )
+            )).all()}
+
+            results = []
+            for request in requests:
+                data = request.data
+                if request.user_id in judges:
+                    results.append(ValueError("Судья не может участвовать в мероприятии."))
+                    continue
+                if request.user_id in taken:
+                    results.append(ValueError("Пользователь уже участвует в этом мероприятии."))
+                    continue
+                if data.participant_type == ParticipantTypeEnum.team and (not event.is_team or not event.max_teams):
+                    results.append(ValueError("Это мероприятие не является командным."))
+                    continue
+                try:
+                    # Своя точка сохранения: конфликт одной заявки (например, тот же пользователь
+                    # гонится сам с собой через другой воркер) не откатывает остальные заявки пачки
+                    async with session.begin_nested():
+                        result = await admit_one(session, event, request, waiting.get(request.user_id))
+                except IntegrityError:
+                    results.append(ValueError("Пользователь уже зарегистрирован на это мероприятие."))
+                    continue
+                taken.add(request.user_id)
+                if isinstance(result, EventParticipationOrm):
+                    waiting.pop(request.user_id, None)
+                results.append(result)
 
-            current_participations = await cls.get_participations_for_event(event_id)
+            await session.flush()
+            admitted = []
+            for i, result in enumerate(results):
+                if isinstance(result, EventParticipationOrm):
+                    record_change(session, SyncEntity.participation, result.id, event_id)
+                    admitted.append(result.id)
+                elif isinstance(result, EventWaitlistOrm):
+                    position = await session.scalar(
+                        select(func.count()).select_from(EventWaitlistOrm).where(
+                            EventWaitlistOrm.event_id == event_id,
+                            EventWaitlistOrm.participant_type == result.participant_type,
+                            EventWaitlistOrm.id <= result.id,
+                        )
+                    )
+                    results[i] = SWaitlistPosition(waitlist_position=position)
+            if admitted:
+                participations_changed(session, event_id)
+            await session.commit()
 
-            if data.participant_type == ParticipantTypeEnum.individual:
-                current_individual_members = sum(
-                    1 for p in current_participations if p.participant_type == 'individual')
-                if current_individual_members >= event.max_members:
-                    raise ValueError("Достигнут лимит участников в личном зачете.")
+        if not admitted:
+            return results
 
-            if data.participant_type == ParticipantTypeEnum.team:
-                if not event.is_team or not event.max_teams:
-                    raise ValueError("Это мероприятие не является командным.")
-                current_teams_count = sum(1 for p in current_participations if p.participant_type == 'team')
-                if current_teams_count >= event.max_teams:
-                    raise ValueError("Достигнут лимит команд в мероприятии.")
+        query = (
+            select(EventParticipationOrm)
+            .where(EventParticipationOrm.id.in_(admitted))
+            .options(*public_participation_options())
+        )
+        async with new_session() as session:
+            loaded = {p.id: p for p in (await session.execute(query)).scalars().all()}
+        return [loaded[r.id] if isinstance(r, EventParticipationOrm) else r for r in results]
 
-            new_participation = EventParticipationOrm(
-                event_id=event_id,
-                creator_id=user_id,
-                participant_type=data.participant_type,
-                team_name=data.team_name if data.participant_type == ParticipantTypeEnum.team else None,
+    @classmethod
+    async def leave_waitlist(cls, event_id: int, user_id: uuid.UUID, session: AsyncSession | None = None) -> bool:
+        async with use_session(session) as session:
+            res = await session.execute(
+                delete(EventWaitlistOrm).where(
+                    EventWaitlistOrm.event_id == event_id,
+                    EventWaitlistOrm.user_id == user_id
+                )
             )
-            session.add(new_participation)
-            await session.flush()
+            await commit(session)
+            return bool(res.rowcount)
 
-            creator_as_member = ParticipationMemberOrm(
-                participation_id=new_participation.id,
-                user_id=user_id
+    @classmethod
+    async def get_participations_for_event(
+            cls,
+            event_id: int,
+            cursor: str | None = None,
+            limit: int = 50,
+            participant_type: ParticipantTypeEnum | None = None,
+            open_slots: bool = False,
+            session: AsyncSession | None = None,
+    ) -> tuple[list[EventParticipationOrm], str | None]:
+        """
+        Возвращает страницу участий мероприятия (по возрастанию id) и курсор следующей.
+        open_slots оставляет только команды, в которые еще можно вступить.
+        """
+        query = select(EventParticipationOrm).where(EventParticipationOrm.event_id == event_id)
+        if participant_type is not None:
+            query = query.where(EventParticipationOrm.participant_type == participant_type)
+        if open_slots:
+            max_members = select(EventOrm.max_members).where(EventOrm.id == event_id).scalar_subquery()
+            query = query.where(
+                EventParticipationOrm.participant_type == ParticipantTypeEnum.team,
+                EventParticipationOrm.member_count < max_members,
             )
-            session.add(creator_as_member)
-            await session.commit()
-
-            full_participation = await cls.get_participation_by_id(new_participation.id)
-            return full_participation
+        return await cls._participation_page(query, cursor, limit, session)
 
     @classmethod
-    async def get_participations_for_event(cls, event_id: int) -> list[EventParticipationOrm]:
-        """Возвращает список всех участий для мероприятия."""
-        async with new_session() as session:
+    async def get_open_teams(
+            cls,
+            event_id: int,
+            cursor: str | None = None,
+            limit: int = 20,
+            session: AsyncSession | None = None,
+    ) -> tuple[list[dict], str | None] | None:
+        """
+        Команды мероприятия со свободными местами, от самых свободных к почти полным.
+        Идет по idx_event_participations_open_slots с курсором (member_count, id), поэтому
+        стоимость страницы не зависит от числа участий. None — если мероприятия нет.
+        """
+        async with use_session(session) as session:
+            max_members = await session.scalar(select(EventOrm.max_members).where(EventOrm.id == event_id))
+            if max_members is None:
+                return None
+
             query = (
                 select(EventParticipationOrm)
-                .where(EventParticipationOrm.event_id == event_id)
-                .options(
-                    selectinload(EventParticipationOrm.creator),
-                    selectinload(EventParticipationOrm.members).selectinload(ParticipationMemberOrm.user)
+                .where(
+                    EventParticipationOrm.event_id == event_id,
+                    EventParticipationOrm.participant_type == ParticipantTypeEnum.team,
+                    EventParticipationOrm.member_count < max_members,
                 )
+                .order_by(EventParticipationOrm.member_count, EventParticipationOrm.id)
+                .limit(limit + 1)
+                .options(selectinload(EventParticipationOrm.creator).load_only(*PUBLIC_USER_COLUMNS))
             )
-            result = await session.execute(query)
-            return result.scalars().all()
+            if cursor is not None:
+                last_count, last_id = (int(value) for value in decode_cursor(cursor))
+                query = query.where(or_(
+                    EventParticipationOrm.member_count > last_count,
+                    and_(EventParticipationOrm.member_count == last_count, EventParticipationOrm.id > last_id),
+                ))
+            teams = (await session.scalars(query)).all()
+
+        items = [
+            {
+                "id": team.id,
+                "team_name": team.team_name,
+                "team_avatar_url": team.team_avatar_url,
+                "creator": team.creator,
+                "member_count": team.member_count,
+                "free_slots": max_members - team.member_count,
+            }
+            for team in teams[:limit]
+        ]
+        next_cursor = None
+        if len(teams) > limit:
+            last = teams[limit - 1]
+            next_cursor = encode_cursor(last.member_count, last.id)
+        return items, next_cursor
 
     @classmethod
-    async def get_participation_by_id(cls, participation_id: int) -> EventParticipationOrm | None:
-        async with new_session() as session:
+    async def get_participation_by_id(cls, participation_id: int,
+                                      session: AsyncSession | None = None) -> EventParticipationOrm | None:
+        async with use_session(session) as session:
             query = (
                 select(EventParticipationOrm)
                 .where(EventParticipationOrm.id == participation_id)
-                .options(
-                    selectinload(EventParticipationOrm.creator),
-                    selectinload(EventParticipationOrm.members).selectinload(ParticipationMemberOrm.user)
-                )
+                .options(*public_participation_options())
             )
             result = await session.execute(query)
             return result.scalar_one_or_none()
 
     @classmethod
-    async def add_member_to_participation(cls, participation_id: int, user_id: uuid.UUID):
-        """Добавляет нового участника в существующее участие (команду)."""
-        async with new_session() as session:
-            # Получаем участие и связанных с ним членов
-            participation = await cls.get_participation_by_id(participation_id)
-            event = await session.get(EventOrm, participation.event_id)
-
-            is_judge = await session.get(EventJudgeOrm, (event.id, user_id))
-            if is_judge:
-                raise ValueError("Судья не может участвовать в мероприятии.")
-
-            if not participation:
-                raise ValueError("Команда или участие не найдены.")
-
-            # Проверяем, что это командное участие
-            if participation.participant_type != ParticipantTypeEnum.team:
-                raise ValueError("Нельзя присоединиться к индивидуальному участию.")
-
-            # Проверяем, есть ли места в команде
-            if len(participation.members) >= event.max_members:
-                raise ValueError("Команда уже заполнена.")
-
-            # Проверяем, не участвует ли пользователь уже в этом мероприятии
-            existing_member = await session.execute(
-                select(ParticipationMemberOrm).join(EventParticipationOrm).where(
-                    ParticipationMemberOrm.user_id == user_id,
-                    EventParticipationOrm.event_id == participation.event_id
+    async def add_member_to_participation(cls, participation_id: int, user_id: uuid.UUID,
+                                          session: AsyncSession | None = None):
+        """
+        Добавляет нового участника в существующее участие (команду).
+        Строка участия блокируется на время транзакции, поэтому два одновременных
+        вступления в последнее свободное место не пройдут оба.
+        """
+        async with use_session(session) as session:
+            async with lock_row(session, EventParticipationOrm, participation_id) as participation:
+                if not participation:
+                    raise ValueError("Команда или участие не найдены.")
+
+                # Проверяем, что это командное участие
+                if participation.participant_type != ParticipantTypeEnum.team:
+                    raise ValueError("Нельзя присоединиться к индивидуальному участию.")
+
+                event = await session.get(EventOrm, participation.event_id)
+                if user_id in await event_judges(session, event.id):
+                    raise ValueError("Судья не может участвовать в мероприятии.")
+
+                # Проверяем, есть ли места в команде (member_count прочитан уже под блокировкой)
+                if participation.member_count >= event.max_members:
+                    raise ValueError("Команда уже заполнена.")
+
+                # Проверяем, не участвует ли пользователь уже в этом мероприятии
+                existing_member = await session.scalar(
+                    select(exists().where(
+                        ParticipationMemberOrm.participation_id == EventParticipationOrm.id,
+                        EventParticipationOrm.event_id == participation.event_id,
+                        ParticipationMemberOrm.user_id == user_id,
+                    ))
                 )
-            )
-            if existing_member.scalar_one_or_none():
-                raise ValueError("Пользователь уже участвует в этом мероприятии.")
+                if existing_member:
+                    raise ValueError("Пользователь уже участвует в этом мероприятии.")
 
-            # Добавляем участника
-            new_member = ParticipationMemberOrm(participation_id=participation_id, user_id=user_id)
-            session.add(new_member)
-            await session.commit()
+                # Добавляем участника
+                session.add(ParticipationMemberOrm(participation_id=participation_id, user_id=user_id))
+                await session.execute(touch_participation(participation_id, members_delta=1))
+                record_change(session, SyncEntity.participation, participation_id, participation.event_id)
+                participations_changed(session, participation.event_id)
+                await commit(session)
 
     @classmethod
     async def remove_member_from_participation(cls, participation_id: int, user_id_to_remove: uuid.UUID,
-                                               current_user_id: uuid.UUID):
+                                               current_user_id: uuid.UUID, session: AsyncSession | None = None):
         """Удаляет участника из команды или обрабатывает выход капитана."""
-        async with new_session() as session:
-            participation = await cls.get_participation_by_id(participation_id)
-            if not participation:
-                raise ValueError("Команда не найдена.")
-
-            is_self_kick = user_id_to_remove == current_user_id
-            is_captain_action = participation.creator_id == current_user_id
-
-            # Если капитан выходит из команды сам
-            if is_self_kick and is_captain_action:
-                return await cls.captain_leaves_team(participation_id, current_user_id)
-
-            # Если капитан кикает другого
-            if is_captain_action and not is_self_kick:
-                member_to_delete = await session.get(ParticipationMemberOrm, (participation_id, user_id_to_remove))
-                if not member_to_delete: raise ValueError("Участник не найден в этой команде.")
-                await session.delete(member_to_delete)
-                await session.commit()
-                return
-
-            # Если обычный участник выходит сам
-            if is_self_kick and not is_captain_action:
-                member_to_delete = await session.get(ParticipationMemberOrm, (participation_id, user_id_to_remove))
-                if not member_to_delete: raise ValueError("Участник не найден в этой команде.")
-                await session.delete(member_to_delete)
-                await session.commit()
-                return
-
-            raise PermissionError("У вас нет прав для выполнения этого действия.")
+        async with use_session(session) as session:
+            async with lock_row(session, EventParticipationOrm, participation_id,
+                                selectinload(EventParticipationOrm.members)) as participation:
+                if not participation:
+                    raise ValueError("Команда не найдена.")
+
+                is_self_kick = user_id_to_remove == current_user_id
+                is_captain_action = participation.creator_id == current_user_id
+
+                # Выйти может сам участник, исключить другого — только капитан
+                if not is_self_kick and not is_captain_action:
+                    raise PermissionError("У вас нет прав для выполнения этого действия.")
+
+                # Если капитан выходит из команды сам
+                if is_self_kick and is_captain_action:
+                    await cls._captain_leaves(session, participation, current_user_id)
+                else:
+                    member_to_delete = next(
+                        (m for m in participation.members if m.user_id == user_id_to_remove), None
+                    )
+                    if not member_to_delete:
+                        raise ValueError("Участник не найден в этой команде.")
+                    participation.members.remove(member_to_delete)
+                    await session.execute(touch_participation(participation_id, members_delta=-1))
+                    record_participation_left(session, participation, user_id_to_remove)
+                participations_changed(session, participation.event_id)
+                await commit(session)
 
     @classmethod
-    async def delete_participation(cls, participation_id: int, current_user_id: uuid.UUID):
+    async def delete_participation(cls, participation_id: int, current_user_id: uuid.UUID,
+                                   session: AsyncSession | None = None):
         """Удаляет участие (команду). Только для создателя."""
-        async with new_session() as session:
+        async with use_session(session) as session:
             participation = await session.get(EventParticipationOrm, participation_id)
             if not participation:
                 return
@@ -333,84 +759,95 @@ class EventRepository:
                 raise PermissionError("Только создатель может удалить команду/участие.")
 
             await session.delete(participation)
-            await session.commit()
+            await release_slot(session, participation.event_id, participation.participant_type)
+            record_change(session, SyncEntity.participation, participation_id, participation.event_id, deleted=True)
+            participations_changed(session, participation.event_id)
+            await commit(session)
 
     @classmethod
-    async def get_participations_for_user(cls, user_id: uuid.UUID) -> list[EventParticipationOrm]:
-        """Возвращает список всех участий для конкретного пользователя."""
-        async with new_session() as session:
-            query = select(EventParticipationOrm).join(ParticipationMemberOrm).where(
-                ParticipationMemberOrm.user_id == user_id
-            ).options(
-                selectinload(EventParticipationOrm.creator),
-                selectinload(EventParticipationOrm.members).selectinload(ParticipationMemberOrm.user)
-            )
-            result = await session.execute(query)
-            return result.scalars().all()
+    async def get_participations_for_user(
+            cls,
+            user_id: uuid.UUID,
+            cursor: str | None = None,
+            limit: int = 50,
+            session: AsyncSession | None = None,
+    ) -> tuple[list[EventParticipationOrm], str | None]:
+        """Возвращает страницу участий конкретного пользователя и курсор следующей."""
+        query = select(EventParticipationOrm).join(ParticipationMemberOrm).where(
+            ParticipationMemberOrm.user_id == user_id
+        )
+        return await cls._participation_page(query, cursor, limit, session)
+
+    @staticmethod
+    async def _participation_page(query, cursor: str | None, limit: int,
+                                  session: AsyncSession | None) -> tuple[list[EventParticipationOrm], str | None]:
+        if cursor is not None:
+            (last_id,) = decode_cursor(cursor)
+            query = query.where(EventParticipationOrm.id > int(last_id))
+        query = query.order_by(EventParticipationOrm.id).limit(limit + 1).options(*public_participation_options())
+
+        async with use_session(session) as session:
+            participations = (await session.scalars(query)).all()
+
+        next_cursor = None
+        if len(participations) > limit:
+            next_cursor = encode_cursor(participations[limit - 1].id)
+        return participations[:limit], next_cursor
 
     @classmethod
-    async def transfer_captaincy(cls, participation_id: int, new_captain_id: uuid.UUID, current_captain_id: uuid.UUID):
+    async def transfer_captaincy(cls, participation_id: int, new_captain_id: uuid.UUID, current_captain_id: uuid.UUID,
+                                 session: AsyncSession | None = None):
         """Передает права капитана новому участнику."""
-        async with new_session() as session:
-            participation = await session.get(EventParticipationOrm, participation_id)
-            if not participation or participation.creator_id != current_captain_id:
-                raise PermissionError("Только текущий капитан может передать права.")
+        async with use_session(session) as session:
+            async with lock_row(session, EventParticipationOrm, participation_id) as participation:
+                if not participation or participation.creator_id != current_captain_id:
+                    raise PermissionError("Только текущий капитан может передать права.")
 
-            # Проверяем, что новый капитан является членом команды
-            new_captain_member = await session.get(ParticipationMemberOrm, (participation_id, new_captain_id))
-            if not new_captain_member:
-                raise ValueError("Новый капитан должен быть участником команды.")
+                # Проверяем, что новый капитан является членом команды
+                new_captain_member = await session.get(ParticipationMemberOrm, (participation_id, new_captain_id))
+                if not new_captain_member:
+                    raise ValueError("Новый капитан должен быть участником команды.")
 
-            participation.creator_id = new_captain_id
-            await session.commit()
+                participation.creator_id = new_captain_id
+                record_change(session, SyncEntity.participation, participation_id, participation.event_id)
+                participations_changed(session, participation.event_id)
+                await commit(session)
 
     @classmethod
-    async def captain_leaves_team(cls, participation_id: int, captain_id: uuid.UUID):
+    async def captain_leaves_team(cls, participation_id: int, captain_id: uuid.UUID,
+                                  session: AsyncSession | None = None):
         """Обрабатывает выход капитана из команды."""
-        async with new_session() as session:
-            participation = await cls.get_participation_by_id(participation_id)
-            if not participation or participation.creator_id != captain_id:
-                raise PermissionError("Ошибка прав доступа.")
-
-            if len(participation.members) == 1:
-                await session.delete(participation)
-                await session.commit()
-                return
-
-            # --- НОВАЯ, ЕЩЕ БОЛЕЕ НАДЕЖНАЯ ЛОГИКА ---
-
-            # 1. Удаляем капитана из таблицы members
-            stmt_delete = delete(ParticipationMemberOrm).where(
-                ParticipationMemberOrm.participation_id == participation_id,
-                ParticipationMemberOrm.user_id == captain_id
-            )
-            await session.execute(stmt_delete)
-
-            # 2. Находим ID нового капитана (первый из оставшихся)
-            new_captain_member = next((m for m in participation.members if m.user_id != captain_id), None)
-            if not new_captain_member:
-                # Если по какой-то причине некого назначить, распускаем команду
-                stmt_delete_participation = delete(EventParticipationOrm).where(
-                    EventParticipationOrm.id == participation_id)
-                await session.execute(stmt_delete_participation)
-                await session.commit()
-                return
-
-            # 3. Обновляем creator_id в таблице participations
-            new_captain_id = new_captain_member.user_id
-            stmt_update = update(EventParticipationOrm).where(
-                EventParticipationOrm.id == participation_id
-            ).values(creator_id=new_captain_id)
-
-            await session.execute(stmt_update)
+        async with use_session(session) as session:
+            async with lock_row(session, EventParticipationOrm, participation_id,
+                                selectinload(EventParticipationOrm.members)) as participation:
+                if not participation or participation.creator_id != captain_id:
+                    raise PermissionError("Ошибка прав доступа.")
+                await cls._captain_leaves(session, participation, captain_id)
+                participations_changed(session, participation.event_id)
+                await commit(session)
+
+    @staticmethod
+    async def _captain_leaves(session: AsyncSession, participation: EventParticipationOrm, captain_id: uuid.UUID):
+        """
+        Капитан выходит из заблокированного участия: права переходят первому из оставшихся,
+        а если никого не осталось, команда распускается и освобождает место. Коммит — за вызывающим.
+        """
+        remaining = [m for m in participation.members if m.user_id != captain_id]
+        if not remaining:
+            await session.delete(participation)
+            await release_slot(session, participation.event_id, participation.participant_type)
+            record_change(session, SyncEntity.participation, participation.id, participation.event_id, deleted=True)
+            return
 
-            # 4. Коммитим обе операции (DELETE и UPDATE)
-            await session.commit()
+        participation.members = remaining
+        participation.member_count = len(remaining)
+        participation.creator_id = remaining[0].user_id
+        record_participation_left(session, participation, captain_id)
 
     @classmethod
-    async def add_judge_to_event(cls, event_id: int, data: SJudgeAdd):
-        async with new_session() as session:
-            user_to_be_judge = await UserRepository.get_user_by_handle(data.handle)
+    async def add_judge_to_event(cls, event_id: int, data: SJudgeAdd, session: AsyncSession | None = None):
+        async with use_session(session) as session:
+            user_to_be_judge = await UserRepository.get_user_by_handle(data.handle, session)
             if not user_to_be_judge:
                 raise ValueError("Пользователь не найден.")
 
@@ -431,60 +868,169 @@ class EventRepository:
                 role_description=data.role_description
             )
             session.add(new_judge)
-            await session.commit()
+            judges_changed(session, event_id)
+            await commit(session)
 
     @classmethod
-    async def add_score(cls, user_id: uuid.UUID, data: SScoreAdd):
-        async with new_session() as session:
-            participation = await session.get(EventParticipationOrm, data.participation_id)
-            if not participation:
-                raise ValueError("Команда/участие не найдено.")
+    async def add_score(cls, user_id: uuid.UUID, data: SScoreAdd, role: RoleEnum | None = None,
+                        session: AsyncSession | None = None) -> int:
+        """Выставляет одну оценку и возвращает ее id; повтор с тем же client_key вернет ту же оценку."""
+        [result] = await cls.add_scores_batch(user_id, [data], role=role, session=session)
+        if isinstance(result, Exception):
+            raise result
+        return result
 
-            event = await session.get(EventOrm, participation.event_id)
-            user = await session.get(UserOrm, user_id)
+    @classmethod
+    async def add_scores_batch(
+            cls, user_id: uuid.UUID, items: list[SScoreAdd], role: RoleEnum | None = None,
+            session: AsyncSession | None = None,
+    ) -> list[int | PermissionError | ValueError]:
+        """
+        Выставляет пачку оценок одной транзакцией. Участия, судейство и активности читаются
+        по одному запросу на всю пачку, оценки вставляются одним INSERT. Для каждой оценки
+        возвращает ее id или ошибку.
 
-            is_admin_or_org = user.role in [RoleEnum.admin, RoleEnum.organizer]
-            is_judge_for_event = await session.get(EventJudgeOrm, (event.id, user_id))
+        Ключи client_key у каждого отправителя свои. Оценка, чей ключ этот пользователь уже
+        записал, не проверяется и не вставляется заново: возвращается id записанной оценки.
+        Тот же ключ у другой оценки — ошибка. Чужие ключи не видны и ни на что не влияют.
 
-            # --- Логика для бонусных очков (без активности) ---
-            if data.activity_id is None:
+        role — роль из claims токена; без нее роль читается из БД.
+        """
+        async with use_session(session) as session:
+            keys = {item.client_key for item in items if item.client_key is not None}
+            recorded = {score.client_key: score for score in (await session.execute(
+                select(ScoreOrm.id, ScoreOrm.client_key, ScoreOrm.participation_id, ScoreOrm.activity_id,
+                       ScoreOrm.score)
+                .where(ScoreOrm.submitter_id == user_id, ScoreOrm.client_key.in_(keys))
+            )).all()} if keys else {}
+
+            results: list[int | PermissionError | ValueError | None] = [None] * len(items)
+            first_with_key: dict[str, int] = {}
+            fresh = []
+            for i, item in enumerate(items):
+                key = item.client_key
+                if key in recorded:
+                    results[i] = recorded[key].id if _same_score(recorded[key], item) else ValueError(KEY_REUSED)
+                elif key in first_with_key:
+                    continue  # повтор внутри пачки, разрешается ниже по первому вхождению
+                else:
+                    if key is not None:
+                        first_with_key[key] = i
+                    fresh.append(i)
+
+            inserted: dict[int, int] = {}
+            participations: dict[int, int] = {}
+            if fresh:
+                participations, rows = await cls._validate_scores(session, user_id, role, [items[i] for i in fresh])
+                for i, row in zip(fresh, rows):
+                    results[i] = row if isinstance(row, Exception) else None
+                inserted = await _insert_scores(session, {i: row for i, row in zip(fresh, rows)
+                                                          if not isinstance(row, Exception)})
+
+            # Ключи, которые параллельный запрос записал между нашим SELECT и INSERT
+            raced = [i for i in fresh if results[i] is None and i not in inserted]
+            if raced:
+                recorded = {score.client_key: score for score in (await session.execute(
+                    select(ScoreOrm.id, ScoreOrm.client_key, ScoreOrm.participation_id, ScoreOrm.activity_id,
+                           ScoreOrm.score)
+                    .where(ScoreOrm.submitter_id == user_id,
+                           ScoreOrm.client_key.in_([items[i].client_key for i in raced]))
+                )).all()}
+                for i in raced:
+                    score = recorded[items[i].client_key]
+                    results[i] = score.id if _same_score(score, items[i]) else ValueError(KEY_REUSED)
+
+            totals: dict[int, int] = {}
+            for i, score_id in inserted.items():
+                participation_id = items[i].participation_id
+                results[i] = score_id
+                totals[participation_id] = totals.get(participation_id, 0) + items[i].score
+                record_change(session, SyncEntity.score, score_id, participations[participation_id])
+            # Строки итогов блокируются в порядке id: пачки с общими участиями не встанут в deadlock
+            for participation_id in sorted(totals):
+                await add_to_total(session, participation_id, participations[participation_id],
+                                   totals[participation_id])
+            for event_id in {participations[participation_id] for participation_id in totals}:
+                participations_changed(session, event_id)
+            await commit(session)
+
+        for i, item in enumerate(items):
+            first = first_with_key.get(item.client_key)
+            if first is not None and first != i:
+                results[i] = results[first] if item == items[first] else ValueError(KEY_REUSED)
+        return results
+
+    @staticmethod
+    async def _validate_scores(
+            session: AsyncSession, user_id: uuid.UUID, role: RoleEnum | None, items: list[SScoreAdd]
+    ) -> tuple[dict[int, int], list[dict | PermissionError | ValueError]]:
+        """
+        Проверяет права и активности для всей пачки двумя запросами; судейство берется
+        из event_judges_cache. Возвращает event_id найденных участий и для каждой оценки
+        строку для вставки или ошибку.
+        """
+        if role is None:
+            role = await session.scalar(select(UserOrm.role).where(UserOrm.id == user_id))
+        is_admin_or_org = role in [RoleEnum.admin, RoleEnum.organizer]
+
+        participations = dict((await session.execute(
+            select(EventParticipationOrm.id, EventParticipationOrm.event_id)
+            .where(EventParticipationOrm.id.in_({item.participation_id for item in items}))
+        )).all())
+        judged_events = {event_id for event_id in set(participations.values())
+                         if user_id in await event_judges(session, event_id)}
+        activity_ids = {item.activity_id for item in items if item.activity_id is not None}
+        activities = {activity.id: activity for activity in (await session.execute(
+            select(EventActivityOrm.id, EventActivityOrm.is_scoreable, EventActivityOrm.max_score)
+            .where(EventActivityOrm.id.in_(activity_ids))
+        )).all()} if activity_ids else {}
+
+        rows = []
+        for item in items:
+            event_id = participations.get(item.participation_id)
+            if event_id is None:
+                rows.append(ValueError("Команда/участие не найдено."))
+                continue
+            is_judge_for_event = event_id in judged_events
+
+            if item.activity_id is None:
                 if not is_admin_or_org:
-                    raise PermissionError("Только администратор или организатор могут добавлять бонусные очки.")
-
-            # --- Логика для очков за активность ---
+                    rows.append(PermissionError("Только администратор или организатор могут добавлять бонусные очки."))
+                    continue
             else:
                 if not is_judge_for_event and not is_admin_or_org:
-                    raise PermissionError(
-                        "Только назначенный судья или организатор могут выставлять оценки за активности.")
-
-                activity = await session.get(EventActivityOrm, data.activity_id)
-                if not activity:
-                    raise ValueError("Активность не найдена.")
-
+                    rows.append(PermissionError(
+                        "Только назначенный судья или организатор могут выставлять оценки за активности."))
+                    continue
+                activity = activities.get(item.activity_id)
+                if activity is None:
+                    rows.append(ValueError("Активность не найдена."))
+                    continue
                 if not activity.is_scoreable:
-                    raise ValueError("Нельзя выставить оценку за не оцениваемую активность.")
-
-                if activity.max_score is not None and data.score > activity.max_score:
-                    raise ValueError(f"Оценка не может быть больше максимальной ({activity.max_score}).")
-
-            new_score = ScoreOrm(
-                judge_id=user_id if data.activity_id is not None and is_judge_for_event else None,
-                **data.model_dump()
-            )
-            session.add(new_score)
-            await session.commit()
+                    rows.append(ValueError("Нельзя выставить оценку за не оцениваемую активность."))
+                    continue
+                if activity.max_score is not None and item.score > activity.max_score:
+                    rows.append(ValueError(f"Оценка не может быть больше максимальной ({activity.max_score})."))
+                    continue
+
+            rows.append({
+                "judge_id": user_id if item.activity_id is not None and is_judge_for_event else None,
+                "submitter_id": user_id,
+                **item.model_dump(),
+            })
+        return participations, rows
 
     @classmethod
-    async def is_user_judge_for_event(cls, event_id: int, user_id: uuid.UUID) -> bool:
-        """Проверяет, является ли пользователь судьей на мероприятии."""
-        async with new_session() as session:
-            judge_entry = await session.get(EventJudgeOrm, (event_id, user_id))
-            return judge_entry is not None
+    async def is_user_judge_for_event(cls, event_id: int, user_id: uuid.UUID,
+                                      session: AsyncSession | None = None) -> bool:
+        """Проверяет, является ли пользователь судьей на мероприятии (по event_judges_cache)."""
+        async with use_session(session) as session:
+            return user_id in await event_judges(session, event_id)
 
     @classmethod
-    async def get_judges_for_event(cls, event_id: int) -> list[EventJudgeOrm]:
+    async def get_judges_for_event(cls, event_id: int, session: AsyncSession | None = None) -> list[EventJudgeOrm]:
         """Возвращает список судей для мероприятия."""
-        async with new_session() as session:
+        async with use_session(session) as session:
             query = (
                 select(EventJudgeOrm)
                 .where(EventJudgeOrm.event_id == event_id)
@@ -494,27 +1040,19 @@ class EventRepository:
             return result.scalars().all()
 
     @classmethod
-    async def get_leaderboard(cls, event_id: int):
+    async def get_leaderboard(cls, event_id: int, session: AsyncSession | None = None):
         """
         Возвращает отсортированный лидерборд для мероприятия.
-        Включает команды с 0 очков.
+        Включает команды с 0 очков. Итоги берутся из participation_totals
+        проходом по idx_participation_totals_leaderboard, без агрегации scores.
         """
-        async with new_session() as session:
+        async with use_session(session) as session:
             query = (
-                select(
-                    EventParticipationOrm,
-                    func.coalesce(func.sum(ScoreOrm.score), 0).label("total_score")
-                )
-                .outerjoin(ScoreOrm, EventParticipationOrm.id == ScoreOrm.participation_id)
-                .where(EventParticipationOrm.event_id == event_id)
-                .group_by(EventParticipationOrm.id)
-                .order_by(func.sum(ScoreOrm.score).desc().nulls_last())
-                .options(
-                    selectinload(EventParticipationOrm.creator).load_only(UserOrm.id, UserOrm.handle, UserOrm.full_name,
-                                                                          UserOrm.avatar_url),
-                    selectinload(EventParticipationOrm.members).selectinload(ParticipationMemberOrm.user).load_only(
-                        UserOrm.id, UserOrm.handle, UserOrm.full_name, UserOrm.avatar_url)
-                )
+                select(EventParticipationOrm, ParticipationTotalOrm.total_score)
+                .join(ParticipationTotalOrm, ParticipationTotalOrm.participation_id == EventParticipationOrm.id)
+                .where(ParticipationTotalOrm.event_id == event_id)
+                .order_by(ParticipationTotalOrm.total_score.desc(), ParticipationTotalOrm.participation_id.desc())
+                .options(*public_participation_options())
             )
             result = await session.execute(query)
             return result.all()
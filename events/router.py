@@ -1,66 +1,137 @@
-from fastapi import APIRouter, HTTPException, Depends
+import datetime
+import hashlib
+import json
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette import status
 
-from auth.dependencies import get_current_user, get_optional_current_user
+from auth.dependencies import get_current_user, get_optional_current_user, get_current_claims
+from db import get_session
+from db.events import event_period, period_state, ParticipantTypeEnum
 from db.users import UserOrm, RoleEnum
+from events.admission import admission
+from events.cache import event_detail_cache
+from events.live import leaderboard_hub
 from events.repository import EventRepository
-from events.schemas import SEventAdd, SEvent, SEventId, SEventUpdate, SEventMediaAdd, SEventCard, SMediaReorderItem, \
-    SParticipationOut, SParticipationCreate, SJudgeAdd, SJudgeOut, SLeaderboardEntry
+from events.exceptions import VersionConflictError
+from helpers.conditional import conditional_get, etag_matches, if_match_version, resource_versions, row_etag
+from helpers.singleflight import flights, single_flight
+from events.schemas import SEventAdd, SEvent, SEventId, SEventUpdate, SEventMediaAdd, SEventPage, SMediaReorderItem, \
+    SParticipationOut, SParticipationPage, SOpenTeamPage, SParticipationCreate, SJudgeAdd, SJudgeOut, \
+    SLeaderboardEntry, SWaitlistPosition
 from auth.roles import require_organizer_or_admin
+from users.schemas import STokenClaims
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
-
-@router.get("", response_model=list[SEventCard])
-async def get_events():
-    return await EventRepository.get_all()
+# state мероприятия зависит от времени, поэтому ETag списка периодически меняется
+STATE_REFRESH_SECONDS = 60
+
+
+@router.get("", response_model=SEventPage)
+@conditional_get("events", refresh_every=STATE_REFRESH_SECONDS)
+@single_flight(SEventPage, "events")
+async def get_events(
+        cursor: str | None = None,
+        limit: int = Query(20, ge=1, le=100),
+        state: Literal["future", "current", "past"] | None = None,
+        date_from: datetime.date | None = None,
+        date_to: datetime.date | None = None,
+        is_team: bool | None = None,
+        session: AsyncSession = Depends(get_session),
+):
+    """Возвращает страницу карточек мероприятий. Следующая страница — по next_cursor."""
+    try:
+        items, next_cursor = await EventRepository.get_all(
+            cursor=cursor, limit=limit, state=state, date_from=date_from, date_to=date_to, is_team=is_team,
+            session=session,
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.get("/{event_id}", response_model=SEvent)
 async def get_event(
         event_id: int,
-        current_user: UserOrm | None = Depends(get_optional_current_user)
+        request: Request,
+        current_user: UserOrm | None = Depends(get_optional_current_user),
+        session: AsyncSession = Depends(get_session),
 ):
-    event_orm = await EventRepository.get_by_id(event_id)
-    if not event_orm:
-        raise HTTPException(status_code=404, detail="Event not found")
-
-    # Преобразуем ORM в Pydantic-схему
-    event_data = SEvent.model_validate(event_orm, from_attributes=True)
+    """
+    Карточка мероприятия. ETag сильный и построен от версии строки (см. row_etag),
+    поэтому его можно передать в If-Match при PATCH /events/{event_id}.
+    """
+    # Кэш сверяется с общей версией мероприятия: правка на другом воркере тоже его обходит
+    [version] = await resource_versions.current(f"event:{event_id}")
+    cached = event_detail_cache.get(event_id)
+    if cached is None or cached[0] != version:
+        async def load():
+            event = await EventRepository.get_by_id(event_id)
+            if not event:
+                raise HTTPException(status_code=404, detail="Event not found")
+            body = event.model_dump(mode="json")
+            digest = hashlib.blake2b(json.dumps(body, sort_keys=True).encode(), digest_size=6).hexdigest()
+            # Версия прочитана до загрузки: если мероприятие успели поменять, тело новее
+            # записанной версии, и следующий запрос просто загрузит его заново
+            loaded = (version, body, event_period(event.date, event.start_time, event.end_time), digest)
+            event_detail_cache.set(event_id, loaded)
+            return loaded
+
+        # Промах кеша после правки мероприятия: одновременные запросы ждут одну загрузку
+        cached = await flights.do(("event_detail", event_id, version), load)
+
+    _, body, period, digest = cached
+    state = period_state(*period)
 
     # Если пользователь авторизован, проверяем, является ли он судьей
+    is_judge = False
     if current_user:
-        is_judge = await EventRepository.is_user_judge_for_event(event_id, current_user.id)
-        event_data.is_current_user_judge = is_judge
+        is_judge = await EventRepository.is_user_judge_for_event(event_id, current_user.id, session=session)
 
-    return event_data
+    headers = {"ETag": row_etag(body["version"], digest, state, str(int(is_judge))), "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        resource_versions.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    # Тело уже сериализовано, повторная валидация через response_model не нужна
+    return JSONResponse({**body, "state": state, "is_current_user_judge": is_judge}, headers=headers)
 
 
 @router.post("", response_model=SEventId)
 async def add_event(event: SEventAdd,
-                    user: UserOrm = Depends(require_organizer_or_admin)):
-    event_id = await EventRepository.add_one(event)
+                    user: STokenClaims = Depends(require_organizer_or_admin),
+                    session: AsyncSession = Depends(get_session)):
+    event_id = await EventRepository.add_one(event, session=session)
     return {"ok": True, "event_id": event_id}
 
 
 @router.patch("/{event_id}", response_model=dict)
 async def edit_event(event_id: int,
                      data: SEventUpdate,
-                     user: UserOrm = Depends(require_organizer_or_admin)):
+                     expected_version: int | None = Depends(if_match_version),
+                     user: STokenClaims = Depends(require_organizer_or_admin),
+                     session: AsyncSession = Depends(get_session)):
     try:
-        updated = await EventRepository.edit(event_id, data)
-        if not updated:
-            raise HTTPException(status_code=404, detail="Event not found")
+        updated = await EventRepository.edit(event_id, data, expected_version, session=session)
+    except VersionConflictError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not updated:
+        raise HTTPException(status_code=404, detail="Event not found")
 
     return {"ok": True}
 
 
 @router.delete("/{event_id}", response_model=dict)
 async def delete_event(event_id: int,
-                       user: UserOrm = Depends(require_organizer_or_admin)):
-    deleted = await EventRepository.delete(event_id)
+                       user: STokenClaims = Depends(require_organizer_or_admin),
+                       session: AsyncSession = Depends(get_session)):
+    deleted = await EventRepository.delete(event_id, session=session)
     if not deleted:
         raise HTTPException(status_code=404, detail="Event not found")
     return {"ok": True}
@@ -69,8 +140,9 @@ async def delete_event(event_id: int,
 @router.post("/{event_id}/media", response_model=dict)
 async def add_event_media(event_id: int,
                           body: SEventMediaAdd,
-                          user: UserOrm = Depends(require_organizer_or_admin)):
-    iid = await EventRepository.add_media(event_id, body)
+                          user: STokenClaims = Depends(require_organizer_or_admin),
+                          session: AsyncSession = Depends(get_session)):
+    iid = await EventRepository.add_media(event_id, body, session=session)
     if iid is None:
         raise HTTPException(404, "Event not found")
     return {"ok": True, "media_id": iid}
@@ -79,8 +151,9 @@ async def add_event_media(event_id: int,
 @router.delete("/{event_id}/media/{media_id}", response_model=dict)
 async def delete_event_media(event_id: int,
                              media_id: int,
-                             user: UserOrm = Depends(require_organizer_or_admin)):
-    deleted = await EventRepository.delete_media(event_id, media_id)
+                             user: STokenClaims = Depends(require_organizer_or_admin),
+                             session: AsyncSession = Depends(get_session)):
+    deleted = await EventRepository.delete_media(event_id, media_id, session=session)
     if not deleted:
         raise HTTPException(status_code=404, detail="media not found")
     return {"ok": True}
@@ -89,9 +162,10 @@ async def delete_event_media(event_id: int,
 @router.patch("/{event_id}/media/reorder", response_model=dict)
 async def reorder_media(event_id: int,
                         body: list[SMediaReorderItem],
-                        user: UserOrm = Depends(require_organizer_or_admin)):
+                        user: STokenClaims = Depends(require_organizer_or_admin),
+                        session: AsyncSession = Depends(get_session)):
     try:
-        ok = await EventRepository.reorder_media(event_id, body)
+        ok = await EventRepository.reorder_media(event_id, body, session=session)
     except ValueError as e:
         raise HTTPException(400, str(e))
     if not ok:
@@ -103,56 +177,109 @@ async def reorder_media(event_id: int,
     "/{event_id}/participate",
     response_model=SParticipationOut,
     status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": SWaitlistPosition}},
 )
 async def create_participation(
         event_id: int,
         participation_data: SParticipationCreate,
+        waitlist: bool = False,
         current_user: UserOrm = Depends(get_current_user),
 ):
     """
     Создает участие в мероприятии (личное или командное).
+    Если мест нет и передан waitlist=true, ставит в лист ожидания и возвращает 202 с позицией;
+    при освобождении места участие будет создано автоматически.
     """
     try:
-        participation = await EventRepository.add_participation(
-            event_id, current_user.id, participation_data
-        )
-        full_participation = await EventRepository.get_participation_by_id(participation.id)
-        return full_participation
+        result = await admission.submit(event_id, current_user.id, participation_data, waitlist)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if isinstance(result, SWaitlistPosition):
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=result.model_dump())
+    return result
+
+
+@router.delete("/{event_id}/waitlist", status_code=status.HTTP_204_NO_CONTENT)
+async def leave_waitlist(
+        event_id: int,
+        claims: STokenClaims = Depends(get_current_claims),
+        session: AsyncSession = Depends(get_session),
+):
+    if not await EventRepository.leave_waitlist(event_id, claims.user_id, session=session):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Вы не в листе ожидания.")
 
 
 @router.get(
     "/{event_id}/participations",
-    response_model=list[SParticipationOut],
+    response_model=SParticipationPage,
 )
-async def get_event_participations(event_id: int):
+@conditional_get("participations:{event_id}")
+@single_flight(SParticipationPage, "participations:{event_id}")
+async def get_event_participations(
+        event_id: int,
+        cursor: str | None = None,
+        limit: int = Query(50, ge=1, le=200),
+        participant_type: ParticipantTypeEnum | None = None,
+        open_slots: bool = False,
+        session: AsyncSession = Depends(get_session),
+):
     """
-    Возвращает список всех команд и участников мероприятия.
+    Возвращает страницу команд и участников мероприятия. Следующая страница — по next_cursor.
+    open_slots=true — только команды, в которых есть свободные места.
     """
-    return await EventRepository.get_participations_for_event(event_id)
+    try:
+        items, next_cursor = await EventRepository.get_participations_for_event(
+            event_id, cursor=cursor, limit=limit, participant_type=participant_type, open_slots=open_slots,
+            session=session,
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/{event_id}/open-teams", response_model=SOpenTeamPage)
+@conditional_get("participations:{event_id}")
+@single_flight(SOpenTeamPage, "participations:{event_id}")
+async def get_open_teams(
+        event_id: int,
+        cursor: str | None = None,
+        limit: int = Query(20, ge=1, le=100),
+        session: AsyncSession = Depends(get_session),
+):
+    """Команды, которые ищут участников: сначала те, где свободных мест больше всего."""
+    try:
+        page = await EventRepository.get_open_teams(event_id, cursor=cursor, limit=limit, session=session)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if page is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    items, next_cursor = page
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.get(
     "/{event_id}/judges",
     response_model=list[SJudgeOut],
 )
-async def get_judges(event_id: int):
+@conditional_get("judges:{event_id}")
+@single_flight(list[SJudgeOut], "judges:{event_id}")
+async def get_judges(event_id: int, session: AsyncSession = Depends(get_session)):
     """Возвращает список судей для мероприятия."""
-    return await EventRepository.get_judges_for_event(event_id)
+    return await EventRepository.get_judges_for_event(event_id, session=session)
 
 
 @router.post("/{event_id}/judges", status_code=status.HTTP_201_CREATED)
 async def add_judge(
         event_id: int,
         judge_data: SJudgeAdd,
-        current_user: UserOrm = Depends(get_current_user)
+        claims: STokenClaims = Depends(get_current_claims),
+        session: AsyncSession = Depends(get_session),
 ):
-    if current_user.role not in [RoleEnum.admin, RoleEnum.organizer]:
+    if claims.role not in [RoleEnum.admin, RoleEnum.organizer]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Нет прав для назначения судей.")
 
     try:
-        await EventRepository.add_judge_to_event(event_id, judge_data)
+        await EventRepository.add_judge_to_event(event_id, judge_data, session=session)
         return {"ok": True}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -162,14 +289,31 @@ async def add_judge(
     "/{event_id}/leaderboard",
     response_model=list[SLeaderboardEntry],
 )
-async def get_leaderboard(event_id: int):
+@conditional_get("leaderboard:{event_id}")
+@single_flight(list[SLeaderboardEntry], "leaderboard:{event_id}")
+async def get_leaderboard(event_id: int, session: AsyncSession = Depends(get_session)):
     """
     Возвращает посчитанный и отсортированный лидерборд для мероприятия.
     """
-    raw_leaderboard = await EventRepository.get_leaderboard(event_id)
+    raw_leaderboard = await EventRepository.get_leaderboard(event_id, session=session)
 
     response = [
         SLeaderboardEntry(participation=participation_orm, total_score=score)
         for participation_orm, score in raw_leaderboard
     ]
     return response
+
+
+@router.get("/{event_id}/leaderboard/stream")
+async def stream_leaderboard(event_id: int):
+    """
+    Живой лидерборд (Server-Sent Events). Первый кадр snapshot — весь лидерборд,
+    дальше кадры diff: {ranks, upserts, removed} после каждого изменения очков или состава.
+    """
+    if not await EventRepository.exists(event_id):
+        raise HTTPException(status_code=404, detail="Event not found")
+    return StreamingResponse(
+        leaderboard_hub.stream(event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
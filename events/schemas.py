@@ -1,4 +1,5 @@
 import datetime as dt
+import uuid
 from typing import Literal, List
 
 from pydantic import BaseModel, Field, field_validator, model_validator
@@ -72,6 +73,13 @@ class SEventId(BaseModel):
 
 
 # Event card schema for listing
+class SEventSync(_EventBase):
+    id: int
+    version: int
+
+    model_config = {"from_attributes": True}
+
+
 class SEventCard(BaseModel):
     id: int
     title: str
@@ -81,6 +89,11 @@ class SEventCard(BaseModel):
     is_team: bool
 
 
+class SEventPage(BaseModel):
+    items: list[SEventCard]
+    next_cursor: str | None = None
+
+
 class SActivityBase(BaseModel):
     name: str = Field(max_length=150)
     icon: str | None = Field(None, max_length=50)
@@ -116,12 +129,14 @@ class SActivityUpdate(BaseModel):
 class SActivityOut(SActivityBase):
     id: int
     event_id: int
+    version: int
     model_config = {"from_attributes": True}
 
 
 # Event
 class SEvent(_EventBase):
     id: int
+    version: int
     media: list[SEventMedia]
     state: Literal["future", "current", "past"]
     activities: List[SActivityOut]
@@ -135,6 +150,16 @@ class SParticipationCreate(BaseModel):
     team_name: str | None = Field(None, min_length=1, max_length=80)
 
 
+class SAdmissionRequest(BaseModel):
+    user_id: uuid.UUID
+    data: SParticipationCreate
+    waitlist: bool = False  # встать в лист ожидания, если мест нет
+
+
+class SWaitlistPosition(BaseModel):
+    waitlist_position: int
+
+
 class SParticipationMemberOut(BaseModel):
     user: SUserPublic
 
@@ -153,6 +178,25 @@ class SParticipationOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class SParticipationPage(BaseModel):
+    items: list[SParticipationOut]
+    next_cursor: str | None = None
+
+
+class SOpenTeam(BaseModel):
+    id: int
+    team_name: str | None
+    team_avatar_url: str | None
+    creator: SUserPublic
+    member_count: int
+    free_slots: int
+
+
+class SOpenTeamPage(BaseModel):
+    items: list[SOpenTeam]
+    next_cursor: str | None = None
+
+
 class SJudgeAdd(BaseModel):
     handle: str
     role_description: str | None = None
@@ -163,6 +207,42 @@ class SScoreAdd(BaseModel):
     score: int
     activity_id: int | None = None
     reason: str | None = None
+    client_key: str | None = Field(None, min_length=1, max_length=64)
+
+
+class SScoreBatch(BaseModel):
+    items: list[SScoreAdd] = Field(..., min_length=1, max_length=500)
+
+
+class SScoreSyncItem(SScoreAdd):
+    client_key: str = Field(..., min_length=1, max_length=64)
+
+
+class SScoreSync(BaseModel):
+    items: list[SScoreSyncItem] = Field(..., min_length=1, max_length=500)
+
+
+class SScoreBatchResult(BaseModel):
+    """Итог по одной оценке пачки: id созданной оценки или текст ошибки."""
+    score_id: int | None = None
+    error: str | None = None
+
+
+class SScoreBatchOut(BaseModel):
+    accepted: int  # оценок с score_id, включая повторы уже записанных
+    results: list[SScoreBatchResult]
+
+
+class SScoreOut(BaseModel):
+    id: int
+    participation_id: int
+    activity_id: int | None
+    judge_id: uuid.UUID | None
+    score: int
+    reason: str | None
+    client_key: str | None
+
+    model_config = {"from_attributes": True}
 
 
 class SJudgeOut(BaseModel):
@@ -0,0 +1,63 @@
+from sqlalchemy import select, update, delete, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.events import EventParticipationOrm, ParticipationTotalOrm, ScoreOrm
+
+
+def _sum_scores(*where):
+    return select(func.coalesce(func.sum(ScoreOrm.score), 0)).where(*where).scalar_subquery()
+
+
+async def add_to_total(session: AsyncSession, participation_id: int, event_id: int, score: int) -> None:
+    """
+    Прибавляет очки к итогу участия. UPDATE с инкрементом атомарен, поэтому параллельные
+    оценки разных судей не теряются. Если строки итога нет (участие создано в обход
+    репозитория), она создается по сумме уже записанных очков — вызывать после flush новой оценки.
+    """
+    res = await session.execute(
+        update(ParticipationTotalOrm)
+        .where(ParticipationTotalOrm.participation_id == participation_id)
+        .values(total_score=ParticipationTotalOrm.total_score + score)
+    )
+    if not res.rowcount:
+        session.add(ParticipationTotalOrm(
+            participation_id=participation_id,
+            event_id=event_id,
+            total_score=await session.scalar(select(_sum_scores(ScoreOrm.participation_id == participation_id))),
+        ))
+
+
+async def subtract_activity_scores(session: AsyncSession, activity_id: int) -> None:
+    """Вычитает из итогов очки за активность; вызывать до ее удаления (очки удаляются каскадом)."""
+    await session.execute(
+        update(ParticipationTotalOrm)
+        .where(ParticipationTotalOrm.participation_id.in_(
+            select(ScoreOrm.participation_id).where(ScoreOrm.activity_id == activity_id)
+        ))
+        .values(total_score=ParticipationTotalOrm.total_score - _sum_scores(
+            ScoreOrm.activity_id == activity_id,
+            ScoreOrm.participation_id == ParticipationTotalOrm.participation_id,
+        ))
+    )
+
+
+async def rebuild_totals(session: AsyncSession, event_id: int | None = None) -> None:
+    """Пересчитывает итоги с нуля по таблице scores: для одного мероприятия или для всех."""
+    clear = delete(ParticipationTotalOrm)
+    participations = (
+        select(
+            EventParticipationOrm.id,
+            EventParticipationOrm.event_id,
+            func.coalesce(func.sum(ScoreOrm.score), 0),
+        )
+        .outerjoin(ScoreOrm, ScoreOrm.participation_id == EventParticipationOrm.id)
+        .group_by(EventParticipationOrm.id, EventParticipationOrm.event_id)
+    )
+    if event_id is not None:
+        clear = clear.where(ParticipationTotalOrm.event_id == event_id)
+        participations = participations.where(EventParticipationOrm.event_id == event_id)
+
+    await session.execute(clear)
+    await session.execute(
+        insert(ParticipationTotalOrm).from_select(["participation_id", "event_id", "total_score"], participations)
+    )
@@ -0,0 +1,157 @@
+import functools
+import inspect
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from fastapi import Header, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import use_session, on_commit
+from db.versions import ResourceVersionOrm, touch_scopes
+
+# Версии, уже прочитанные conditional_get для текущего запроса: single_flight берет их отсюда
+_read_versions: ContextVar[dict[str, int]] = ContextVar("read_versions", default={})
+
+
+class ResourceVersions:
+    """
+    Версии ресурсов ("events", "event:1", "leaderboard:1" ...), из которых GET-эндпоинты строят ETag.
+
+    Счетчики общие для всех воркеров (таблица resource_versions): репозиторий отмечает области
+    через bump, и они увеличиваются в той же транзакции, что и сами изменения, поэтому ETag
+    одинаков на любом воркере и не отстает от данных. Проверка ETag — один запрос по ключу.
+
+    После коммита bump увеличивает и счетчики в памяти процесса (local): по ним кэши этого
+    воркера проверяют, не устарела ли загрузка, без запроса к БД.
+    """
+
+    def __init__(self):
+        self._local: defaultdict[str, int] = defaultdict(int)
+        self.not_modified = 0
+
+    def bump(self, session: AsyncSession, *scopes: str) -> None:
+        touch_scopes(session, *scopes)
+        on_commit(session, self._bump_local, *scopes)
+
+    def _bump_local(self, *scopes: str) -> None:
+        for scope in scopes:
+            self._local[scope] += 1
+
+    def local(self, *scopes: str) -> tuple[int, ...]:
+        return tuple(self._local[scope] for scope in scopes)
+
+    async def current(self, *scopes: str, session: AsyncSession | None = None) -> tuple[int, ...]:
+        """
+        Общие версии областей; уже прочитанные в этом запросе повторно не запрашиваются.
+        session — сессия вызывающего, чтобы не брать для чтения версий второе соединение.
+        """
+        known = _read_versions.get()
+        missing = [scope for scope in scopes if scope not in known]
+        if missing:
+            async with use_session(session) as session:
+                rows = await session.execute(
+                    select(ResourceVersionOrm.scope, ResourceVersionOrm.version)
+                    .where(ResourceVersionOrm.scope.in_(missing))
+                )
+                known = {**known, **{scope: 0 for scope in missing}, **dict(rows.all())}
+        return tuple(known[scope] for scope in scopes)
+
+    def stats(self) -> dict:
+        return {"tracked_scopes": len(self._local), "not_modified": self.not_modified}
+
+
+resource_versions = ResourceVersions()
+
+
+def weak_etag(versions: tuple[int, ...], bucket: int | None = None) -> str:
+    parts = [str(version) for version in versions]
+    if bucket is not None:
+        parts.append(str(bucket))
+    return f'W/"{"-".join(parts)}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Для If-None-Match используется слабое сравнение
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_get(*scopes: str, refresh_every: int | None = None):
+    """
+    Декоратор GET-эндпоинта: отвечает 304 на If-None-Match, не вызывая сам эндпоинт.
+
+    scopes — шаблоны областей версий, подставляются из параметров эндпоинта,
+    например "event:{event_id}". refresh_every (секунды) добавляет к ETag временную
+    корзину для ответов, которые зависят от текущего времени (state мероприятия).
+    """
+
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        has_request = "request" in signature.parameters
+        has_response = "response" in signature.parameters
+        parameters = list(signature.parameters.values())
+        if not has_request:
+            parameters.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+        if not has_response:
+            parameters.append(inspect.Parameter("response", inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            request: Request = kwargs["request"] if has_request else kwargs.pop("request")
+            response: Response = kwargs["response"] if has_response else kwargs.pop("response")
+
+            names = [scope.format(**kwargs) for scope in scopes]
+            versions = await resource_versions.current(*names)
+            bucket = int(time.time() // refresh_every) if refresh_every else None
+            etag = weak_etag(versions, bucket)
+            headers = {"ETag": etag, "Vary": "Authorization"}
+
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                resource_versions.not_modified += 1
+                return Response(status_code=304, headers=headers)
+
+            token = _read_versions.set(dict(zip(names, versions)))
+            try:
+                result = await endpoint(**kwargs)
+            finally:
+                _read_versions.reset(token)
+            target = result if isinstance(result, Response) else response
+            target.headers.update(headers)
+            return result
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+
+    return decorator
+
+
+def row_etag(version: int, *parts: str) -> str:
+    """
+    Сильный ETag карточки сущности: версия строки и то, от чего еще зависит представление
+    ("3-1f0a9c-current-0"). If-Match принимает его целиком или только версию ("3").
+    """
+    return f'"{"-".join((str(version), *parts))}"'
+
+
+def if_match_version(if_match: str | None = Header(None)) -> int | None:
+    """
+    Зависимость для PATCH: версия строки из заголовка If-Match — ETag карточки из GET
+    (см. row_etag) или сама версия ("3" или 3).
+    Без заголовка (или с "*") запись выполняется без проверки версии.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        # Слабые ETag списков не годятся для If-Match: нужен ETag карточки
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "If-Match requires a strong version tag")
+    try:
+        return int(value.strip('"').split("-", 1)[0])
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "If-Match must contain the row version")
@@ -0,0 +1,107 @@
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from config import SINGLE_FLIGHT_TTL_SECONDS
+from db import new_session
+from helpers.conditional import resource_versions
+from metrics.registry import register
+
+# Параметры эндпоинта, которые не влияют на ответ и не входят в ключ
+_REQUEST_SCOPED = {"session", "request", "response"}
+
+
+class SingleFlight:
+    """
+    Склеивает одновременные одинаковые вызовы: первый запускает загрузку, остальные ждут
+    тот же результат (или ту же ошибку). С ttl готовый результат еще ttl секунд отдается
+    без нового вызова. Загрузка идет отдельной задачей, поэтому отключение первого
+    клиента не обрывает ее для остальных.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._recent: dict[Hashable, tuple[float, Any]] = {}
+        self.flights = 0
+        self.coalesced = 0
+        self.ttl_hits = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], ttl: float | None = None) -> Any:
+        if ttl:
+            recent = self._recent.get(key)
+            if recent is not None and recent[0] > time.monotonic():
+                self.ttl_hits += 1
+                return recent[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.flights += 1
+            task = self._inflight[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(functools.partial(self._finish, key, ttl))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, ttl: float | None, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or not ttl:
+            return
+        now = time.monotonic()
+        self._recent[key] = (now + ttl, task.result())
+        if len(self._recent) > 1024:
+            self._recent = {k: v for k, v in self._recent.items() if v[0] > now}
+
+    def clear(self) -> None:
+        self._recent.clear()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "flights": self.flights,
+            "coalesced": self.coalesced,
+            "ttl_hits": self.ttl_hits,
+        }
+
+
+flights = SingleFlight()
+register("single_flight", flights.stats)
+
+
+def single_flight(model, *scopes: str, ttl: float | None = SINGLE_FLIGHT_TTL_SECONDS):
+    """
+    Декоратор GET-эндпоинта: одновременные запросы с одинаковыми параметрами получают
+    один вызов эндпоинта и одно и то же тело ответа, сериализованное по model.
+
+    scopes — те же шаблоны областей версий, что у conditional_get: их текущие версии входят
+    в ключ, поэтому запрос после записи не склеится со старой загрузкой и не получит ее из ttl.
+    Общий вызов идет в собственной сессии — сессия первого запроса может закрыться раньше.
+    """
+    adapter = TypeAdapter(model)
+
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            params = sorted((name, value) for name, value in kwargs.items() if name not in _REQUEST_SCOPED)
+            key = (
+                endpoint.__module__,
+                endpoint.__qualname__,
+                await resource_versions.current(*(scope.format(**kwargs) for scope in scopes)),
+                repr(params),
+            )
+
+            async def load() -> bytes:
+                async with new_session() as session:
+                    call_kwargs = {**kwargs, "session": session} if "session" in kwargs else kwargs
+                    result = await endpoint(**call_kwargs)
+                return adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+
+            body = await flights.do(key, load, ttl)
+            return Response(content=body, media_type="application/json")
+
+        return wrapper
+
+    return decorator
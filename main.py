@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,8 +10,14 @@ from auth.router import router as auth_router
 from users.router import router as users_router
 from participations.router import router as participations_router
 from scores.router import router as scores_router
+from metrics.router import router as metrics_router
+from sync.router import router as sync_router
+from auth.hashing import password_hasher
 
-from config import ENV, MEDIA_DIR
+from auth.revocation import revocation_index
+from config import ENV, MEDIA_DIR, REVOCATION_SYNC_INTERVAL_SECONDS
+from db import engine
+from events.live import start_bridge
 from utils.migrate import create_tables
 from utils.seed import create_initial_users, create_initial_events, create_leaderboard_data
 
@@ -22,7 +29,13 @@ async def lifespan(app: FastAPI):
         await create_initial_users()
         await create_initial_events()
         await create_leaderboard_data()
+    revocation_sync = asyncio.create_task(revocation_index.run_sync_loop(REVOCATION_SYNC_INTERVAL_SECONDS))
+    leaderboard_bridge = await start_bridge(engine)
     yield
+    if leaderboard_bridge is not None:
+        await leaderboard_bridge.stop()
+    revocation_sync.cancel()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -51,3 +64,5 @@ app.include_router(event_activities_router)
 app.include_router(activities_router)
 app.include_router(participations_router)
 app.include_router(scores_router)
+app.include_router(metrics_router)
+app.include_router(sync_router)
@@ -0,0 +1,13 @@
+from typing import Callable
+
+_sources: dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, stats: Callable[[], dict]) -> None:
+    """Регистрирует источник метрик (например, пул хеширования или кэш)."""
+    _sources[name] = stats
+
+
+def collect() -> dict[str, dict]:
+    """Собирает текущие значения всех зарегистрированных метрик."""
+    return {name: stats() for name, stats in _sources.items()}
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+
+from auth.roles import require_role
+from db.users import RoleEnum
+from metrics.registry import collect
+from users.schemas import STokenClaims
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("", response_model=dict)
+async def get_metrics(user: STokenClaims = Depends(require_role(RoleEnum.admin))):
+    """Возвращает внутренние счетчики сервиса (очереди, кэши, лимитеры)."""
+    return collect()
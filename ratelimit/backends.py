@@ -0,0 +1,88 @@
+import time
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from db import new_session
+from db.rate_limits import RateLimitBucketOrm
+
+
+def _refill(tokens: float, updated_at: float, now: float, capacity: int, rate: float) -> float:
+    return min(capacity, tokens + (now - updated_at) * rate)
+
+
+class InMemoryBackend:
+    """Token buckets в памяти процесса. Подходит для одного воркера."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """
+        Забирает один токен из корзины.
+        Возвращает 0, если запрос разрешен, иначе через сколько секунд появится токен.
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = _refill(tokens, updated_at, now, capacity, rate)
+
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+        self._buckets[key] = (tokens - 1, now)
+        if len(self._buckets) > self.max_keys:
+            self._prune(now, capacity, rate)
+        return 0.0
+
+    def _prune(self, now: float, capacity: int, rate: float) -> None:
+        # Полностью восстановившиеся корзины ничем не отличаются от отсутствующих
+        full_after = capacity / rate
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full_after}
+
+    def reset(self) -> None:
+        self._buckets.clear()
+
+
+class DatabaseBackend:
+    """Token buckets в общей БД, чтобы лимит действовал сразу на все воркеры."""
+
+    def __init__(self, cleanup_every: int = 1000):
+        self.cleanup_every = cleanup_every
+        self._calls = 0
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        now = time.time()
+        self._calls += 1
+
+        async with new_session() as session:
+            bucket = await session.get(RateLimitBucketOrm, key, with_for_update=True)
+            if bucket is None:
+                session.add(RateLimitBucketOrm(key=key, tokens=capacity - 1, updated_at=now))
+                try:
+                    await session.commit()
+                    return 0.0
+                except IntegrityError:
+                    # Корзину параллельно создал другой воркер
+                    await session.rollback()
+                    bucket = await session.get(RateLimitBucketOrm, key, with_for_update=True)
+
+            tokens = _refill(bucket.tokens, bucket.updated_at, now, capacity, rate)
+            retry_after = 0.0
+            if tokens < 1:
+                retry_after = (1 - tokens) / rate
+            else:
+                tokens -= 1
+            bucket.tokens = tokens
+            bucket.updated_at = now
+
+            if self._calls % self.cleanup_every == 0:
+                await session.execute(
+                    delete(RateLimitBucketOrm).where(RateLimitBucketOrm.updated_at < now - 86400)
+                )
+            await session.commit()
+            return retry_after
+
+    def reset(self) -> None:
+        pass
@@ -0,0 +1,108 @@
+import hashlib
+import ipaddress
+import json
+import math
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, Request, status
+
+from config import RATE_LIMIT_BACKEND, TRUSTED_PROXIES
+from metrics.registry import register
+from ratelimit.backends import InMemoryBackend, DatabaseBackend
+
+KeyFunc = Callable[[Request], Awaitable[str | None]]
+
+default_backend = DatabaseBackend() if RATE_LIMIT_BACKEND == "database" else InMemoryBackend()
+_limiters: list["RateLimiter"] = []
+_trusted_networks = [ipaddress.ip_network(proxy, strict=False) for proxy in TRUSTED_PROXIES]
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """Разбирает строку вида "10/60" (10 запросов за 60 секунд)."""
+    count, seconds = rate.split("/")
+    return int(count), float(seconds)
+
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_networks)
+
+
+async def client_ip(request: Request) -> str | None:
+    """
+    IP клиента. X-Forwarded-For учитывается, только если запрос пришел от доверенного прокси:
+    цепочка разбирается справа налево, и клиентом считается первый адрес не из TRUSTED_PROXIES.
+    Левые адреса в заголовке может подставить сам клиент, поэтому им не доверяем.
+    """
+    peer = request.client.host if request.client else None
+    if peer is None or not is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def json_field(name: str) -> KeyFunc:
+    """
+    Ключ из поля JSON-тела запроса (например, логин). Тело кэшируется в Request.
+    Значение хэшируется: длина ключа не зависит от ввода клиента и укладывается в колонку бакета.
+    """
+
+    async def key(request: Request) -> str | None:
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        value = body.get(name) if isinstance(body, dict) else None
+        if not value:
+            return None
+        return hashlib.sha256(str(value).strip().lower().encode()).hexdigest()
+
+    return key
+
+
+class RateLimiter:
+    """
+    Зависимость FastAPI, ограничивающая частоту запросов по token bucket.
+    Подключается к отдельному маршруту или целому роутеру через dependencies=[Depends(limiter)].
+    """
+
+    def __init__(self, name: str, rate: str, key_func: KeyFunc = client_ip, backend=None):
+        self.name = name
+        self.capacity, seconds = parse_rate(rate)
+        self.refill_rate = self.capacity / seconds
+        self.key_func = key_func
+        self.backend = backend or default_backend
+        self.allowed = 0
+        self.rejected = 0
+        _limiters.append(self)
+
+    async def __call__(self, request: Request) -> None:
+        key = await self.key_func(request)
+        if key is None:
+            return
+
+        retry_after = await self.backend.take(f"{self.name}:{key}", self.capacity, self.refill_rate)
+        if retry_after > 0:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много запросов, попробуйте позже.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        self.allowed += 1
+
+
+def stats() -> dict:
+    return {
+        limiter.name: {"allowed": limiter.allowed, "rejected": limiter.rejected}
+        for limiter in _limiters
+    }
+
+
+register("rate_limits", stats)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from auth.dependencies import get_current_user
-from db.users import UserOrm
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from auth.dependencies import get_current_claims
+from db import get_session
 from events.repository import EventRepository
-from events.schemas import SScoreAdd
+from events.schemas import SScoreAdd, SScoreBatch, SScoreBatchOut, SScoreSync
+from users.schemas import STokenClaims
 
 router = APIRouter(prefix="/scores", tags=["Scores"])
 
@@ -10,10 +12,58 @@ router = APIRouter(prefix="/scores", tags=["Scores"])
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def add_score(
         score_data: SScoreAdd,
-        current_user: UserOrm = Depends(get_current_user)
+        idempotency_key: str | None = Header(None, min_length=1, max_length=64),
+        claims: STokenClaims = Depends(get_current_claims),
+        session: AsyncSession = Depends(get_session),
 ):
+    """
+    Выставляет оценку. Idempotency-Key (или client_key в теле) делает повторы безопасными:
+    повтор с тем же ключом вернет ту же оценку, а не создаст вторую.
+    """
+    if idempotency_key is not None and score_data.client_key is None:
+        score_data = score_data.model_copy(update={"client_key": idempotency_key})
     try:
-        await EventRepository.add_score(current_user.id, score_data)
-        return {"ok": True}
+        score_id = await EventRepository.add_score(claims.user_id, score_data, role=claims.role, session=session)
+        return {"ok": True, "score_id": score_id}
     except (PermissionError, ValueError) as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+
+@router.post("/batch", response_model=SScoreBatchOut)
+async def add_scores_batch(
+        batch: SScoreBatch,
+        claims: STokenClaims = Depends(get_current_claims),
+        session: AsyncSession = Depends(get_session),
+):
+    """
+    Выставляет до 500 оценок за раз. Ошибка одной оценки не отменяет остальные:
+    results идут в порядке items, в каждом либо score_id, либо error.
+    """
+    results = await EventRepository.add_scores_batch(
+        claims.user_id, batch.items, role=claims.role, session=session
+    )
+    return _batch_response(results)
+
+
+@router.post("/sync", response_model=SScoreBatchOut)
+async def sync_scores(
+        batch: SScoreSync,
+        claims: STokenClaims = Depends(get_current_claims),
+        session: AsyncSession = Depends(get_session),
+):
+    """
+    Выгрузка очереди оценок, накопленных офлайн. У каждой оценки обязателен client_key:
+    уже записанные ключи не проверяются заново и возвращают id своей оценки, поэтому
+    очередь можно отправлять повторно, пока на все элементы не придет score_id или error.
+    """
+    results = await EventRepository.add_scores_batch(
+        claims.user_id, batch.items, role=claims.role, session=session
+    )
+    return _batch_response(results)
+
+
+def _batch_response(results: list[int | Exception]) -> dict:
+    return {
+        "accepted": sum(not isinstance(r, Exception) for r in results),
+        "results": [{"error": str(r)} if isinstance(r, Exception) else {"score_id": r} for r in results],
+    }
@@ -0,0 +1,109 @@
+import uuid
+
+from sqlalchemy import select, func, or_, and_, tuple_
+
+from db import new_session
+from db.events import EventOrm, EventActivityOrm, EventMediaOrm, EventParticipationOrm, ParticipationMemberOrm, \
+    ScoreOrm
+from db.sync import SyncChangeOrm, SyncEntity, TXID_WATERMARK
+from events.repository import public_participation_options
+from events.schemas import SEventSync, SActivityOut, SEventMedia, SParticipationOut, SScoreOut
+
+PUBLIC_ENTITIES = (SyncEntity.event, SyncEntity.activity, SyncEntity.media)
+EVENT_SCOPED_ENTITIES = (SyncEntity.participation, SyncEntity.score)
+
+ENTITY_LOADERS = {
+    SyncEntity.event: (EventOrm, SEventSync, "events", ()),
+    SyncEntity.activity: (EventActivityOrm, SActivityOut, "activities", ()),
+    SyncEntity.media: (EventMediaOrm, SEventMedia, "media", ()),
+    SyncEntity.participation: (EventParticipationOrm, SParticipationOut, "participations",
+                               public_participation_options()),
+    SyncEntity.score: (ScoreOrm, SScoreOut, "scores", ()),
+}
+
+
+async def _watermark(session) -> int | None:
+    """txid, ниже которого все транзакции завершены; None — ограничения нет (SQLite)."""
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    return await session.scalar(select(TXID_WATERMARK))
+
+
+class SyncRepository:
+    @classmethod
+    async def get_head(cls) -> tuple[int, int]:
+        """
+        Позиция (txid, id), до которой все изменения уже видны. Записи незавершенных
+        транзакций окажутся после нее, даже если их id меньше.
+        """
+        async with new_session() as session:
+            watermark = await _watermark(session)
+            if watermark is not None:
+                return watermark, 0
+            return 0, await session.scalar(select(func.max(SyncChangeOrm.id))) or 0
+
+    @classmethod
+    async def get_changes(cls, user_id: uuid.UUID, after: tuple[int, int],
+                          limit: int) -> tuple[dict, tuple[int, int], bool]:
+        """
+        Возвращает (изменения, позиция (txid, id) последней прочитанной записи, есть ли еще записи).
+        Мероприятия, активности и медиа публичны; участия и очки — только по мероприятиям,
+        в которых пользователь сейчас участвует, плюс адресованные ему удаления.
+        """
+        async with new_session() as session:
+            my_events = (
+                select(EventParticipationOrm.event_id)
+                .join(ParticipationMemberOrm)
+                .where(ParticipationMemberOrm.user_id == user_id)
+            )
+            watermark = await _watermark(session)
+            query = (
+                select(SyncChangeOrm)
+                .where(
+                    tuple_(SyncChangeOrm.txid, SyncChangeOrm.id) > tuple_(*after),
+                    or_(
+                        SyncChangeOrm.entity.in_([e.value for e in PUBLIC_ENTITIES]),
+                        and_(
+                            SyncChangeOrm.entity.in_([e.value for e in EVENT_SCOPED_ENTITIES]),
+                            SyncChangeOrm.user_id.is_(None),
+                            SyncChangeOrm.event_id.in_(my_events),
+                        ),
+                        SyncChangeOrm.user_id == user_id,
+                    ),
+                )
+                .order_by(SyncChangeOrm.txid, SyncChangeOrm.id)
+                .limit(limit + 1)
+            )
+            if watermark is not None:
+                # Записи незавершенных транзакций ждут следующего запроса
+                query = query.where(SyncChangeOrm.txid < watermark)
+            rows = (await session.execute(query)).scalars().all()
+
+            has_more = len(rows) > limit
+            settled = rows[:limit]
+
+            # Для каждой сущности важна только последняя операция
+            latest: dict[tuple[str, int], bool] = {}
+            for row in settled:
+                latest[(row.entity, row.entity_id)] = row.deleted
+
+            changes = {key: [] for _, _, key, _ in ENTITY_LOADERS.values()}
+            changes["deleted"] = []
+            for entity, (orm, schema, key, options) in ENTITY_LOADERS.items():
+                ids = [entity_id for (name, entity_id), deleted in latest.items()
+                       if name == entity.value and not deleted]
+                found = set()
+                if ids:
+                    result = await session.execute(select(orm).where(orm.id.in_(ids)).options(*options))
+                    for item in result.scalars().all():
+                        changes[key].append(schema.model_validate(item, from_attributes=True))
+                        found.add(item.id)
+                # Строка исчезла после записи в журнал (например, каскадом) — отдаем как удаление
+                changes["deleted"].extend(
+                    {"entity": entity, "id": entity_id}
+                    for (name, entity_id), deleted in latest.items()
+                    if name == entity.value and (deleted or entity_id not in found)
+                )
+
+            last = (settled[-1].txid, settled[-1].id) if settled else after
+            return changes, last, has_more
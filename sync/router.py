@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from auth.dependencies import get_current_claims
+from helpers.pagination import encode_cursor, decode_cursor
+from sync.repository import SyncRepository
+from sync.schemas import SSyncPage
+from users.schemas import STokenClaims
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+@router.get("", response_model=SSyncPage)
+async def sync_changes(
+        cursor: str | None = None,
+        limit: int = Query(500, ge=1, le=1000),
+        claims: STokenClaims = Depends(get_current_claims),
+):
+    """
+    Дельта-синхронизация. Без курсора возвращает только текущий курсор: клиент сначала
+    берет его, затем загружает данные обычными эндпоинтами и дальше запрашивает изменения.
+    Пока has_more=true, следующую страницу можно запросить сразу.
+    """
+    if cursor is None:
+        return SSyncPage(next_cursor=encode_cursor(*await SyncRepository.get_head()))
+
+    try:
+        txid, change_id = decode_cursor(cursor)
+        after = int(txid), int(change_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    changes, last, has_more = await SyncRepository.get_changes(claims.user_id, after, limit)
+    return SSyncPage(**changes, next_cursor=encode_cursor(*last), has_more=has_more)
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+
+from db.sync import SyncEntity
+from events.schemas import SEventSync, SActivityOut, SEventMedia, SParticipationOut, SScoreOut
+
+
+class STombstone(BaseModel):
+    entity: SyncEntity
+    id: int
+
+
+class SSyncPage(BaseModel):
+    """
+    Изменения с момента курсора. Удаление мероприятия подразумевает удаление его активностей,
+    медиа, участий и очков; удаление активности или участия — удаление связанных очков.
+    """
+    events: list[SEventSync] = []
+    activities: list[SActivityOut] = []
+    media: list[SEventMedia] = []
+    participations: list[SParticipationOut] = []
+    scores: list[SScoreOut] = []
+    deleted: list[STombstone] = []
+    next_cursor: str
+    has_more: bool = False
@@ -1,15 +1,29 @@
 import asyncio
-import pytest_asyncio
-from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-
-from main import app
-from db import Model, new_session
+import datetime
+import os
+import tempfile
+import uuid
 
 # --- Тестовая база данных ---
-TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
-engine = create_async_engine(TEST_DB_URL)
-TestingSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+# DB_URL задается до импорта приложения: db.engine и new_session создаются при импорте,
+# и все — эндпоинты, репозитории и сами тесты — работают с одной тестовой базой.
+TEST_DB_PATH = os.path.join(tempfile.gettempdir(), f"test_{os.getpid()}.db")
+if os.path.exists(TEST_DB_PATH):
+    os.remove(TEST_DB_PATH)
+os.environ["DB_URL"] = os.getenv("TEST_DB_URL", f"sqlite+aiosqlite:///{TEST_DB_PATH}")
+
+import pytest_asyncio  # noqa: E402
+from httpx import AsyncClient, ASGITransport  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from main import app  # noqa: E402
+from db import Model, engine, new_session  # noqa: E402
+from db.users import UserOrm, RoleEnum  # noqa: E402
+from auth.principal_cache import principal_cache  # noqa: E402
+from events.admission import admission  # noqa: E402
+from events.cache import event_detail_cache, event_judges_cache  # noqa: E402
+from helpers.singleflight import flights  # noqa: E402
+from ratelimit.limiter import default_backend  # noqa: E402
 
 
 @pytest_asyncio.fixture(scope="session")
@@ -24,17 +38,20 @@ async def setup_database():
     """Создает таблицы перед каждым тестом и удаляет их после."""
     async with engine.begin() as conn:
         await conn.run_sync(Model.metadata.create_all)
+    default_backend.reset()
+    principal_cache.clear()
+    event_detail_cache.clear()
+    event_judges_cache.clear()
+    flights.clear()
+    admission.reset()
     yield
     async with engine.begin() as conn:
         await conn.run_sync(Model.metadata.drop_all)
 
 
-async def override_get_session() -> AsyncSession:
-    async with TestingSessionLocal() as session:
-        yield session
-
-
-app.dependency_overrides[new_session] = override_get_session
+def pytest_sessionfinish(session, exitstatus):
+    if os.path.exists(TEST_DB_PATH):
+        os.remove(TEST_DB_PATH)
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -42,3 +59,27 @@ async def client() -> AsyncClient:
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
+
+
+@pytest_asyncio.fixture(scope="function")
+async def create_users():
+    """
+    Фабрика пользователей: await create_users(count, role) вставляет count пользователей одним запросом
+    и возвращает их id. Хэндлы нумеруются по роли с нуля в пределах теста: us00000000, us00000001, ...
+    """
+    created: dict[RoleEnum, int] = {}
+
+    async def create(count: int, role: RoleEnum = RoleEnum.user) -> list[uuid.UUID]:
+        start = created.get(role, 0)
+        created[role] = start + count
+        ids = [uuid.uuid4() for _ in range(count)]
+        async with new_session() as session:
+            await session.execute(insert(UserOrm), [{
+                "id": user_id, "handle": f"{role.value[:2]}{i:08d}", "email": f"{role.value}{i}@example.com",
+                "hashed_password": "-", "full_name": "Test", "phone": f"+7900{role.value[:2]}{i:05d}",
+                "birthday": datetime.date(2000, 1, 1), "gender": "male", "role": role,
+            } for i, user_id in enumerate(ids, start)])
+            await session.commit()
+        return ids
+
+    return create
@@ -0,0 +1,99 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from db import new_session
+from db.events import EventParticipationOrm, EventWaitlistOrm
+from events import repository
+from events.admission import admission
+from events.exceptions import EventFullError
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SParticipationCreate, SWaitlistPosition, SAdmissionRequest
+
+pytestmark = pytest.mark.asyncio
+
+INDIVIDUAL = SParticipationCreate(participant_type="individual")
+
+
+async def create_event(seats: int) -> int:
+    return await EventRepository.add_one(SEventAdd(
+        title="Hot", date=datetime.date.today(), is_team=False, max_members=seats,
+    ))
+
+
+async def test_burst_is_batched_and_capped(create_users):
+    event_id = await create_event(10)
+    users = await create_users(50)
+    batches = admission.batches
+
+    results = await asyncio.gather(
+        *(admission.submit(event_id, user_id, INDIVIDUAL) for user_id in users), return_exceptions=True
+    )
+
+    assert sum(isinstance(r, EventParticipationOrm) for r in results) == 10
+    assert sum(isinstance(r, EventFullError) for r in results) == 40
+    assert admission.batches - batches < 50
+
+
+async def test_waitlist_is_promoted_when_slot_frees(create_users):
+    event_id = await create_event(1)
+    first, second, third = await create_users(3)
+
+    participation = await admission.submit(event_id, first, INDIVIDUAL)
+    assert await admission.submit(event_id, second, INDIVIDUAL, waitlist=True) == SWaitlistPosition(
+        waitlist_position=1)
+    with pytest.raises(EventFullError):
+        await admission.submit(event_id, third, INDIVIDUAL)
+
+    await EventRepository.delete_participation(participation.id, first)
+
+    async with new_session() as session:
+        creators = (await session.scalars(
+            select(EventParticipationOrm.creator_id).where(EventParticipationOrm.event_id == event_id))).all()
+    assert creators == [second]
+    assert not await EventRepository.leave_waitlist(event_id, second)
+
+
+async def test_conflicting_request_fails_alone(create_users, monkeypatch):
+    event_id = await create_event(1)
+    first, racer, last = await create_users(3)
+    admit_one = repository.admit_one
+
+    async def racing_admit_one(session, event, request, waiting):
+        if request.user_id == racer:
+            # Та же заявка, принятая другим воркером после чтения листа ожидания
+            session.add(EventWaitlistOrm(event_id=event.id, user_id=racer,
+                                         participant_type=request.data.participant_type))
+        return await admit_one(session, event, request, waiting)
+
+    monkeypatch.setattr(repository, "admit_one", racing_admit_one)
+    results = await EventRepository.admit_batch(event_id, [
+        SAdmissionRequest(user_id=user_id, data=INDIVIDUAL, waitlist=True) for user_id in (first, racer, last)
+    ])
+
+    assert isinstance(results[0], EventParticipationOrm)
+    assert isinstance(results[1], ValueError)
+    assert results[2] == SWaitlistPosition(waitlist_position=1)
+    async with new_session() as session:
+        waitlisted = (await session.scalars(select(EventWaitlistOrm.user_id))).all()
+    assert waitlisted == [last]
+
+
+async def test_failed_batch_is_retried_per_request(create_users, monkeypatch):
+    event_id = await create_event(5)
+    users = await create_users(3)
+    admit_batch = EventRepository.admit_batch
+
+    async def failing_admit_batch(event_id, requests):
+        if any(request.user_id == users[1] for request in requests):
+            raise RuntimeError("broken request")
+        return await admit_batch(event_id, requests)
+
+    monkeypatch.setattr(EventRepository, "admit_batch", failing_admit_batch)
+    results = await asyncio.gather(
+        *(admission.submit(event_id, user_id, INDIVIDUAL) for user_id in users), return_exceptions=True
+    )
+    assert isinstance(results[0], EventParticipationOrm) and isinstance(results[2], EventParticipationOrm)
+    assert isinstance(results[1], RuntimeError)
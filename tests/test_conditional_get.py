@@ -0,0 +1,103 @@
+import datetime
+
+import pytest
+
+from activities.repository import ActivityRepository
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SActivityAdd, SEventUpdate, SJudgeAdd, SParticipationCreate
+from db import new_session
+from helpers.conditional import ResourceVersions, etag_matches
+from users.repository import UserRepository
+from users.schemas import SUserUpdate
+
+async def create_event() -> int:
+    return await EventRepository.add_one(SEventAdd(
+        title="Conditional", date=datetime.date.today(), is_team=False, max_members=5,
+    ))
+
+
+def test_etag_matching():
+    assert etag_matches('W/"a-1"', 'W/"a-1"')
+    assert etag_matches('"x", "a-1"', 'W/"a-1"')
+    assert etag_matches("*", 'W/"a-1"')
+    assert not etag_matches('W/"a-2"', 'W/"a-1"')
+    assert not etag_matches(None, 'W/"a-1"')
+
+
+@pytest.mark.asyncio
+async def test_event_detail_not_modified_until_write(client):
+    event_id = await create_event()
+
+    first = await client.get(f"/api/events/{event_id}")
+    etag = first.headers["ETag"]
+    second = await client.get(f"/api/events/{event_id}", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.content == b""
+
+    await EventRepository.edit(event_id, SEventUpdate(title="Renamed"))
+    third = await client.get(f"/api/events/{event_id}", headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.json()["title"] == "Renamed"
+    assert third.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_activities_list_not_modified_until_write(client):
+    event_id = await create_event()
+
+    etag = (await client.get(f"/api/events/{event_id}/activities")).headers["ETag"]
+    cached = await client.get(f"/api/events/{event_id}/activities", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    await ActivityRepository.add_one(event_id, SActivityAdd(name="Quiz", is_scoreable=True, max_score=10))
+    fresh = await client.get(f"/api/events/{event_id}/activities", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert [a["name"] for a in fresh.json()] == ["Quiz"]
+
+
+@pytest.mark.asyncio
+async def test_event_list_etag_changes_on_new_event(client):
+    etag = (await client.get("/api/events")).headers["ETag"]
+    assert (await client.get("/api/events", headers={"If-None-Match": etag})).status_code == 304
+
+    await create_event()
+    assert (await client.get("/api/events", headers={"If-None-Match": etag})).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_validators_are_shared_between_workers(client):
+    event_id = await create_event()
+    url = f"/api/events/{event_id}/activities"
+    etag = (await client.get(url)).headers["ETag"]
+
+    # Запись на другом воркере: его счетчики в памяти этому процессу не видны
+    other_worker = ResourceVersions()
+    async with new_session() as session:
+        other_worker.bump(session, f"activities:{event_id}")
+        await session.rollback()
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+    async with new_session() as session:
+        other_worker.bump(session, f"activities:{event_id}")
+        await session.commit()
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_profile_update_changes_etags_only_of_own_events(client, create_users):
+    mine, other = await create_event(), await create_event()
+    user_id, judge_id = await create_users(2)
+    await EventRepository.add_participation(mine, user_id, SParticipationCreate(participant_type="individual"))
+    await EventRepository.add_judge_to_event(mine, SJudgeAdd(handle="us00000001"))
+    urls = [f"/api/events/{mine}/participations", f"/api/events/{mine}/judges", f"/api/events/{other}/participations"]
+    etags = [(await client.get(url)).headers["ETag"] for url in urls]
+
+    await UserRepository.update_user(user_id, SUserUpdate(height_cm=180))
+    assert [(await client.get(url, headers={"If-None-Match": etag})).status_code
+            for url, etag in zip(urls, etags)] == [304, 304, 304]
+
+    await UserRepository.update_user(user_id, SUserUpdate(full_name="Renamed"))
+    await UserRepository.update_user(judge_id, SUserUpdate(full_name="Renamed judge"))
+    assert [(await client.get(url, headers={"If-None-Match": etag})).status_code
+            for url, etag in zip(urls, etags)] == [200, 200, 304]
@@ -0,0 +1,113 @@
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import insert
+
+from activities.repository import ActivityRepository
+from db import new_session
+from db.events import EventOrm, EventJudgeOrm
+from db.users import UserOrm
+from events.cache import event_detail_cache, event_judges_cache
+from events.repository import EventRepository
+from events.schemas import SEventMediaAdd, SActivityAdd, SActivityUpdate, SJudgeAdd, SParticipationCreate, SEventUpdate
+from helpers.conditional import ResourceVersions
+
+pytestmark = pytest.mark.asyncio
+
+
+async def create_event() -> int:
+    async with new_session() as session:
+        event = EventOrm(title="Cached", date=datetime.date.today(), is_team=False, max_members=5)
+        session.add(event)
+        await session.commit()
+        return event.id
+
+
+async def test_event_detail_is_served_from_cache(client):
+    event_id = await create_event()
+
+    first = await client.get(f"/api/events/{event_id}")
+    hits = event_detail_cache.hits
+    second = await client.get(f"/api/events/{event_id}")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert event_detail_cache.hits == hits + 1
+    assert second.json()["state"] in ("future", "current", "past")
+    assert second.json()["is_current_user_judge"] is False
+
+
+async def test_writers_invalidate_event_detail(client):
+    event_id = await create_event()
+    await client.get(f"/api/events/{event_id}")
+
+    await EventRepository.add_media(event_id, SEventMediaAdd(url="/new.png"))
+    body = (await client.get(f"/api/events/{event_id}")).json()
+    assert [m["url"] for m in body["media"]] == ["/new.png"]
+
+    activity_id = await ActivityRepository.add_one(event_id, SActivityAdd(name="Quiz", is_scoreable=True,
+                                                                            max_score=10))
+    await client.get(f"/api/events/{event_id}")
+    await ActivityRepository.edit_one(activity_id, SActivityUpdate(name="Final quiz"))
+    body = (await client.get(f"/api/events/{event_id}")).json()
+    assert [a["name"] for a in body["activities"]] == ["Final quiz"]
+
+    await ActivityRepository.delete_one(activity_id)
+    body = (await client.get(f"/api/events/{event_id}")).json()
+    assert body["activities"] == []
+
+
+async def test_load_racing_an_edit_is_not_served_from_cache(client, monkeypatch):
+    event_id = await create_event()
+    get_by_id = EventRepository.get_by_id
+
+    async def edited_during_load(*args, **kwargs):
+        event = await get_by_id(*args, **kwargs)
+        monkeypatch.setattr(EventRepository, "get_by_id", get_by_id)
+        await EventRepository.edit(event_id, SEventUpdate(title="Edited"))
+        return event
+
+    monkeypatch.setattr(EventRepository, "get_by_id", edited_during_load)
+    assert (await client.get(f"/api/events/{event_id}")).json()["title"] == "Cached"
+    assert (await client.get(f"/api/events/{event_id}")).json()["title"] == "Edited"
+
+
+async def test_judge_checks_use_cached_set_until_judges_change():
+    event_id = await create_event()
+    user_id = uuid.uuid4()
+    async with new_session() as session:
+        await session.execute(insert(UserOrm).values(
+            id=user_id, handle="judge01", email="judge@cache.com", hashed_password="-", full_name="Judge",
+            phone="+79070000001", birthday=datetime.date(2000, 1, 1), gender="male",
+        ))
+        await session.commit()
+
+    assert not await EventRepository.is_user_judge_for_event(event_id, user_id)
+    hits = event_judges_cache.hits
+    assert not await EventRepository.is_user_judge_for_event(event_id, user_id)
+    assert event_judges_cache.hits == hits + 1
+
+    await EventRepository.add_judge_to_event(event_id, SJudgeAdd(handle="judge01"))
+    assert await EventRepository.is_user_judge_for_event(event_id, user_id)
+    with pytest.raises(ValueError):
+        await EventRepository.add_participation(event_id, user_id, SParticipationCreate(participant_type="individual"))
+
+
+async def test_judge_added_on_another_worker_is_seen():
+    event_id = await create_event()
+    user_id = uuid.uuid4()
+    async with new_session() as session:
+        await session.execute(insert(UserOrm).values(
+            id=user_id, handle="judge02", email="judge2@cache.com", hashed_password="-", full_name="Judge",
+            phone="+79070000002", birthday=datetime.date(2000, 1, 1), gender="male",
+        ))
+        await session.commit()
+    assert not await EventRepository.is_user_judge_for_event(event_id, user_id)
+
+    # Другой воркер добавляет судью: его on_commit до кэша этого процесса не доходит
+    async with new_session() as session:
+        session.add(EventJudgeOrm(event_id=event_id, user_id=user_id))
+        ResourceVersions().bump(session, f"judges:{event_id}")
+        await session.commit()
+    assert await EventRepository.is_user_judge_for_event(event_id, user_id)
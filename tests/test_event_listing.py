@@ -0,0 +1,104 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from db import new_session
+from db.events import EventOrm, EventMediaOrm, MediaEnum
+from events.repository import EventRepository
+from events.schemas import SEventUpdate
+from helpers.pagination import encode_cursor
+
+pytestmark = pytest.mark.asyncio
+
+
+async def create_events(*events: EventOrm) -> None:
+    async with new_session() as session:
+        session.add_all(events)
+        await session.commit()
+
+
+async def test_events_are_paginated_by_cursor(client):
+    today = datetime.date.today()
+    await create_events(*[
+        EventOrm(title=f"Event {i}", date=today + datetime.timedelta(days=i % 3), is_team=False, max_members=5)
+        for i in range(5)
+    ])
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get("/api/events", params=params)
+        assert resp.status_code == 200
+        page = resp.json()
+        assert len(page["items"]) <= 2
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert len({e["id"] for e in seen}) == 5
+    assert [e["date"] for e in seen] == sorted(e["date"] for e in seen)
+
+
+async def test_events_are_filtered_in_sql(client):
+    today = datetime.date.today()
+    await create_events(
+        EventOrm(title="Past", date=today - datetime.timedelta(days=3), is_team=False, max_members=5),
+        EventOrm(title="Current", date=today, is_team=True, max_members=4, max_teams=2),
+        EventOrm(title="Future", date=today + datetime.timedelta(days=3), is_team=False, max_members=5),
+    )
+
+    resp = await client.get("/api/events", params={"state": "current"})
+    assert [e["title"] for e in resp.json()["items"]] == ["Current"]
+
+    resp = await client.get("/api/events", params={"is_team": False, "date_from": today.isoformat()})
+    assert [e["title"] for e in resp.json()["items"]] == ["Future"]
+
+    for cursor in ("not-a-cursor", encode_cursor("2025-01-01", "x"), encode_cursor("2025-01-01", None)):
+        resp = await client.get("/api/events", params={"cursor": cursor})
+        assert resp.status_code == 400
+
+
+async def test_card_preview_is_first_image(client):
+    event = EventOrm(title="Gallery", date=datetime.date.today(), is_team=False, max_members=5)
+    event.media = [
+        EventMediaOrm(url="/doc.pdf", media_type=MediaEnum.document, name="Rules", order=0),
+        EventMediaOrm(url="/second.png", media_type=MediaEnum.image, order=1),
+        EventMediaOrm(url="/preview.png", media_type=MediaEnum.image, order=0),
+    ]
+    await create_events(event, EventOrm(title="Empty", date=datetime.date.today(), is_team=False, max_members=5))
+
+    cards = {e["title"]: e for e in (await client.get("/api/events")).json()["items"]}
+    assert cards["Gallery"]["preview_url"] == "/preview.png"
+    assert cards["Empty"]["preview_url"] is None
+
+
+async def test_state_clause_matches_state_property():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    hour = datetime.timedelta(hours=1)
+    times = [None, (now - hour).time(), (now + hour).time()]
+    dates = [now.date() - datetime.timedelta(days=1), now.date(), now.date() + datetime.timedelta(days=1)]
+    await create_events(*[
+        EventOrm(title="Case", date=d, start_time=s, end_time=e, is_team=False, max_members=1)
+        for d in dates for s in times for e in times
+    ])
+
+    async with new_session() as session:
+        events = (await session.execute(select(EventOrm))).scalars().all()
+        for state in ("past", "current", "future"):
+            rows = await session.scalars(select(EventOrm.id).where(EventOrm.state_clause(state, now)))
+            assert set(rows) == {e.id for e in events if e.state == state}, state
+
+
+async def test_edit_keeps_event_period_in_sync(client):
+    event = EventOrm(title="Moved", date=datetime.date.today() + datetime.timedelta(days=5),
+                     is_team=False, max_members=5)
+    await create_events(event)
+    assert (await client.get("/api/events", params={"state": "future"})).json()["items"]
+
+    await EventRepository.edit(event.id, SEventUpdate(date=datetime.date.today() - datetime.timedelta(days=5)))
+
+    assert not (await client.get("/api/events", params={"state": "future"})).json()["items"]
+    past = (await client.get("/api/events", params={"state": "past"})).json()["items"]
+    assert [e["id"] for e in past] == [event.id]
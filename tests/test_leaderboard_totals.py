@@ -0,0 +1,47 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from db import new_session
+from db.events import ParticipationTotalOrm
+from db.users import RoleEnum
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SParticipationCreate, SScoreAdd
+from events.totals import rebuild_totals
+
+pytestmark = pytest.mark.asyncio
+
+
+async def totals(event_id: int) -> dict[int, int]:
+    async with new_session() as session:
+        rows = await session.execute(
+            select(ParticipationTotalOrm.participation_id, ParticipationTotalOrm.total_score)
+            .where(ParticipationTotalOrm.event_id == event_id)
+        )
+        return dict(rows.all())
+
+
+async def test_scores_update_totals_and_leaderboard_order(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Finals", date=datetime.date.today(), is_team=False, max_members=10,
+    ))
+    (admin,) = await create_users(1, RoleEnum.admin)
+    first, second, idle = await create_users(3)
+    p_first, p_second, p_idle = [
+        await EventRepository.add_participation(event_id, user_id, SParticipationCreate(participant_type="individual"))
+        for user_id in (first, second, idle)
+    ]
+
+    await EventRepository.add_score(admin, SScoreAdd(participation_id=p_first.id, score=5))
+    await EventRepository.add_score(admin, SScoreAdd(participation_id=p_second.id, score=7))
+    await EventRepository.add_score(admin, SScoreAdd(participation_id=p_first.id, score=4))
+
+    leaderboard = await EventRepository.get_leaderboard(event_id)
+    assert [(p.id, total) for p, total in leaderboard] == [(p_first.id, 9), (p_second.id, 7), (p_idle.id, 0)]
+
+    before = await totals(event_id)
+    async with new_session() as session:
+        await rebuild_totals(session, event_id)
+        await session.commit()
+    assert await totals(event_id) == before
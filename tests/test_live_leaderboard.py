@@ -0,0 +1,181 @@
+import asyncio
+import datetime
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from db.users import RoleEnum
+from events.live import LeaderboardHub, PgNotifyBridge, leaderboard_hub, leaderboard_diff
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SParticipationCreate, SScoreAdd
+
+
+def parse(frame: str) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+@pytest.mark.asyncio
+async def test_watchers_get_snapshot_then_one_shared_diff_per_change(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Live", date=datetime.date.today(), is_team=False, max_members=10,
+    ))
+    (admin,) = await create_users(1, RoleEnum.admin)
+    first, second = await create_users(2)
+    p_first = await EventRepository.add_participation(
+        event_id, first, SParticipationCreate(participant_type="individual"))
+    p_second = await EventRepository.add_participation(
+        event_id, second, SParticipationCreate(participant_type="individual"))
+
+    streams = [leaderboard_hub.stream(event_id) for _ in range(50)]
+    try:
+        snapshots = [parse(await anext(stream)) for stream in streams]
+        assert {kind for kind, _ in snapshots} == {"snapshot"}
+        assert [e["participation"]["id"] for e in snapshots[0][1]["entries"]] == [p_second.id, p_first.id]
+
+        recomputes = leaderboard_hub.recomputes
+        await EventRepository.add_score(admin, SScoreAdd(participation_id=p_first.id, score=3))
+        frames = [parse(await asyncio.wait_for(anext(stream), 5)) for stream in streams]
+
+        assert leaderboard_hub.recomputes == recomputes + 1
+        kind, diff = frames[0]
+        assert kind == "diff"
+        assert all(frame == frames[0] for frame in frames)
+        assert {(r["participation_id"], r["rank"], r["total_score"]) for r in diff["ranks"]} == {
+            (p_first.id, 1, 3), (p_second.id, 2, 0),
+        }
+        assert diff["upserts"] == [] and diff["removed"] == []
+    finally:
+        for stream in streams:
+            await stream.aclose()
+    assert leaderboard_hub.stats()["subscribers"] == 0
+
+
+
+@pytest.mark.asyncio
+async def test_stream_of_missing_event_is_404(client, monkeypatch):
+    async def no_full_load(*args, **kwargs):
+        raise AssertionError("the stream only needs to know that the event exists")
+
+    monkeypatch.setattr(EventRepository, "get_by_id", no_full_load)
+    assert (await client.get("/api/events/999/leaderboard/stream")).status_code == 404
+
+def test_diff_reports_new_changed_and_removed_participations():
+    team = {"id": 1, "team_name": "A"}
+    old = {
+        1: {"rank": 1, "total_score": 5, "participation": team},
+        2: {"rank": 2, "total_score": 1, "participation": {"id": 2}},
+    }
+    new = {
+        1: {"rank": 2, "total_score": 5, "participation": team},
+        3: {"rank": 1, "total_score": 9, "participation": {"id": 3}},
+    }
+    assert leaderboard_diff(old, new) == {
+        "ranks": [{"participation_id": 1, "rank": 2, "total_score": 5}],
+        "upserts": [new[3]],
+        "removed": [2],
+    }
+    assert leaderboard_diff(new, new) is None
+
+
+class FakeListener:
+    """Соединение asyncpg в той мере, в какой его использует PgNotifyBridge."""
+
+    def __init__(self):
+        self.healthy = True
+        self._terminated = []
+
+    def add_termination_listener(self, callback):
+        self._terminated.append(callback)
+
+    def remove_termination_listener(self, callback):
+        self._terminated.remove(callback)
+
+    async def add_listener(self, channel, callback):
+        pass
+
+    async def remove_listener(self, channel, callback):
+        pass
+
+    async def execute(self, query):
+        if not self.healthy:
+            raise ConnectionError("connection is gone")
+
+    def terminate(self):
+        for callback in list(self._terminated):
+            callback(self)
+
+
+class FakeEngine:
+    def __init__(self):
+        self.listeners: list[FakeListener] = []
+        self.failures = 0
+
+    async def connect(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection refused")
+        listener = FakeListener()
+        self.listeners.append(listener)
+
+        async def get_raw_connection():
+            return SimpleNamespace(driver_connection=listener)
+
+        async def noop():
+            pass
+
+        return SimpleNamespace(get_raw_connection=get_raw_connection, close=noop, invalidate=noop)
+
+
+async def eventually(condition, timeout: float = 2):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_bridge_reconnects_with_backoff_and_resyncs_watchers(monkeypatch):
+    hub = LeaderboardHub(queue_size=4, heartbeat=0.05)
+    resyncs = []
+    monkeypatch.setattr(hub, "refresh_all", lambda: resyncs.append(True))
+    engine = FakeEngine()
+    bridge = PgNotifyBridge(hub, engine, notify_delay=0.01, reconnect_max=0.02)
+    await bridge.start()
+    try:
+        # Соединение закрыто сервером, и первые две попытки переподключения неудачны
+        engine.failures = 2
+        engine.listeners[0].terminate()
+        await eventually(lambda: len(engine.listeners) == 2)
+        assert bridge.reconnects == 1 and resyncs == [True]
+
+        # Полуоткрытое соединение: его выдает проверка раз в heartbeat
+        engine.listeners[1].healthy = False
+        await eventually(lambda: len(engine.listeners) == 3)
+        assert bridge.stats() == {"connected": True, "notifies": 0, "reconnects": 2}
+    finally:
+        await bridge.stop()
+
+
+@pytest.mark.asyncio
+async def test_bridge_coalesces_notifications(monkeypatch):
+    hub = LeaderboardHub(queue_size=4, heartbeat=15)
+    bridge = PgNotifyBridge(hub, FakeEngine(), notify_delay=0.02)
+    sent = []
+
+    async def send(event_ids):
+        sent.append(event_ids)
+
+    monkeypatch.setattr(bridge, "_send", send)
+    for event_id in (3, 1, 3, 2):
+        bridge.notify(event_id)
+    await eventually(lambda: sent)
+    assert sent == [[1, 2, 3]]
+
+    refreshed = []
+    monkeypatch.setattr(hub, "refresh", refreshed.append)
+    bridge._on_notify(None, 1, "leaderboard_changed", "other:1,2,3")
+    bridge._on_notify(None, 1, "leaderboard_changed", f"{bridge.worker_id}:4")
+    assert refreshed == [1, 2, 3]
@@ -0,0 +1,52 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import select, func
+
+from db import new_session
+from db.events import EventOrm, EventParticipationOrm
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SParticipationCreate
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_registrations_do_not_overbook(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Capacity", date=datetime.date.today(), is_team=False, max_members=100,
+    ))
+    users = await create_users(200)
+
+    async def register(user_id):
+        try:
+            await EventRepository.add_participation(
+                event_id, user_id, SParticipationCreate(participant_type="individual"))
+            return True
+        except ValueError:
+            return False
+
+    results = await asyncio.gather(*(register(user_id) for user_id in users))
+
+    assert results.count(True) == 100
+    async with new_session() as session:
+        rows = await session.scalar(
+            select(func.count()).select_from(EventParticipationOrm).where(EventParticipationOrm.event_id == event_id))
+        event = await session.get(EventOrm, event_id)
+    assert rows == 100
+    assert event.individuals_count == 100
+    assert event.version == 1
+
+
+async def test_leaving_frees_a_slot(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Small", date=datetime.date.today(), is_team=False, max_members=1,
+    ))
+    first, second = await create_users(2)
+    participation = await EventRepository.add_participation(
+        event_id, first, SParticipationCreate(participant_type="individual"))
+    with pytest.raises(ValueError):
+        await EventRepository.add_participation(event_id, second, SParticipationCreate(participant_type="individual"))
+
+    await EventRepository.delete_participation(participation.id, first)
+    await EventRepository.add_participation(event_id, second, SParticipationCreate(participant_type="individual"))
@@ -0,0 +1,90 @@
+import datetime
+
+import pytest
+from sqlalchemy.orm.attributes import instance_state
+
+from db.events import ParticipantTypeEnum
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SParticipationCreate
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_event_participations_are_paginated_by_cursor(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Big", date=datetime.date.today(), is_team=False, max_members=100,
+    ))
+    users = await create_users(7)
+    for user_id in users:
+        await EventRepository.add_participation(
+            event_id, user_id, SParticipationCreate(participant_type="individual"))
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await EventRepository.get_participations_for_event(event_id, cursor=cursor, limit=3)
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 7
+    assert [p.id for p in seen] == sorted(p.id for p in seen)
+    assert {p.creator_id for p in seen} == set(users)
+
+
+async def test_listing_loads_only_public_user_columns(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Private", date=datetime.date.today(), is_team=False, max_members=10,
+    ))
+    (user_id,) = await create_users(1)
+    await EventRepository.add_participation(event_id, user_id, SParticipationCreate(participant_type="individual"))
+
+    (participation,), _ = await EventRepository.get_participations_for_event(event_id)
+    user = participation.members[0].user
+    assert user.handle == "us00000000"
+    assert {"hashed_password", "phone", "email"} <= instance_state(user).unloaded
+
+
+async def test_open_slots_filter_skips_full_teams(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Teams", date=datetime.date.today(), is_team=True, max_teams=2, max_members=2,
+    ))
+    full_captain, member, open_captain = await create_users(3)
+    full = await EventRepository.add_participation(
+        event_id, full_captain, SParticipationCreate(participant_type="team", team_name="Full"))
+    await EventRepository.add_member_to_participation(full.id, member)
+    open_team = await EventRepository.add_participation(
+        event_id, open_captain, SParticipationCreate(participant_type="team", team_name="Open"))
+
+    page, _ = await EventRepository.get_participations_for_event(event_id, open_slots=True)
+    assert [p.id for p in page] == [open_team.id]
+
+    page, _ = await EventRepository.get_participations_for_event(
+        event_id, participant_type=ParticipantTypeEnum.individual)
+    assert page == []
+
+
+async def test_open_teams_sorted_by_free_slots_and_member_count_maintained(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Looking for members", date=datetime.date.today(), is_team=True, max_teams=3, max_members=3,
+    ))
+    a_captain, b_captain, c_captain, *members = await create_users(6)
+    team_a = await EventRepository.add_participation(
+        event_id, a_captain, SParticipationCreate(participant_type="team", team_name="A"))
+    team_b = await EventRepository.add_participation(
+        event_id, b_captain, SParticipationCreate(participant_type="team", team_name="B"))
+    team_c = await EventRepository.add_participation(
+        event_id, c_captain, SParticipationCreate(participant_type="team", team_name="C"))
+    await EventRepository.add_member_to_participation(team_a.id, members[0])
+    await EventRepository.add_member_to_participation(team_a.id, members[1])
+    await EventRepository.add_member_to_participation(team_b.id, members[2])
+
+    items, _ = await EventRepository.get_open_teams(event_id)
+    assert [(t["id"], t["free_slots"]) for t in items] == [(team_c.id, 2), (team_b.id, 1)]
+
+    await EventRepository.remove_member_from_participation(team_a.id, members[1], members[1])
+    first, cursor = await EventRepository.get_open_teams(event_id, limit=2)
+    second, cursor = await EventRepository.get_open_teams(event_id, cursor=cursor, limit=2)
+    assert [t["id"] for t in first + second] == [team_c.id, team_a.id, team_b.id]
+    assert cursor is None
+
+    assert await EventRepository.get_open_teams(987654) is None
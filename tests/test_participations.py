@@ -57,7 +57,7 @@ async def test_create_and_join_team(client):
     # 4. Проверяем, что в команде теперь два человека
     response = await client.get(f"/api/events/{event_id}/participations")
     assert response.status_code == 200
-    participations = response.json()
+    participations = response.json()["items"]
     assert len(participations) == 1
     assert len(participations[0]["members"]) == 2
 
@@ -89,4 +89,4 @@ async def test_leave_team(client):
 
     # 3. Проверяем, что в команде остался один человек (капитан)
     response = await client.get(f"/api/events/{event_id}/participations")
-    assert len(response.json()[0]["members"]) == 1
+    assert len(response.json()["items"][0]["members"]) == 1
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from auth.exceptions import PasswordHasherBusyError
+from auth.hashing import PasswordHasher
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_hash_and_verify_in_pool():
+    hasher = PasswordHasher("thread", max_workers=2)
+    try:
+        hashed = await hasher.hash("password123")
+        assert await hasher.verify("password123", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        assert hasher.stats()["completed"] == 3
+    finally:
+        hasher.shutdown()
+
+
+async def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher("thread", max_workers=1, max_pending=1)
+    try:
+        first = asyncio.create_task(hasher.hash("password123"))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusyError):
+            await hasher.hash("password123")
+        await first
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,62 @@
+import pytest
+
+from auth.principal_cache import principal_cache
+from helpers.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" становится самым старым
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_size=10, ttl_seconds=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_profile_update_invalidates_principal(client):
+    user = {"full_name": "Cached User", "email": "cached@example.com", "phone": "+79005550001",
+            "password": "password123", "birthday": "2000-01-01", "gender": "male"}
+    await client.post("/api/auth/register", json=user)
+    login = await client.post("/api/auth/login",
+                              json={"login_identifier": user["email"], "password": user["password"]})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    me = await client.get("/api/users/me", headers=headers)
+    assert me.json()["full_name"] == "Cached User"
+    hits_before = principal_cache.hits
+    await client.get("/api/users/me", headers=headers)
+    assert principal_cache.hits == hits_before + 1
+
+    await client.patch("/api/users/me", json={"full_name": "Renamed User"}, headers=headers)
+    me = await client.get("/api/users/me", headers=headers)
+    assert me.json()["full_name"] == "Renamed User"
+
+
+@pytest.mark.asyncio
+async def test_failed_request_does_not_break_cached_principal(client):
+    user = {"full_name": "Rolled Back", "email": "rollback@example.com", "phone": "+79005550002",
+            "password": "password123", "birthday": "2000-01-01", "gender": "male"}
+    await client.post("/api/auth/register", json=user)
+    login = await client.post("/api/auth/login",
+                              json={"login_identifier": user["email"], "password": user["password"]})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Запрос загружает пользователя в кэш и падает с откатом сессии запроса
+    failed = await client.post("/api/participations/999/join", headers=headers)
+    assert failed.status_code == 400
+
+    me = await client.get("/api/users/me", headers=headers)
+    assert me.status_code == 200
+    assert me.json()["full_name"] == "Rolled Back"
@@ -0,0 +1,76 @@
+import ipaddress
+import json
+
+import pytest
+from fastapi import Request
+
+from ratelimit import limiter
+from ratelimit.backends import InMemoryBackend, DatabaseBackend
+from ratelimit.limiter import client_ip, stats
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_in_memory_bucket_rejects_when_empty():
+    backend = InMemoryBackend()
+    assert await backend.take("k", capacity=2, rate=1) == 0
+    assert await backend.take("k", capacity=2, rate=1) == 0
+    retry_after = await backend.take("k", capacity=2, rate=1)
+    assert 0 < retry_after <= 1
+    assert await backend.take("other", capacity=2, rate=1) == 0
+
+
+async def test_database_bucket_is_shared():
+    first, second = DatabaseBackend(), DatabaseBackend()
+    assert await first.take("shared", capacity=1, rate=0.01) == 0
+    assert await second.take("shared", capacity=1, rate=0.01) > 0
+
+
+async def test_login_is_limited_per_identifier(client):
+    payload = {"login_identifier": "victim@example.com", "password": "wrong-password"}
+    for _ in range(10):
+        resp = await client.post("/api/auth/login", json=payload)
+        assert resp.status_code == 401
+
+    resp = await client.post("/api/auth/login", json=payload)
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    assert stats()["login_identifier"]["rejected"] >= 1
+
+    # Другой логин с того же адреса еще проходит
+    resp = await client.post("/api/auth/login", json={**payload, "login_identifier": "other@example.com"})
+    assert resp.status_code == 401
+
+
+def request_from(peer: str, forwarded: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+async def test_forwarded_for_is_honored_only_from_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(limiter, "_trusted_networks", [ipaddress.ip_network("10.0.0.0/8")])
+
+    assert await client_ip(request_from("203.0.113.7", "1.2.3.4")) == "203.0.113.7"
+    assert await client_ip(request_from("10.0.0.2")) == "10.0.0.2"
+    # Клиент подставил 1.2.3.4 сам; прокси дописали реальный адрес и свой
+    assert await client_ip(request_from("10.0.0.2", "1.2.3.4, 198.51.100.9, 10.0.0.1")) == "198.51.100.9"
+    assert await client_ip(request_from("10.0.0.2", "10.0.0.5, 10.0.0.1")) == "10.0.0.5"
+
+
+
+def request_with_body(body: bytes) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({"type": "http", "headers": [], "client": ("203.0.113.7", 1234)}, receive)
+
+
+async def test_login_key_is_hashed_and_identifier_length_limited(client):
+    key_func = limiter.json_field("login_identifier")
+    huge = "X" * 10_000 + "@example.com"
+    key = await key_func(request_with_body(json.dumps({"login_identifier": huge}).encode()))
+    assert len(key) == 64
+    assert key == await key_func(request_with_body(json.dumps({"login_identifier": f" {huge.lower()} "}).encode()))
+
+    resp = await client.post("/api/auth/login", json={"login_identifier": huge, "password": "wrong-password"})
+    assert resp.status_code == 422
@@ -0,0 +1,50 @@
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+USER = {"full_name": "Refresh User", "email": "refresh@example.com", "phone": "+79005550201",
+        "password": "password123", "birthday": "2000-01-01", "gender": "female"}
+
+
+async def login(client):
+    await client.post("/api/auth/register", json=USER)
+    resp = await client.post("/api/auth/login",
+                             json={"login_identifier": USER["email"], "password": USER["password"]})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+async def test_refresh_rotates_token(client):
+    tokens = await login(client)
+
+    resp = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 200
+    rotated = resp.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    me = await client.get("/api/users/me", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert me.status_code == 200
+
+
+async def test_refresh_token_reuse_revokes_family(client):
+    tokens = await login(client)
+    first = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+    # Повторное использование погашенного токена — признак кражи
+    reuse = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert reuse.status_code == 401
+
+    resp = await client.post("/api/auth/refresh", json={"refresh_token": first.json()["refresh_token"]})
+    assert resp.status_code == 401
+
+
+async def test_logout_revokes_access_token(client):
+    tokens = await login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    resp = await client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert resp.status_code == 204
+
+    assert (await client.get("/api/users/me", headers=headers)).status_code == 401
+    resp = await client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
@@ -0,0 +1,50 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from db import get_session, new_session, on_commit
+from db.events import EventOrm
+from events.repository import EventRepository
+from events.schemas import SEventAdd
+
+pytestmark = pytest.mark.asyncio
+
+
+def new_event(title: str) -> SEventAdd:
+    return SEventAdd(title=title, date=datetime.date.today(), is_team=False, max_members=5)
+
+
+async def event_titles() -> list[str]:
+    async with new_session() as session:
+        return (await session.scalars(select(EventOrm.title).order_by(EventOrm.id))).all()
+
+
+async def test_request_session_commits_once_after_endpoint():
+    committed = []
+    dependency = get_session()
+    session = await anext(dependency)
+
+    await EventRepository.add_one(new_event("First"), session=session)
+    await EventRepository.add_one(new_event("Second"), session=session)
+    on_commit(session, committed.append, "done")
+    assert committed == []
+
+    with pytest.raises(StopAsyncIteration):
+        await anext(dependency)
+    assert committed == ["done"]
+    assert await event_titles() == ["First", "Second"]
+
+
+async def test_request_session_rolls_back_whole_request_on_error():
+    committed = []
+    dependency = get_session()
+    session = await anext(dependency)
+
+    await EventRepository.add_one(new_event("Lost"), session=session)
+    on_commit(session, committed.append, "done")
+
+    with pytest.raises(RuntimeError):
+        await dependency.athrow(RuntimeError("endpoint failed"))
+    assert committed == []
+    assert await event_titles() == []
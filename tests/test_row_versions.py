@@ -0,0 +1,80 @@
+import datetime
+
+import pytest
+from sqlalchemy import update
+
+from db import new_session
+from db.users import UserOrm, RoleEnum
+from events.exceptions import VersionConflictError
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SEventUpdate
+
+pytestmark = pytest.mark.asyncio
+
+
+async def create_event() -> int:
+    return await EventRepository.add_one(SEventAdd(
+        title="Versioned", date=datetime.date.today(), is_team=False, max_members=5,
+    ))
+
+
+async def organizer_headers(client) -> dict:
+    await client.post("/api/auth/register", json={
+        "full_name": "Organizer", "email": "org_versions@example.com", "phone": "+79005550301",
+        "password": "password123", "birthday": "2000-01-01", "gender": "male",
+    })
+    async with new_session() as session:
+        await session.execute(update(UserOrm).where(UserOrm.email == "org_versions@example.com")
+                              .values(role=RoleEnum.organizer))
+        await session.commit()
+    resp = await client.post("/api/auth/login", json={
+        "login_identifier": "org_versions@example.com", "password": "password123",
+    })
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+async def test_edit_bumps_version():
+    event_id = await create_event()
+    assert (await EventRepository.get_by_id(event_id)).version == 1
+
+    await EventRepository.edit(event_id, SEventUpdate(title="Second"))
+    assert (await EventRepository.get_by_id(event_id)).version == 2
+
+    with pytest.raises(VersionConflictError):
+        await EventRepository.edit(event_id, SEventUpdate(title="Stale"), expected_version=1)
+    assert (await EventRepository.get_by_id(event_id)).title == "Second"
+
+
+async def test_patch_honours_if_match(client):
+    event_id = await create_event()
+    headers = await organizer_headers(client)
+    version = (await client.get(f"/api/events/{event_id}")).json()["version"]
+
+    resp = await client.patch(f"/api/events/{event_id}", json={"title": "First"},
+                              headers={**headers, "If-Match": f'"{version}"'})
+    assert resp.status_code == 200
+
+    resp = await client.patch(f"/api/events/{event_id}", json={"title": "Lost"},
+                              headers={**headers, "If-Match": f'"{version}"'})
+    assert resp.status_code == 412
+
+    resp = await client.patch(f"/api/events/{event_id}", json={"title": "Unconditional"}, headers=headers)
+    assert resp.status_code == 200
+    assert (await client.get(f"/api/events/{event_id}")).json()["title"] == "Unconditional"
+
+
+async def test_get_etag_is_accepted_by_if_match(client):
+    event_id = await create_event()
+    headers = await organizer_headers(client)
+    etag = (await client.get(f"/api/events/{event_id}")).headers["ETag"]
+    assert not etag.startswith("W/")
+
+    resp = await client.patch(f"/api/events/{event_id}", json={"title": "First"}, headers={**headers, "If-Match": etag})
+    assert resp.status_code == 200
+    resp = await client.patch(f"/api/events/{event_id}", json={"title": "Lost"}, headers={**headers, "If-Match": etag})
+    assert resp.status_code == 412
+
+    fresh = (await client.get(f"/api/events/{event_id}")).headers["ETag"]
+    assert fresh != etag
+    resp = await client.get(f"/api/events/{event_id}", headers={"If-None-Match": fresh})
+    assert resp.status_code == 304
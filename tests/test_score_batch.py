@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from activities.repository import ActivityRepository
+from db import new_session
+from db.events import ScoreOrm
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SParticipationCreate, SScoreAdd, SActivityAdd, SJudgeAdd
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_batch_inserts_valid_scores_and_reports_errors_per_item(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Robotics", date=datetime.date.today(), is_team=False, max_members=10,
+    ))
+    judge, first, second = await create_users(3)
+    await EventRepository.add_judge_to_event(event_id, SJudgeAdd(handle="us00000000"))
+    p_first, p_second = [
+        await EventRepository.add_participation(event_id, user_id, SParticipationCreate(participant_type="individual"))
+        for user_id in (first, second)
+    ]
+    sprint = await ActivityRepository.add_one(event_id, SActivityAdd(name="Sprint", is_scoreable=True, max_score=10))
+    noon = datetime.datetime.combine(datetime.date.today(), datetime.time(12))
+    lunch = await ActivityRepository.add_one(event_id, SActivityAdd(
+        name="Lunch", start_dt=noon, end_dt=noon + datetime.timedelta(hours=1),
+    ))
+
+    results = await EventRepository.add_scores_batch(judge, [
+        SScoreAdd(participation_id=p_first.id, activity_id=sprint, score=7),
+        SScoreAdd(participation_id=p_second.id, activity_id=sprint, score=11),
+        SScoreAdd(participation_id=p_second.id, activity_id=lunch, score=1),
+        SScoreAdd(participation_id=p_second.id, score=5),
+        SScoreAdd(participation_id=10_000, activity_id=sprint, score=1),
+        SScoreAdd(participation_id=p_first.id, activity_id=sprint, score=2),
+        SScoreAdd(participation_id=p_second.id, activity_id=sprint, score=4),
+    ])
+
+    assert [type(r) for r in results] == [int, ValueError, ValueError, PermissionError, ValueError, int, int]
+    async with new_session() as session:
+        scores = (await session.scalars(select(ScoreOrm).order_by(ScoreOrm.id))).all()
+    assert [(s.id, s.participation_id, s.score, s.judge_id) for s in scores] == [
+        (results[0], p_first.id, 7, judge), (results[5], p_first.id, 2, judge), (results[6], p_second.id, 4, judge),
+    ]
+
+    leaderboard = await EventRepository.get_leaderboard(event_id)
+    assert [(p.id, total) for p, total in leaderboard] == [(p_first.id, 9), (p_second.id, 4)]
+
+
+async def test_client_key_replays_return_the_recorded_score(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Outdoor", date=datetime.date.today(), is_team=False, max_members=10,
+    ))
+    judge, first = await create_users(2)
+    await EventRepository.add_judge_to_event(event_id, SJudgeAdd(handle="us00000000"))
+    participation = await EventRepository.add_participation(
+        event_id, first, SParticipationCreate(participant_type="individual"))
+    sprint = await ActivityRepository.add_one(event_id, SActivityAdd(name="Sprint", is_scoreable=True, max_score=10))
+
+    score = SScoreAdd(participation_id=participation.id, activity_id=sprint, score=6, client_key="k-1")
+    score_id = await EventRepository.add_score(judge, score)
+    assert await EventRepository.add_score(judge, score) == score_id
+
+    results = await EventRepository.add_scores_batch(judge, [
+        score,
+        score.model_copy(update={"client_key": "k-2"}),
+        score.model_copy(update={"client_key": "k-2"}),
+        score.model_copy(update={"client_key": "k-1", "score": 9}),
+        score.model_copy(update={"client_key": "k-3", "score": 3}),
+        score.model_copy(update={"client_key": "k-3", "score": 4}),
+    ])
+    assert results[0] == score_id
+    assert isinstance(results[1], int) and results[2] == results[1]
+    assert isinstance(results[3], ValueError)
+    assert isinstance(results[4], int) and isinstance(results[5], ValueError)
+
+    async with new_session() as session:
+        keys = (await session.scalars(select(ScoreOrm.client_key).order_by(ScoreOrm.id))).all()
+    assert keys == ["k-1", "k-2", "k-3"]
+    [(_, total)] = await EventRepository.get_leaderboard(event_id)
+    assert total == 6 + 6 + 3
+
+
+async def test_client_keys_are_scoped_to_the_submitter(create_users):
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Keys", date=datetime.date.today(), is_team=False, max_members=10,
+    ))
+    judge, other_judge, outsider, first = await create_users(4)
+    for handle in ("us00000000", "us00000001"):
+        await EventRepository.add_judge_to_event(event_id, SJudgeAdd(handle=handle))
+    participation = await EventRepository.add_participation(
+        event_id, first, SParticipationCreate(participant_type="individual"))
+    sprint = await ActivityRepository.add_one(event_id, SActivityAdd(name="Sprint", is_scoreable=True, max_score=10))
+
+    score = SScoreAdd(participation_id=participation.id, activity_id=sprint, score=6, client_key="k-1")
+    score_id = await EventRepository.add_score(judge, score)
+
+    # Чужой ключ не возвращает чужую оценку и не обходит проверку прав
+    with pytest.raises(PermissionError):
+        await EventRepository.add_score(outsider, score)
+    other_id = await EventRepository.add_score(other_judge, score)
+    assert other_id != score_id
+    assert await EventRepository.add_score(other_judge, score) == other_id
+
+    async with new_session() as session:
+        rows = (await session.execute(select(ScoreOrm.submitter_id, ScoreOrm.client_key).order_by(ScoreOrm.id))).all()
+    assert rows == [(judge, "k-1"), (other_judge, "k-1")]
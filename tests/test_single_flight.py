@@ -0,0 +1,74 @@
+import asyncio
+import datetime
+
+import pytest
+
+from events.repository import EventRepository
+from events.schemas import SEventAdd
+from helpers.singleflight import SingleFlight, flights
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_calls_share_one_load():
+    group = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    results = await asyncio.gather(*(group.do("key", load) for _ in range(20)))
+
+    assert results == [1] * 20
+    assert group.stats() == {"in_flight": 0, "flights": 1, "coalesced": 19, "ttl_hits": 0}
+    assert await group.do("key", load) == 2
+
+
+async def test_errors_are_shared_and_not_remembered():
+    group = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*(group.do("key", fail, ttl=10) for _ in range(5)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert group.flights == 1
+
+    async def recover():
+        return "ok"
+
+    assert await group.do("key", recover, ttl=10) == "ok"
+
+
+async def test_ttl_serves_recent_result():
+    group = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await group.do("key", load, ttl=10) == 1
+    assert await group.do("key", load, ttl=10) == 1
+    assert group.ttl_hits == 1
+    group.clear()
+    assert await group.do("key", load, ttl=10) == 2
+
+
+async def test_write_bumps_key_past_recent_body(client):
+    await EventRepository.add_one(SEventAdd(title="First", date=datetime.date.today(), is_team=False, max_members=10))
+    responses = await asyncio.gather(*(client.get("/events") for _ in range(10)))
+    assert {len(r.json()["items"]) for r in responses} == {1}
+    flights_before = flights.flights
+
+    await EventRepository.add_one(SEventAdd(title="Second", date=datetime.date.today(), is_team=False, max_members=10))
+    response = await client.get("/events")
+
+    assert len(response.json()["items"]) == 2
+    assert flights.flights == flights_before + 1
@@ -0,0 +1,100 @@
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import select, update
+
+from activities.repository import ActivityRepository
+from db import new_session
+from db.sync import SyncChangeOrm
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SEventUpdate, SActivityAdd, SParticipationCreate
+from helpers.pagination import encode_cursor
+
+pytestmark = pytest.mark.asyncio
+
+
+async def register_and_login(client, email, phone) -> tuple[dict, uuid.UUID]:
+    await client.post("/api/auth/register", json={
+        "full_name": "Sync User", "email": email, "phone": phone, "password": "password123",
+        "birthday": "2000-01-01", "gender": "male",
+    })
+    resp = await client.post("/api/auth/login", json={"login_identifier": email, "password": "password123"})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    me = await client.get("/api/users/me", headers=headers)
+    return headers, uuid.UUID(me.json()["id"])
+
+
+async def create_event(title="Sync") -> int:
+    return await EventRepository.add_one(SEventAdd(
+        title=title, date=datetime.date.today(), is_team=True, max_members=10, max_teams=5,
+    ))
+
+
+async def test_sync_returns_only_changes_since_cursor(client):
+    headers, _ = await register_and_login(client, "sync1@example.com", "+79005550401")
+    old_event = await create_event("Old")
+
+    cursor = (await client.get("/api/sync", headers=headers)).json()["next_cursor"]
+    empty = (await client.get("/api/sync", params={"cursor": cursor}, headers=headers)).json()
+    assert empty["events"] == [] and empty["deleted"] == []
+
+    new_event = await create_event("New")
+    await EventRepository.edit(new_event, SEventUpdate(title="Renamed"))
+    activity_id = await ActivityRepository.add_one(new_event, SActivityAdd(name="Quiz", is_scoreable=True,
+                                                                           max_score=10))
+    await EventRepository.delete(old_event)
+
+    page = (await client.get("/api/sync", params={"cursor": cursor}, headers=headers)).json()
+    assert [(e["id"], e["title"], e["version"]) for e in page["events"]] == [(new_event, "Renamed", 2)]
+    assert [a["id"] for a in page["activities"]] == [activity_id]
+    assert page["deleted"] == [{"entity": "event", "id": old_event}]
+
+    again = (await client.get("/api/sync", params={"cursor": page["next_cursor"]}, headers=headers)).json()
+    assert again["events"] == [] and again["activities"] == [] and again["deleted"] == []
+
+
+async def test_sync_scopes_participations_to_own_events(client):
+    headers, user_id = await register_and_login(client, "sync2@example.com", "+79005550402")
+    other_headers, other_id = await register_and_login(client, "sync3@example.com", "+79005550403")
+    cursor = (await client.get("/api/sync", headers=headers)).json()["next_cursor"]
+
+    mine = await create_event("Mine")
+    foreign = await create_event("Foreign")
+    team = await EventRepository.add_participation(mine, user_id, SParticipationCreate(
+        participant_type="team", team_name="Ours"))
+    await EventRepository.add_participation(foreign, other_id, SParticipationCreate(
+        participant_type="team", team_name="Theirs"))
+    await EventRepository.add_member_to_participation(team.id, other_id)
+
+    page = (await client.get("/api/sync", params={"cursor": cursor}, headers=headers)).json()
+    assert [p["id"] for p in page["participations"]] == [team.id]
+
+    other_cursor = (await client.get("/api/sync", headers=other_headers)).json()["next_cursor"]
+    await EventRepository.remove_member_from_participation(team.id, other_id, user_id)
+    page = (await client.get("/api/sync", params={"cursor": other_cursor}, headers=other_headers)).json()
+    assert {"entity": "participation", "id": team.id} in page["deleted"]
+    assert page["participations"] == []
+
+
+async def test_sync_rejects_bad_cursor(client):
+    headers, _ = await register_and_login(client, "sync4@example.com", "+79005550404")
+    resp = await client.get("/api/sync", params={"cursor": "garbage"}, headers=headers)
+    assert resp.status_code == 400
+
+
+async def test_sync_orders_by_transaction(client):
+    headers, _ = await register_and_login(client, "sync5@example.com", "+79005550405")
+    early, late = await create_event("Early"), await create_event("Late")
+    # Транзакция с меньшим txid могла получить больший id и закоммититься последней
+    async with new_session() as session:
+        await session.execute(update(SyncChangeOrm).where(SyncChangeOrm.entity_id == early).values(txid=7))
+        await session.execute(update(SyncChangeOrm).where(SyncChangeOrm.entity_id == late).values(txid=5))
+        await session.commit()
+        late_id = await session.scalar(select(SyncChangeOrm.id).where(SyncChangeOrm.entity_id == late))
+
+    page = (await client.get("/api/sync", params={"cursor": encode_cursor(5, late_id)}, headers=headers)).json()
+    assert [e["id"] for e in page["events"]] == [early]
+
+    id_only = await client.get("/api/sync", params={"cursor": encode_cursor(late_id)}, headers=headers)
+    assert id_only.status_code == 400
@@ -0,0 +1,80 @@
+import asyncio
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import select, func
+
+from db import new_session
+from db.events import ParticipationMemberOrm, EventParticipationOrm
+from events.repository import EventRepository
+from events.schemas import SEventAdd, SParticipationCreate
+
+pytestmark = pytest.mark.asyncio
+
+
+async def create_team(captain_id: uuid.UUID, max_members: int) -> EventParticipationOrm:
+    event_id = await EventRepository.add_one(SEventAdd(
+        title="Teams", date=datetime.date.today(), is_team=True, max_teams=1, max_members=max_members,
+    ))
+    return await EventRepository.add_participation(
+        event_id, captain_id, SParticipationCreate(participant_type="team", team_name="Team"))
+
+
+async def members_of(participation_id: int) -> set[uuid.UUID]:
+    async with new_session() as session:
+        rows = await session.scalars(
+            select(ParticipationMemberOrm.user_id).where(ParticipationMemberOrm.participation_id == participation_id))
+        return set(rows.all())
+
+
+async def test_concurrent_joins_do_not_overfill_team(create_users):
+    captain, *joiners = await create_users(11)
+    team = await create_team(captain, max_members=3)
+
+    async def join(user_id):
+        try:
+            await EventRepository.add_member_to_participation(team.id, user_id)
+            return True
+        except ValueError:
+            return False
+
+    results = await asyncio.gather(*(join(user_id) for user_id in joiners))
+
+    assert results.count(True) == 2
+    assert len(await members_of(team.id)) == 3
+
+
+async def test_join_missing_participation_raises_value_error(create_users):
+    (user_id,) = await create_users(1)
+    with pytest.raises(ValueError):
+        await EventRepository.add_member_to_participation(123456, user_id)
+
+
+async def test_captain_leaving_passes_captaincy_then_dissolves_team(create_users):
+    captain, member = await create_users(2)
+    team = await create_team(captain, max_members=3)
+    await EventRepository.add_member_to_participation(team.id, member)
+
+    await EventRepository.remove_member_from_participation(team.id, captain, captain)
+    async with new_session() as session:
+        participation = await session.get(EventParticipationOrm, team.id)
+    assert participation.creator_id == member
+    assert await members_of(team.id) == {member}
+
+    await EventRepository.captain_leaves_team(team.id, member)
+    async with new_session() as session:
+        count = await session.scalar(select(func.count()).select_from(EventParticipationOrm))
+    assert count == 0
+
+
+async def test_member_cannot_kick_others(create_users):
+    captain, first, second = await create_users(3)
+    team = await create_team(captain, max_members=3)
+    await EventRepository.add_member_to_participation(team.id, first)
+    await EventRepository.add_member_to_participation(team.id, second)
+
+    with pytest.raises(PermissionError):
+        await EventRepository.remove_member_from_participation(team.id, second, first)
+    await EventRepository.remove_member_from_participation(team.id, second, captain)
+    assert await members_of(team.id) == {captain, first}
@@ -0,0 +1,59 @@
+import jwt
+import pytest
+
+from config import SECRET_KEY, ALGORITHM
+from db import new_session
+from db.users import UserOrm, RoleEnum
+from sqlalchemy import update
+
+pytestmark = pytest.mark.asyncio
+
+
+async def login(client, email):
+    resp = await client.post("/api/auth/login", json={"login_identifier": email, "password": "password123"})
+    return resp.json()["access_token"]
+
+
+async def register_and_login(client, email, phone):
+    await client.post("/api/auth/register", json={
+        "full_name": "Claims User", "email": email, "phone": phone, "password": "password123",
+        "birthday": "2000-01-01", "gender": "male",
+    })
+    return await login(client, email)
+
+
+async def test_access_token_carries_role_claims(client):
+    token = await register_and_login(client, "claims@example.com", "+79005550101")
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    assert payload["role"] == "user"
+    assert payload["ver"] == 0
+    assert payload["handle"]
+
+
+async def test_role_change_revokes_old_tokens(client):
+    admin_token = await register_and_login(client, "admin_claims@example.com", "+79005550102")
+    admin_id = jwt.decode(admin_token, SECRET_KEY, algorithms=[ALGORITHM])["sub"]
+    async with new_session() as session:
+        await session.execute(update(UserOrm).where(UserOrm.email == "admin_claims@example.com")
+                              .values(role=RoleEnum.admin))
+        await session.commit()
+    admin_token = await login(client, "admin_claims@example.com")
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+
+    org_token = await register_and_login(client, "org_claims@example.com", "+79005550103")
+    org_id = jwt.decode(org_token, SECRET_KEY, algorithms=[ALGORITHM])["sub"]
+    resp = await client.patch(f"/api/users/{org_id}/role", json={"role": "organizer"}, headers=admin_headers)
+    assert resp.status_code == 200
+
+    # Токен, выданный до смены роли, больше не принимается
+    event = {"title": "Claims", "date": "2030-01-01", "is_team": False, "max_members": 5}
+    resp = await client.post("/api/events", json=event, headers={"Authorization": f"Bearer {org_token}"})
+    assert resp.status_code == 401
+
+    org_token = await login(client, "org_claims@example.com")
+    resp = await client.post("/api/events", json=event, headers={"Authorization": f"Bearer {org_token}"})
+    assert resp.status_code == 200
+
+    resp = await client.patch(f"/api/users/{admin_id}/role", json={"role": "user"},
+                              headers={"Authorization": f"Bearer {org_token}"})
+    assert resp.status_code == 403
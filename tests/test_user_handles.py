@@ -0,0 +1,57 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+import users.repository as users_repository
+from auth.exceptions import UserAlreadyExistsError
+from users.repository import UserRepository
+from users.schemas import SUserRegister
+
+
+
+def registration(email: str, phone: str) -> SUserRegister:
+    return SUserRegister(full_name="Handle User", email=email, phone=phone, password="password123",
+                         birthday=datetime.date(2000, 1, 1), gender="male")
+
+
+@pytest.mark.asyncio
+async def test_handle_collision_is_retried(monkeypatch):
+    first = await UserRepository.create_user(registration("h1@example.com", "+79005550301"))
+
+    # Первая попытка повторяет уже занятый handle, дальше — случайные
+    handles = iter([first.handle])
+    original = users_repository.random_handle
+    monkeypatch.setattr(users_repository, "random_handle", lambda: next(handles, None) or original())
+
+    second = await UserRepository.create_user(registration("h2@example.com", "+79005550302"))
+    assert second.handle != first.handle
+
+
+@pytest.mark.asyncio
+async def test_duplicate_email_is_not_retried():
+    await UserRepository.create_user(registration("dup@example.com", "+79005550303"))
+    with pytest.raises(UserAlreadyExistsError):
+        await UserRepository.create_user(registration("dup@example.com", "+79005550304"))
+
+
+class FakeDriverError(Exception):
+    def __init__(self, message: str, constraint_name: str):
+        super().__init__(message)
+        self.diag = SimpleNamespace(constraint_name=constraint_name)
+
+
+def test_handle_conflict_is_detected_by_constraint_name():
+    detail = 'duplicate key value violates unique constraint\nDETAIL: Key (email)=(handle@x.com) already exists.'
+    email = IntegrityError("INSERT", {}, FakeDriverError(detail, "ix_users_email"))
+    handle = IntegrityError("INSERT", {}, FakeDriverError("duplicate key", "ix_users_handle"))
+    assert not users_repository.is_handle_conflict(email)
+    assert users_repository.is_handle_conflict(handle)
+
+
+@pytest.mark.asyncio
+async def test_email_mentioning_handle_is_a_conflict_not_a_retry():
+    await UserRepository.create_user(registration("handle@example.com", "+79005550305"))
+    with pytest.raises(UserAlreadyExistsError):
+        await UserRepository.create_user(registration("handle@example.com", "+79005550306"))
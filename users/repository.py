@@ -6,57 +6,93 @@ from sqlalchemy import select, or_, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db import new_session
-from db.users import UserOrm
-from users.schemas import SUserRegister, SUserUpdate
-from auth.security import get_password_hash, verify_password
+from db import use_session, commit, on_commit
+from db.users import UserOrm, RoleEnum
+from users.schemas import SUserRegister, SUserUpdate, SUserPublic
+from auth.hashing import password_hasher
+from auth.principal_cache import principal_cache
+from events.cache import user_changed
+from auth.repository import TokenRepository
+from auth.revocation import revocation_index
 from auth.exceptions import UserAlreadyExistsError
 
 
+HANDLE_LENGTH = 10
+HANDLE_CANDIDATES = 16
+HANDLE_INSERT_ATTEMPTS = 3
+# Уникальный индекс, который SQLAlchemy создает для UserOrm.handle (unique=True, index=True)
+HANDLE_CONSTRAINT = "ix_users_handle"
+
+
+def random_handle() -> str:
+    return "".join(random.choices(string.digits, k=HANDLE_LENGTH))
+
+
 async def generate_unique_handle(session: AsyncSession) -> str:
     """
-    Генерирует уникальный handle, используя переданную сессию.
+    Генерирует уникальный handle за один запрос к БД:
+    проверяет сразу пачку случайных кандидатов и берет первый свободный.
     """
+    candidates = list(dict.fromkeys(random_handle() for _ in range(HANDLE_CANDIDATES)))
+    taken = set(await session.scalars(select(UserOrm.handle).where(UserOrm.handle.in_(candidates))))
 
-    for _ in range(20):
-        handle = "".join(random.choices(string.digits, k=10))
-
-        existing_user = await session.execute(
-            select(UserOrm).where(UserOrm.handle == handle)
-        )
-        if not existing_user.scalar_one_or_none():
+    for handle in candidates:
+        if handle not in taken:
             return handle
 
-    raise RuntimeError("Could not generate a unique handle after 20 attempts.")
+    raise RuntimeError(f"Could not generate a unique handle from {HANDLE_CANDIDATES} candidates.")
+
+
+def is_handle_conflict(error: IntegrityError) -> bool:
+    """
+    Нарушена ли уникальность именно handle, а не email или телефона. PostgreSQL сообщает имя
+    ограничения (psycopg — в diag, asyncpg — в исходном исключении); SQLite — только колонку.
+    Текст DETAIL не годится: в нем есть значения, и email вида handle@x.com сошел бы за коллизию.
+    """
+    orig = error.orig
+    constraint = (getattr(getattr(orig, "diag", None), "constraint_name", None)
+                  or getattr(orig.__cause__, "constraint_name", None))
+    if constraint is not None:
+        return constraint == HANDLE_CONSTRAINT
+    return str(orig) == "UNIQUE constraint failed: users.handle"
 
 
 class UserRepository:
     @classmethod
-    async def create_user(cls, data: SUserRegister) -> UserOrm:
+    async def create_user(cls, data: SUserRegister, session: AsyncSession | None = None) -> UserOrm:
         """
         Создает нового пользователя. Ловит ошибку уникальности от БД.
+        Handle вставляется сразу, без предварительной проверки; при редкой коллизии
+        следующий handle подбирается одним запросом.
         """
-        async with new_session() as session:
-            try:
-                user_dict = data.model_dump()
-                user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
-                user_dict["handle"] = await generate_unique_handle(session)
+        user_dict = data.model_dump()
+        user_dict["hashed_password"] = await password_hasher.hash(user_dict.pop("password"))
+        user_dict["handle"] = random_handle()
 
+        async with use_session(session) as session:
+            for _ in range(HANDLE_INSERT_ATTEMPTS):
                 new_user = UserOrm(**user_dict)
-                session.add(new_user)
-                await session.flush()
-                await session.commit()
+                try:
+                    # Savepoint: коллизия откатывает только эту вставку, а не транзакцию запроса
+                    async with session.begin_nested():
+                        session.add(new_user)
+                except IntegrityError as e:
+                    if not is_handle_conflict(e):
+                        raise UserAlreadyExistsError from e
+                    user_dict["handle"] = await generate_unique_handle(session)
+                    continue
+                await commit(session)
                 return new_user
-            except IntegrityError as e:
-                await session.rollback()
-                raise UserAlreadyExistsError from e
+
+            raise RuntimeError(f"Could not insert a unique handle after {HANDLE_INSERT_ATTEMPTS} attempts.")
 
     @classmethod
-    async def get_user_by_login_identifier(cls, login_identifier: str) -> UserOrm | None:
+    async def get_user_by_login_identifier(cls, login_identifier: str,
+                                           session: AsyncSession | None = None) -> UserOrm | None:
         """
         Находит пользователя по email или номеру телефона.
         """
-        async with new_session() as session:
+        async with use_session(session) as session:
             query = select(UserOrm).where(
                 or_(
                     UserOrm.email == login_identifier,
@@ -67,21 +103,22 @@ class UserRepository:
             return result.scalar_one_or_none()
 
     @classmethod
-    async def get_user_by_id(cls, user_id: uuid.UUID) -> UserOrm | None:
+    async def get_user_by_id(cls, user_id: uuid.UUID, session: AsyncSession | None = None) -> UserOrm | None:
         """Находит пользователя по его UUID."""
-        async with new_session() as session:
+        async with use_session(session) as session:
             query = select(UserOrm).where(UserOrm.id == user_id)
             result = await session.execute(query)
             return result.scalar_one_or_none()
 
     @classmethod
-    async def update_user(cls, user_id: uuid.UUID, data: SUserUpdate) -> UserOrm | None:
+    async def update_user(cls, user_id: uuid.UUID, data: SUserUpdate,
+                          session: AsyncSession | None = None) -> UserOrm | None:
         """Обновляет данные пользователя."""
-        async with new_session() as session:
+        async with use_session(session) as session:
             update_data = data.model_dump(exclude_unset=True)
 
             if not update_data:
-                return await cls.get_user_by_id(user_id)
+                return await cls.get_user_by_id(user_id, session)
 
             stmt = (
                 update(UserOrm)
@@ -89,31 +126,59 @@ class UserRepository:
                 .values(**update_data)
                 .returning(UserOrm)
             )
-            result = await session.execute(stmt)
-            await session.commit()
-            return result.scalar_one_or_none()
+            user = (await session.execute(stmt)).scalar_one_or_none()
+            on_commit(session, principal_cache.invalidate, user_id)
+            if user and update_data.keys() & SUserPublic.model_fields.keys():
+                await user_changed(session, user_id)
+            await commit(session)
+            return user
 
     @classmethod
-    async def update_password(cls, user_id: uuid.UUID, old_password: str, new_password: str) -> bool:
-        """Проверяет старый пароль и обновляет на новый."""
-        async with new_session() as session:
-            user = await session.get(UserOrm, user_id)
-            if not user or not verify_password(old_password, user.hashed_password):
-                return False
-            new_hashed_password = get_password_hash(new_password)
-            stmt = (
+    async def update_password(cls, user_id: uuid.UUID, old_password: str, new_password: str,
+                              session: AsyncSession | None = None) -> bool:
+        """
+        Проверяет старый пароль и обновляет на новый. Хеш читается отдельной короткой сессией,
+        чтобы соединение не держалось, пока работает bcrypt.
+        """
+        user = await cls.get_user_by_id(user_id)
+        if not user or not await password_hasher.verify(old_password, user.hashed_password):
+            return False
+        new_hashed_password = await password_hasher.hash(new_password)
+
+        async with use_session(session) as session:
+            # Пароль могли сменить параллельно: обновляем, только если хеш тот же, что проверяли
+            res = await session.execute(
                 update(UserOrm)
-                .where(UserOrm.id == user_id)
+                .where(UserOrm.id == user_id, UserOrm.hashed_password == user.hashed_password)
                 .values(hashed_password=new_hashed_password)
             )
-            await session.execute(stmt)
-            await session.commit()
-            return True
+            on_commit(session, principal_cache.invalidate, user_id)
+            await commit(session)
+            return bool(res.rowcount)
 
     @classmethod
-    async def get_user_by_handle(cls, handle: str) -> UserOrm | None:
+    async def get_user_by_handle(cls, handle: str, session: AsyncSession | None = None) -> UserOrm | None:
         """Находит пользователя по его handle."""
-        async with new_session() as session:
+        async with use_session(session) as session:
             query = select(UserOrm).where(UserOrm.handle == handle)
             result = await session.execute(query)
             return result.scalar_one_or_none()
+
+    @classmethod
+    async def update_role(cls, user_id: uuid.UUID, role: RoleEnum,
+                          session: AsyncSession | None = None) -> UserOrm | None:
+        """Меняет роль пользователя и отзывает все ранее выданные ему токены."""
+        async with use_session(session) as session:
+            stmt = (
+                update(UserOrm)
+                .where(UserOrm.id == user_id)
+                .values(role=role, token_version=UserOrm.token_version + 1)
+                .returning(UserOrm)
+            )
+            user = (await session.execute(stmt)).scalar_one_or_none()
+            if user:
+                expires_at = await TokenRepository.revoke_user_tokens(user_id, user.token_version, session=session)
+                on_commit(session, revocation_index.revoke_user, user_id, user.token_version, expires_at)
+            on_commit(session, principal_cache.invalidate, user_id)
+            await commit(session)
+        return user
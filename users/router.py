@@ -1,14 +1,19 @@
 import shutil
+import uuid
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.dependencies import get_current_user
+from auth.exceptions import PasswordHasherBusyError
+from auth.roles import require_role
 from config import AVATAR_DIR
-from db.users import UserOrm
+from db import get_session
+from db.users import UserOrm, RoleEnum
 from events.repository import EventRepository
-from events.schemas import SParticipationOut
+from events.schemas import SParticipationPage
 from users.repository import UserRepository
-from users.schemas import SUserOut, SUserUpdate, SPasswordUpdate
+from users.schemas import SUserOut, SUserUpdate, SPasswordUpdate, SUserRoleUpdate, STokenClaims
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -19,19 +24,31 @@ async def read_users_me(current_user: UserOrm = Depends(get_current_user)):
     return current_user
 
 
-@router.get("/me/participations", response_model=list[SParticipationOut])
-async def read_my_participations(current_user: UserOrm = Depends(get_current_user)):
-    """Возвращает список мероприятий, в которых участвует текущий пользователь."""
-    return await EventRepository.get_participations_for_user(current_user.id)
+@router.get("/me/participations", response_model=SParticipationPage)
+async def read_my_participations(
+        cursor: str | None = None,
+        limit: int = Query(50, ge=1, le=200),
+        current_user: UserOrm = Depends(get_current_user),
+        session: AsyncSession = Depends(get_session),
+):
+    """Возвращает страницу участий текущего пользователя. Следующая страница — по next_cursor."""
+    try:
+        items, next_cursor = await EventRepository.get_participations_for_user(
+            current_user.id, cursor=cursor, limit=limit, session=session
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.patch("/me", response_model=SUserOut)
 async def update_users_me(
         user_data: SUserUpdate,
-        current_user: UserOrm = Depends(get_current_user)
+        current_user: UserOrm = Depends(get_current_user),
+        session: AsyncSession = Depends(get_session),
 ):
     """Обновляет данные текущего пользователя (рост, вес и т.д.)."""
-    updated_user = await UserRepository.update_user(current_user.id, user_data)
+    updated_user = await UserRepository.update_user(current_user.id, user_data, session=session)
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return updated_user
@@ -41,11 +58,19 @@ async def update_users_me(
 async def update_user_password(
         password_data: SPasswordUpdate,
         current_user: UserOrm = Depends(get_current_user),
+        session: AsyncSession = Depends(get_session),
 ):
     """Эндпоинт для смены пароля."""
-    success = await UserRepository.update_password(
-        current_user.id, password_data.old_password, password_data.new_password
-    )
+    try:
+        success = await UserRepository.update_password(
+            current_user.id, password_data.old_password, password_data.new_password, session=session
+        )
+    except PasswordHasherBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервис перегружен, попробуйте позже.",
+            headers={"Retry-After": "1"},
+        )
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -57,6 +82,7 @@ async def update_user_password(
 async def update_user_avatar(
         file: UploadFile = File(...),
         current_user: UserOrm = Depends(get_current_user),
+        session: AsyncSession = Depends(get_session),
 ):
     """Загрузка/замена аватара пользователя."""
 
@@ -82,6 +108,21 @@ async def update_user_avatar(
     avatar_url = f"/media/avatars/{new_name}"
     updated_user = await UserRepository.update_user(
         current_user.id,
-        SUserUpdate(avatar_url=avatar_url)
+        SUserUpdate(avatar_url=avatar_url),
+        session=session,
     )
     return updated_user
+
+
+@router.patch("/{user_id}/role", response_model=SUserOut)
+async def update_user_role(
+        user_id: uuid.UUID,
+        data: SUserRoleUpdate,
+        admin: STokenClaims = Depends(require_role(RoleEnum.admin)),
+        session: AsyncSession = Depends(get_session),
+):
+    """Меняет роль пользователя. Ранее выданные ему токены перестают действовать."""
+    updated_user = await UserRepository.update_role(user_id, data.role, session=session)
+    if not updated_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return updated_user
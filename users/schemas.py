@@ -24,7 +24,7 @@ class SUserRegister(BaseModel):
 
 
 class SLoginRequest(BaseModel):
-    login_identifier: str = Field(..., description="Email or Phone number")
+    login_identifier: str = Field(..., max_length=100, description="Email or Phone number")
     password: str
 
 
@@ -57,10 +57,29 @@ class SUserUpdate(BaseModel):
 
 class TokenOut(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
     expires_in: int
 
 
+class SRefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class STokenClaims(BaseModel):
+    """Подписанные данные пользователя, которые передаются в access-токене."""
+    user_id: uuid.UUID = Field(validation_alias="sub")
+    role: RoleEnum
+    handle: str
+    token_version: int = Field(validation_alias="ver")
+    jti: str
+    exp: datetime.datetime
+
+
+class SUserRoleUpdate(BaseModel):
+    role: RoleEnum
+
+
 class SPasswordUpdate(BaseModel):
     old_password: str
     new_password: str = Field(..., min_length=6, max_length=50)
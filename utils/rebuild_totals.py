@@ -0,0 +1,25 @@
+"""
+Пересчитывает participation_totals по таблице scores.
+
+    python -m utils.rebuild_totals              # все мероприятия
+    python -m utils.rebuild_totals --event 42   # одно мероприятие
+"""
+import argparse
+import asyncio
+
+from db import new_session
+from events.totals import rebuild_totals
+
+
+async def main(event_id: int | None) -> None:
+    async with new_session() as session:
+        await rebuild_totals(session, event_id)
+        await session.commit()
+    print("Итоги лидерборда пересчитаны.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--event", type=int, default=None, help="id мероприятия; по умолчанию — все")
+    args = parser.parse_args()
+    asyncio.run(main(args.event))
@@ -6,7 +6,8 @@ from db import new_session
 from db.events import EventActivityOrm, EventOrm, EventParticipationOrm, ParticipantTypeEnum, ParticipationMemberOrm, \
     ScoreOrm
 from db.users import UserOrm, RoleEnum
-from auth.security import get_password_hash
+from auth.hashing import password_hasher
+from events.totals import rebuild_totals
 
 INITIAL_USERS = {
     "admin": {
@@ -47,7 +48,7 @@ async def create_initial_users():
             if not user_exists.scalar_one_or_none():
                 print(f"Создание пользователя: {key}")
                 password = user_data.pop("password")
-                user_data["hashed_password"] = get_password_hash(password)
+                user_data["hashed_password"] = await password_hasher.hash(password)
 
                 user_data.setdefault("birthday", datetime.date.fromisoformat("2000-01-01"))
                 user_data.setdefault("gender", "male")
@@ -152,7 +153,7 @@ async def create_leaderboard_data():
         team_event = EventOrm(
             title="Чемпионат по скоростному программированию",
             date=today,
-            is_team=True, max_members=50, max_teams=10,
+            is_team=True, max_members=50, max_teams=10, teams_count=10,
             activities=[EventActivityOrm(**ad) for ad in activities_data]
         )
         session.add(team_event)
@@ -161,7 +162,7 @@ async def create_leaderboard_data():
         solo_event = EventOrm(
             title="Одиночный турнир по решению задач",
             date=today,
-            is_team=False, max_members=10,
+            is_team=False, max_members=10, individuals_count=10,
             activities=[EventActivityOrm(**ad) for ad in activities_data]
         )
         session.add(solo_event)
@@ -179,7 +180,7 @@ async def create_leaderboard_data():
             member = players[i + 10]
             team_participation = EventParticipationOrm(
                 event_id=team_event.id, creator_id=captain.id,
-                participant_type=ParticipantTypeEnum.team, team_name=f"Команда #{i + 1}"
+                participant_type=ParticipantTypeEnum.team, team_name=f"Команда #{i + 1}", member_count=2
             )
             team_participation.members.extend([
                 ParticipationMemberOrm(user_id=captain.id),
@@ -215,5 +216,8 @@ async def create_leaderboard_data():
                 )
                 session.add(score)
 
+        # Участия и очки созданы напрямую, минуя репозиторий, — считаем итоги лидерборда
+        await session.flush()
+        await rebuild_totals(session)
         await session.commit()
     print("Создание данных для лидерборда завершено.")